@@ -0,0 +1,176 @@
+"""
+Linear-elastic analysis of pin-jointed trusses.
+
+Every beam is a bar between its two nodes, with the section of the beam
+(width x height) and the stiffness of timber. The global stiffness matrix
+is assembled from all bars at once as a sparse matrix and solved with a
+sparse direct solver, so trusses of thousands of beams are analysed in a
+fraction of a second. Planar trusses (all nodes at the same Z) are solved
+in their XY plane. Axial forces are positive in tension; utilisation
+compares them with the tensile or compressive strength of the section and,
+in compression, with the Euler buckling load of the bar.
+
+Defaults are those of C24 softwood, in N and m.
+"""
+
+import math
+import warnings
+
+import numpy as np
+
+try:
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.linalg import spsolve
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+from polygon import coordinates
+
+
+class TrussAnalysis:
+    """Results of analyze, in the order of truss.beams and truss.nodes.
+
+    forces are the axial forces of the beams (N, tension positive),
+    utilisation their force over capacity, displacements and reactions the
+    (n, 3) node displacements (m) and support reactions (N).
+    """
+
+    def __init__(self, beams, forces, utilisation, displacements, reactions):
+
+        self.beams = beams
+        self.forces = forces
+        self.utilisation = utilisation
+        self.displacements = displacements
+        self.reactions = reactions
+
+    def per_beam(self):
+        """Returns {beam: (axial force, utilisation)}."""
+        return {beam: (float(force), float(ratio)) for beam, force, ratio in zip(self.beams, self.forces, self.utilisation)}
+
+    def failing(self):
+        """Beams whose utilisation exceeds 1."""
+        return [beam for beam, ratio in zip(self.beams, self.utilisation) if ratio > 1.0]
+
+    def __repr__(self):
+        return f"TrussAnalysis(Beams={len(self.beams)}, MaxUtilisation={self.utilisation.max(initial=0.0):.3f})"
+
+
+def _fixed_dofs(supports, n_nodes, dimensions):
+    """Boolean (n_nodes, dimensions) mask of restrained DOFs.
+
+    supports is an iterable of node indices, pinned in every direction, or a
+    dict {node index: (fix x, fix y, fix z)}.
+    """
+    fixed = np.zeros((n_nodes, dimensions), dtype=bool)
+    if isinstance(supports, dict):
+        for node, directions in supports.items():
+            fixed[node] = np.asarray(directions, dtype=bool)[:dimensions]
+    else:
+        fixed[list(supports)] = True
+    return fixed
+
+
+def analyze(truss, supports, loads=None, elastic_modulus=11e9, tensile_strength=14.5e6, compressive_strength=21e6,
+            density=420.0, gravity=None, tolerance=1e-9, residual_tolerance=1e-6):
+    """Solves the truss for nodal loads and returns a TrussAnalysis.
+
+    loads is a dict {node index: force vector} or an (n_nodes, 3) array.
+    With gravity (e.g. (0, 0, -9.81)) the self weight of every beam is added,
+    half to each of its nodes. Planar trusses only take the XY components of
+    loads and gravity. Raises ValueError if the supports leave the
+    truss free to move: the stiffness matrix cannot be solved, the solution
+    leaves an unbalanced force above residual_tolerance times the load, or
+    a node moves by more than the size of the truss.
+    """
+    beams = truss.beams
+    positions = np.array([coordinates(node.position)[0] for node in truss.nodes]).reshape(-1, 3)
+    ends = np.array([(beam.start_node, beam.end_node) for beam in beams], dtype=int).reshape(-1, 2)
+    widths = np.array([beam.width for beam in beams], dtype=float)
+    heights = np.array([beam.height for beam in beams], dtype=float)
+
+    planar = np.ptp(positions[:, 2]) <= tolerance if len(positions) else True
+    dimensions = 2 if planar else 3
+    n_nodes = len(positions)
+
+    # nodal forces
+    forces = np.zeros((n_nodes, 3))
+    if isinstance(loads, dict):
+        for node, force in loads.items():
+            forces[node] += np.asarray(force, dtype=float)
+    elif loads is not None:
+        forces += np.asarray(loads, dtype=float).reshape(n_nodes, 3)
+
+    vectors = positions[ends[:, 1]] - positions[ends[:, 0]]
+    lengths = np.linalg.norm(vectors, axis=1)
+    areas = widths * heights
+    if gravity is not None:
+        weights = 0.5 * (density * areas * lengths)[:, None] * np.asarray(gravity, dtype=float)
+        np.add.at(forces, ends[:, 0], weights)
+        np.add.at(forces, ends[:, 1], weights)
+
+    # element stiffness k * [[cc, -cc], [-cc, cc]] for every bar
+    cosines = (vectors / lengths[:, None])[:, :dimensions]
+    stiffness = elastic_modulus * areas / lengths
+    signed = np.concatenate([cosines, -cosines], axis=1)
+    blocks = stiffness[:, None, None] * signed[:, :, None] * signed[:, None, :]
+    dofs = np.concatenate([ends[:, :1] * dimensions + np.arange(dimensions),
+                           ends[:, 1:] * dimensions + np.arange(dimensions)], axis=1)
+    rows = np.repeat(dofs, 2 * dimensions, axis=1).ravel()
+    columns = np.tile(dofs, (1, 2 * dimensions)).ravel()
+
+    # nodes without beams carry no stiffness, so they are left out like supports
+    fixed = _fixed_dofs(supports, n_nodes, dimensions)
+    connected = np.zeros(n_nodes, dtype=bool)
+    connected[ends.ravel()] = True
+    free = (~fixed & connected[:, None]).ravel()
+
+    size = n_nodes * dimensions
+    load_vector = forces[:, :dimensions].ravel()
+    displacements = np.zeros(size)
+    if free.any():
+        index = np.cumsum(free) - 1
+        keep = free[rows] & free[columns]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            if SCIPY_AVAILABLE:
+                matrix = coo_matrix((blocks.ravel()[keep], (index[rows[keep]], index[columns[keep]])),
+                                    shape=(free.sum(), free.sum())).tocsc()
+                solution = np.atleast_1d(spsolve(matrix, load_vector[free]))
+            else:
+                matrix = np.zeros((free.sum(), free.sum()))
+                np.add.at(matrix, (index[rows[keep]], index[columns[keep]]), blocks.ravel()[keep])
+                try:
+                    solution = np.linalg.solve(matrix, load_vector[free])
+                except np.linalg.LinAlgError:
+                    solution = np.full(free.sum(), np.nan)
+            # a nearly singular matrix gives a finite solution that does not balance the loads,
+            # or one that moves nodes by more than the size of the truss
+            residual = np.linalg.norm(matrix @ solution - load_vector[free])
+        extent = np.ptp(positions, axis=0).max()
+        if (not np.all(np.isfinite(solution))
+                or residual > residual_tolerance * max(np.linalg.norm(load_vector[free]), 1e-300)
+                or np.abs(solution).max() > extent):
+            raise ValueError("The truss is a mechanism: add supports or beams so that it cannot move freely.")
+        displacements[free] = solution
+
+    # reactions are what the supports add to the applied loads
+    internal = np.zeros(size)
+    np.add.at(internal, rows, blocks.ravel() * displacements[columns])
+    reactions = np.zeros((n_nodes, 3))
+    reactions[:, :dimensions] = np.where(fixed.ravel(), internal - load_vector, 0.0).reshape(n_nodes, dimensions)
+
+    displacements = displacements.reshape(n_nodes, dimensions)
+    elongation = np.einsum("ij,ij->i", cosines, displacements[ends[:, 1]] - displacements[ends[:, 0]])
+    axial = stiffness * elongation
+
+    # tension against the tensile strength, compression against crushing and buckling
+    inertia = np.minimum(widths ** 3 * heights, heights ** 3 * widths) / 12.0
+    buckling = math.pi ** 2 * elastic_modulus * inertia / lengths ** 2
+    utilisation = np.where(axial >= 0.0,
+                           axial / (areas * tensile_strength),
+                           np.maximum(-axial / (areas * compressive_strength), -axial / buckling))
+
+    if planar:
+        displacements = np.concatenate([displacements, np.zeros((n_nodes, 1))], axis=1)
+    return TrussAnalysis(list(beams), axial, utilisation, displacements, reactions)
@@ -0,0 +1,111 @@
+"""
+Structure-of-arrays store for the beam axes and sections of a truss.
+
+Row i of every array belongs to truss.beams[i]. The derived geometry (uncut
+outlines, centroids, axes and planes) is computed for many rows at once, so
+building or editing a truss does not pay one geometry call per beam.
+"""
+
+import numpy as np
+
+
+Z_AXIS = np.array([0.0, 0.0, 1.0])
+
+
+def _unitize(vectors):
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+class BeamStore:
+    def __init__(self, capacity=16):
+
+        self.count = 0
+        # inputs
+        self.axes = np.zeros((capacity, 2, 3))
+        self.widths = np.zeros(capacity)
+        self.heights = np.zeros(capacity)
+        # derived geometry
+        self.outlines = np.zeros((capacity, 5, 3))
+        self.centroids = np.zeros((capacity, 3))
+        self.xaxes = np.zeros((capacity, 3))
+        self.yaxes = np.zeros((capacity, 3))
+        self.planes = np.zeros((capacity, 4, 3))
+
+    _fields = ("axes", "widths", "heights", "outlines", "centroids", "xaxes", "yaxes", "planes")
+
+    def _grow(self, capacity):
+        for name in self._fields:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:])
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def append(self, axis, width, height):
+        """Adds a row and returns its index. The derived geometry is not computed until refresh."""
+        if self.count == len(self.widths):
+            self._grow(max(16, 2 * self.count))
+        row = self.count
+        self.count += 1
+        self.set(row, axis, width, height)
+        return row
+
+    def set(self, row, axis, width=None, height=None):
+        """Overwrites the inputs of a row."""
+        self.axes[row] = axis
+        if width is not None:
+            self.widths[row] = width
+        if height is not None:
+            self.heights[row] = height
+
+    def set_many(self, axes, widths, heights):
+        """Replaces all rows at once."""
+        axes = np.asarray(axes, dtype=float).reshape(-1, 2, 3)
+        self.count = 0
+        if len(axes) > len(self.widths):
+            self._grow(len(axes))
+        self.count = len(axes)
+        self.axes[:self.count] = axes
+        self.widths[:self.count] = widths
+        self.heights[:self.count] = heights
+
+    def remove(self, row):
+        """Deletes a row, shifting the following rows up by one."""
+        for name in self._fields:
+            array = getattr(self, name)
+            array[row:self.count - 1] = array[row + 1:self.count]
+        self.count -= 1
+
+    def refresh(self, rows=None):
+        """Recomputes the derived geometry of the given rows (all rows by default)."""
+        if rows is None:
+            rows = slice(0, self.count)
+        else:
+            rows = np.asarray(rows, dtype=int)
+
+        axes = self.axes[rows]
+        start, end = axes[:, 0], axes[:, 1]
+
+        direction = _unitize(end - start)
+        perp = _unitize(np.cross(direction, Z_AXIS)) * (0.5 * self.widths[rows])[:, None]
+
+        outlines = np.stack([start + perp, start - perp, end - perp, end + perp, start + perp], axis=1)
+        xaxes = start - end
+        yaxes = np.cross(xaxes, Z_AXIS)
+
+        # orthonormal frames, built the way rg.Plane(origin, xaxis, yaxis) does
+        x = _unitize(xaxes)
+        z = _unitize(np.cross(x, yaxes))
+        y = np.cross(z, x)
+
+        self.outlines[rows] = outlines
+        # the outline is a rectangle, so its area centroid is its vertex average
+        self.centroids[rows] = outlines[:, :4].mean(axis=1)
+        self.xaxes[rows] = xaxes
+        self.yaxes[rows] = yaxes
+        self.planes[rows] = np.stack([self.centroids[rows], x, y, z], axis=1)
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return f"BeamStore(Beams={self.count})"
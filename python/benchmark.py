@@ -0,0 +1,214 @@
+"""
+Benchmarks of the geometry hot path on synthetic trusses.
+
+Generates planar triangulated trusses from a few to ~100k beams, with a mix
+of fabricated and new beams, oversized reclaimed pieces and reflex-angle
+joints, and times Truss.add_node, Truss.add_beam, Truss.cut_all_beams,
+Beam.get_cut_planes and Truss.to_json / Truss.from_json on the Rhino-free
+geometry backend, and counts the node batches of a parallel cut. Results are
+written as JSON so runs can be compared.
+
+Beams whose cut planes cannot be computed are listed per size, and the
+script exits with status 1 if there are any, since their timings cover a
+broken run.
+
+    python benchmark.py --sizes 10 1000 100000 --repeat 3 --output results.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+import parallel_cut
+from geometry_np import Truss, WORLD_XY
+
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+
+
+def generate_layout(n_beams, spacing=1.0, jitter=0.15, holes=0.1, fabricated=0.2, is_new=0.1, seed=0):
+    """Returns node positions and beam data for a jittered triangulated grid of about n_beams beams.
+
+    Every cell gets a diagonal, except a fraction `holes` of them; these open
+    quads and the grid boundary give joints with reflex angles. Beams are
+    0.05 or 0.06 wide for a reference width of 0.05, so fabricated
+    neighbours trigger polygon cuts.
+    """
+    rng = np.random.default_rng(seed)
+
+    nx = max(1, int(round(math.sqrt(n_beams / 3.0))))
+    ny = max(1, int(round((n_beams - nx) / (3.0 * nx + 1))))
+
+    i, j = np.meshgrid(np.arange(nx + 1), np.arange(ny + 1))
+    positions = np.stack([i.ravel(), j.ravel(), np.zeros(i.size)], axis=1) * spacing
+    positions[:, :2] += rng.uniform(-jitter, jitter, (len(positions), 2)) * spacing
+
+    def index(x, y):
+        return y * (nx + 1) + x
+
+    pairs = []
+    for y in range(ny + 1):
+        for x in range(nx + 1):
+            if x < nx:
+                pairs.append((index(x, y), index(x + 1, y)))
+            if y < ny:
+                pairs.append((index(x, y), index(x, y + 1)))
+            if x < nx and y < ny and rng.random() >= holes:
+                pairs.append((index(x, y), index(x + 1, y + 1)))
+    pairs = np.array(pairs, dtype=int)
+
+    flags = rng.random(len(pairs))
+    return {
+        "positions": positions,
+        "beam_nodes": pairs,
+        "widths": rng.choice([0.05, 0.06], len(pairs)),
+        "fabricated": flags < fabricated,
+        "is_new": (flags >= fabricated) & (flags < fabricated + is_new),
+    }
+
+
+def build_truss(layout, height=0.06, reference_width=0.05, timings=None):
+    """Builds a Truss from a layout through add_node and add_beam, timing both if timings is a dict."""
+    truss = Truss()
+
+    start = time.perf_counter()
+    for position in layout["positions"]:
+        truss.add_node(position)
+    added_nodes = time.perf_counter()
+
+    positions = layout["positions"]
+    for (a, b), width, fabricated, is_new in zip(layout["beam_nodes"], layout["widths"], layout["fabricated"], layout["is_new"]):
+        beam = truss.add_beam(np.array([positions[a], positions[b]]), height, float(width), bool(is_new), bool(fabricated))
+        beam.reference_width = reference_width
+    added_beams = time.perf_counter()
+
+    # fabricated pieces keep the outline they were cut to; here, their uncut rectangle
+    for beam in truss.beams:
+        if beam.fabricated:
+            beam.cut_polyline = beam.uncut_polyline
+
+    if timings is not None:
+        timings["add_node"] = added_nodes - start
+        timings["add_beam"] = added_beams - added_nodes
+    return truss
+
+
+def count_reflex_joints(truss):
+    """Number of nodes where two consecutive beams are more than 180 degrees apart."""
+    count = 0
+    for node in truss.nodes:
+        angles = []
+        for beam in node.connected_beams:
+            other = beam.axis[1] if np.linalg.norm(beam.axis[0] - node.position) < 1e-6 else beam.axis[0]
+            direction = other - node.position
+            angles.append(math.atan2(direction[1], direction[0]))
+        angles.sort()
+        gaps = np.diff(angles + [angles[0] + 2 * math.pi]) if angles else []
+        if len(gaps) and max(gaps) > math.pi:
+            count += 1
+    return count
+
+
+def _time(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def benchmark_size(n_beams, repeat=1, seed=0):
+    """Times every operation on a truss of about n_beams beams, keeping the best of `repeat` runs."""
+    layout = generate_layout(n_beams, seed=seed)
+    best = {}
+
+    for _ in range(repeat):
+        timings = {}
+        truss = build_truss(layout, timings=timings)
+
+        timings["cut_all_beams"], _ = _time(truss.cut_all_beams)
+
+        def cut_planes():
+            failed = []
+            # fabricated pieces are not cut again
+            for beam in truss.beams:
+                if beam.fabricated:
+                    continue
+                try:
+                    beam.get_cut_planes(WORLD_XY, WORLD_XY)
+                except IndexError:
+                    # fewer than three outline points on one side of the beam
+                    failed.append(beam.id)
+            return failed
+
+        timings["get_cut_planes"], failed = _time(cut_planes)
+        timings["to_json"], json_data = _time(truss.to_json)
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "truss.json")
+            with open(file_path, "w") as file:
+                file.write(json_data)
+            timings["from_json"], _ = _time(lambda: Truss.from_json(file_path))
+
+        for name, seconds in timings.items():
+            best[name] = min(seconds, best.get(name, seconds))
+
+    return {
+        "requested_beams": n_beams,
+        "beams": len(truss.beams),
+        "nodes": len(truss.nodes),
+        "fabricated": int(sum(beam.fabricated for beam in truss.beams)),
+        "is_new": int(sum(beam.is_new for beam in truss.beams)),
+        "reflex_joints": count_reflex_joints(truss),
+        # node classes cut one after the other by cut_all_beams, each in parallel with an executor
+        "cut_batches": len(parallel_cut.colour_nodes(truss)),
+        # ids of the beams get_cut_planes failed on; the run is broken if there are any
+        "cut_plane_failures": failed,
+        "json_bytes": len(json_data),
+        "seconds": best,
+    }
+
+
+def run(sizes=DEFAULT_SIZES, repeat=1, seed=0, output=None):
+    """Benchmarks every size and returns the results; they are also saved to `output` if given."""
+    results = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "seed": seed,
+        "runs": [],
+    }
+
+    for n_beams in sizes:
+        result = benchmark_size(n_beams, repeat, seed)
+        results["runs"].append(result)
+        print(f"{result['beams']:>7} beams  {result['cut_batches']:>3} batches  " + "  ".join(f"{name} {seconds:.4f}s" for name, seconds in result["seconds"].items()))
+        if result["cut_plane_failures"]:
+            print(f"        FAILED: get_cut_planes raised on beams {result['cut_plane_failures']}")
+
+    if output:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=4)
+        print(f"Benchmark results saved to: {output}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the truss geometry operations on synthetic trusses.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="approximate beam counts")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per size, the fastest is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat, args.seed, args.output)
+    if any(result["cut_plane_failures"] for result in results["runs"]):
+        sys.exit(1)
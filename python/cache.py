@@ -0,0 +1,178 @@
+"""
+On-disk caches of node cut outlines and of robot motion plans.
+
+Cutting the beams at a node only depends on the node position and on the
+axes, widths, flags and current outlines of the beams meeting there. CutCache
+hashes these inputs and stores the outlines the node produced, so reopening
+or re-running a design only trims the joints that actually changed. Entries
+live in a SQLite file and the least recently used ones are evicted once the
+cache holds more than max_entries.
+
+PlanCache does the same for TFTProcess.motion_start_config_target_config, so
+regenerating production data after a small design edit only plans the
+motions whose start, target or attached mesh changed.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+
+import numpy as np
+
+import polygon
+
+
+# bump when Node.cut_beams changes, so outlines cut by older code are not reused
+CUT_VERSION = 1
+
+
+class LRUStore:
+    """A persistent key-value store keeping at most max_entries JSON values.
+
+    Writes are committed by flush (or close); the store can be shared by
+    the threads of a thread pool.
+    """
+
+    def __init__(self, path, max_entries=100000):
+
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, used INTEGER NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+        self._count, last_used = self._connection.execute("SELECT COUNT(*), MAX(used) FROM entries").fetchone()
+        self._clock = last_used or 0
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def get(self, key):
+        """Returns the value stored under key, or None, and marks it as recently used."""
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute("UPDATE entries SET used = ? WHERE key = ?", (self._tick(), key))
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        """Stores a JSON-serializable value, evicting the least recently used entries if needed."""
+        data = json.dumps(value)
+        with self._lock:
+            exists = self._connection.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, used) VALUES (?, ?, ?)", (key, data, self._tick()))
+            if exists is None:
+                self._count += 1
+            if self._count > self.max_entries:
+                excess = self._count - self.max_entries
+                self._connection.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY used LIMIT ?)", (excess,))
+                self._count -= excess
+
+    def flush(self):
+        with self._lock:
+            self._connection.commit()
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return f"{type(self).__name__}(Path={self.path}, Entries={self._count}, MaxEntries={self.max_entries})"
+
+
+class CutCache(LRUStore):
+    """Cut outlines of the connected beams of a node, keyed by the node's cutting inputs."""
+
+    def key(self, node):
+        """Hashes everything Node.cut_beams reads: the node position and, for every
+        connected beam in order, its axis, width, reference width, flags and
+        current outline. Call it after Node.organize_beams, which orients the axes.
+        """
+        digest = hashlib.sha256()
+        digest.update(str(CUT_VERSION).encode())
+        digest.update(polygon.coordinates(node.position).tobytes())
+        for beam in node.connected_beams:
+            digest.update(polygon.coordinates(beam.axis).tobytes())
+            digest.update(np.array([beam.width, beam.reference_width, beam.is_new, beam.fabricated], dtype=float).tobytes())
+            outline = polygon.coordinates(beam.cut_polyline)
+            digest.update(str(len(outline)).encode())
+            digest.update(outline.tobytes())
+        return digest.hexdigest()
+
+    def get_outlines(self, key, node=None):
+        """Returns the stored outlines as (n, 3) arrays, in connected beam order, or None."""
+        value = self.get(key)
+        if value is None:
+            return None
+        return [np.array(outline, dtype=float) for outline in value]
+
+    def put_outlines(self, key, node):
+        """Stores the current outlines of the node's connected beams."""
+        self.put(key, [polygon.coordinates(beam.cut_polyline).tolist() for beam in node.connected_beams])
+
+
+class PlanCache(LRUStore):
+    """Motion plans keyed by their start and target joint values, group, planner and attached mesh.
+
+    Keys include robot_version, e.g. data_hash(robot.model.data), so plans made
+    for another robot model are never returned; they age out of the store.
+    Joint values are quantized to precision (radians or metres) before hashing.
+    """
+
+    def __init__(self, path, robot_version, max_entries=10000, precision=1e-5):
+
+        super().__init__(path, max_entries)
+        self.robot_version = str(robot_version)
+        self.precision = precision
+
+    def key(self, start_values, target_values, group, planner_id, mesh_hash=None):
+        digest = hashlib.sha256()
+        digest.update(self.robot_version.encode())
+        for values in (start_values, target_values):
+            quantized = np.round(np.asarray(values, dtype=float) / self.precision).astype(np.int64)
+            digest.update(str(len(quantized)).encode())
+            digest.update(quantized.tobytes())
+        digest.update(json.dumps([group, planner_id, mesh_hash]).encode())
+        return digest.hexdigest()
+
+    def get_plan(self, key):
+        """Returns the stored trajectory data, or None."""
+        value = self.get(key)
+        if value is None or value.get("robot_version") != self.robot_version:
+            return None
+        return value["trajectory"]
+
+    def put_plan(self, key, trajectory_data):
+        """Stores trajectory data (JointTrajectory.to_data()) and writes it to disk."""
+        self.put(key, {"robot_version": self.robot_version, "trajectory": trajectory_data})
+        self.flush()
+
+
+def data_hash(data, digits=9):
+    """Hashes JSON-serializable data, such as a mesh's vertices and faces, rounding floats to digits."""
+
+    def rounded(value):
+        if isinstance(value, float):
+            return round(value, digits)
+        if isinstance(value, (list, tuple)):
+            return [rounded(item) for item in value]
+        if isinstance(value, dict):
+            return {key: rounded(item) for key, item in value.items()}
+        return value
+
+    return hashlib.sha256(json.dumps(rounded(data), sort_keys=True).encode()).hexdigest()
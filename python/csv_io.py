@@ -0,0 +1,249 @@
+"""
+Loading the CSV exports of the Grasshopper definitions.
+
+State files (csv/State_A.csv, ...) hold a point table, a blank line and a
+line table:
+
+    Point_Index,X,Y,Z
+    0,2.41,0.32,0.0
+    ...
+
+    Line_Index,Start_Point_Index,End_Point_Index
+    0,0,2
+    ...
+
+Box files (csv/State_A_Boxes.csv) hold one rectangle per row, as
+Rectangle_Index followed by the X, Y, Z of its four corners.
+
+Both are parsed with numpy.loadtxt one table at a time, or chunk by chunk
+with chunk_rows for very large exports. Points closer than a tolerance are
+merged in bulk by snapping them to a grid and comparing neighbouring cells,
+so building a truss from a state does not search for nodes one by one.
+"""
+
+import io
+import itertools
+
+import numpy as np
+
+
+POINT_HEADER = "Point_Index"
+LINE_HEADER = "Line_Index"
+RECTANGLE_HEADER = "Rectangle_Index"
+
+# grid cells of merge_points, in tolerances
+CELL_FACTOR = 16
+
+
+def _parse(lines, columns):
+    """Parses CSV rows into an (n, columns) float array."""
+    text = "".join(lines)
+    if not text.strip():
+        return np.zeros((0, columns))
+    return np.loadtxt(io.StringIO(text), delimiter=",", ndmin=2)
+
+
+def iter_tables(file_path, chunk_rows=None):
+    """Yields (header, rows) for the tables of a CSV export.
+
+    header is the first column name of the table the rows belong to and rows
+    a float array. Tables are separated by blank lines. Without chunk_rows a
+    table comes as one array, otherwise as arrays of at most chunk_rows rows.
+    """
+    with open(file_path, "r") as file:
+        header, columns, rows = None, 0, []
+        for line in file:
+            if not line.strip():
+                if header is not None and rows:
+                    yield header, _parse(rows, columns)
+                header, rows = None, []
+                continue
+            if header is None:
+                names = line.strip().split(",")
+                header, columns = names[0], len(names)
+                continue
+            rows.append(line)
+            if chunk_rows and len(rows) >= chunk_rows:
+                yield header, _parse(rows, columns)
+                rows = []
+        if header is not None and rows:
+            yield header, _parse(rows, columns)
+
+
+def _by_index(chunks, columns):
+    """Stacks (index, values...) chunks and orders the values by index."""
+    table = np.concatenate(chunks) if chunks else np.zeros((0, columns + 1))
+    values = np.zeros((len(table), columns))
+    values[table[:, 0].astype(int)] = table[:, 1:]
+    return values
+
+
+def read_state(file_path, chunk_rows=None):
+    """Returns the (n, 3) points and (m, 2) point indices of the lines of a state export."""
+    points, lines = [], []
+    for header, rows in iter_tables(file_path, chunk_rows):
+        if header == POINT_HEADER:
+            points.append(rows)
+        elif header == LINE_HEADER:
+            lines.append(rows)
+        else:
+            raise ValueError(f"Unknown table {header} in {file_path}")
+    return _by_index(points, 3), _by_index(lines, 2).astype(int)
+
+
+def read_boxes(file_path, chunk_rows=None):
+    """Returns the (n, 4, 3) corners of the rectangles of a box export."""
+    rectangles = []
+    for header, rows in iter_tables(file_path, chunk_rows):
+        if header == RECTANGLE_HEADER:
+            rectangles.append(rows)
+        else:
+            raise ValueError(f"Unknown table {header} in {file_path}")
+    if not rectangles:
+        raise ValueError(f"No rectangle table in {file_path}")
+    return _by_index(rectangles, 12).reshape(-1, 4, 3)
+
+
+def _cell_keys(cells):
+    """Hashes integer grid cells to int64 keys; colliding cells only cost extra distance checks."""
+    cells = np.asarray(cells, dtype=np.int64)
+    with np.errstate(over="ignore"):
+        return (cells[:, 0] * np.int64(73856093)) ^ (cells[:, 1] * np.int64(19349663)) ^ (cells[:, 2] * np.int64(83492791))
+
+
+def merge_points(points, tolerance=1e-6):
+    """Merges points closer than tolerance.
+
+    Points are taken in order, as by Truss.add_node: a point within
+    tolerance of an earlier kept point is merged into the first such point,
+    otherwise it is kept, so a chain of points each within tolerance of the
+    next is not merged into one. Returns the (k, 3) kept points and for
+    every input point the index of the point it was merged into. Points are
+    hashed into a grid and compared with the points of their own cell, and
+    of a neighbouring cell only when they lie within tolerance of it.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    if len(points) == 0:
+        return points.copy(), np.zeros(0, dtype=int)
+
+    # cells a few times the tolerance, so most points only need to look into their own cell
+    size = CELL_FACTOR * tolerance
+    scaled = points / size
+    cells = np.floor(scaled).astype(np.int64)
+    near = {-1: (scaled - cells) * size < tolerance, 1: (cells + 1 - scaled) * size < tolerance}
+
+    keys = _cell_keys(cells)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    neighbours = []
+    for offset in itertools.product((-1, 0, 1), repeat=3):
+        queried = np.ones(len(points), dtype=bool)
+        for axis, step in enumerate(offset):
+            if step:
+                queried &= near[step][:, axis]
+        queried = np.nonzero(queried)[0]
+        if len(queried) == 0:
+            continue
+
+        # sorted needles make searchsorted walk the keys in order
+        neighbour_keys = _cell_keys(cells[queried] + np.array(offset, dtype=np.int64))
+        sort = np.argsort(neighbour_keys, kind="stable")
+        queried, neighbour_keys = queried[sort], neighbour_keys[sort]
+        start = np.searchsorted(sorted_keys, neighbour_keys, side="left")
+        end = np.searchsorted(sorted_keys, neighbour_keys, side="right")
+        # cells hold a handful of points at most, so walk them in lockstep
+        for k in range(int((end - start).max(initial=0))):
+            have = start + k < end
+            a = queried[have]
+            b = order[start[have] + k]
+            close = np.linalg.norm(points[a] - points[b], axis=1) < tolerance
+            neighbours.append(np.stack([a[close], b[close]], axis=1))
+    # a point near a cell face may see a neighbour that does not look back, so pairs go both ways
+    pairs = np.concatenate(neighbours)
+    pairs = np.concatenate([pairs, pairs[:, ::-1]])
+    # (later point, earlier point) pairs
+    pairs = pairs[pairs[:, 1] < pairs[:, 0]]
+
+    # like Truss.add_node, a point is merged into the first kept point within tolerance and is kept
+    # otherwise; it is decided once every earlier point near it is, so chains do not merge through
+    kept = np.zeros(len(points), dtype=bool)
+    undecided = np.ones(len(points), dtype=bool)
+    while undecided.any():
+        merged = np.zeros(len(points), dtype=bool)
+        merged[pairs[kept[pairs[:, 1]], 0]] = True
+        waiting = np.zeros(len(points), dtype=bool)
+        waiting[pairs[undecided[pairs[:, 1]], 0]] = True
+        keep = undecided & ~merged & ~waiting
+        undecided &= ~merged & ~keep
+        kept |= keep
+
+    labels = np.arange(len(points))
+    into = pairs[kept[pairs[:, 1]] & ~kept[pairs[:, 0]]]
+    labels[~kept] = len(points)
+    np.minimum.at(labels, into[:, 0], into[:, 1])
+
+    representatives, inverse = np.unique(labels, return_inverse=True)
+    return points[representatives], inverse.reshape(-1)
+
+
+def state_arrays(points, lines, height=0.06, width=0.05, tolerance=1e-6):
+    """Returns the Truss.from_arrays dictionary of a state's points and lines.
+
+    Points are merged with merge_points; lines that collapse onto one node
+    or repeat another line are dropped. Every beam gets the given section,
+    is neither new nor fabricated, and has no cut outline yet.
+    """
+    positions, inverse = merge_points(points, tolerance)
+    beam_nodes = inverse[np.asarray(lines, dtype=int).reshape(-1, 2)]
+
+    beam_nodes = beam_nodes[beam_nodes[:, 0] != beam_nodes[:, 1]]
+    _, first = np.unique(np.sort(beam_nodes, axis=1), axis=0, return_index=True)
+    beam_nodes = beam_nodes[np.sort(first)]
+
+    count = len(beam_nodes)
+    return {
+        "positions": positions,
+        "has_moved": np.zeros(len(positions), dtype=bool),
+        "beam_nodes": beam_nodes,
+        "axes": positions[beam_nodes],
+        "heights": np.full(count, height, dtype=float),
+        "widths": np.full(count, width, dtype=float),
+        "reference_widths": np.full(count, width, dtype=float),
+        "is_new": np.zeros(count, dtype=bool),
+        "fabricated": np.zeros(count, dtype=bool),
+        "cut_points": np.zeros((0, 3)),
+        "cut_offsets": np.zeros(count + 1, dtype=int),
+    }
+
+
+def box_dimensions(corners):
+    """Returns the centers, axes, lengths and widths of (n, 4, 3) rectangles.
+
+    The axis of a rectangle runs along its long sides, through its center.
+    """
+    corners = np.asarray(corners, dtype=float).reshape(-1, 4, 3)
+    centers = corners.mean(axis=1)
+    first = corners[:, 1] - corners[:, 0]
+    second = corners[:, 2] - corners[:, 1]
+    first_length = np.linalg.norm(first, axis=1)
+    second_length = np.linalg.norm(second, axis=1)
+
+    along_first = first_length >= second_length
+    direction = np.where(along_first[:, None], first, second)
+    lengths = np.maximum(first_length, second_length)
+    widths = np.minimum(first_length, second_length)
+    axes = np.stack([centers - 0.5 * direction, centers + 0.5 * direction], axis=1)
+    return centers, axes, lengths, widths
+
+
+def wood_pieces(corners, scale=100.0):
+    """Turns (n, 4, 3) rectangles into WoodPieces, with dimensions in cm for rectangles in m."""
+    from vision.utilities.woodPiece import WoodPiece
+
+    corners = np.asarray(corners, dtype=float).reshape(-1, 4, 3)
+    centers, _, lengths, widths = box_dimensions(corners)
+    pixels = np.rint(corners[:, :, :2] * scale).astype(int)
+    centers = np.rint(centers[:, :2] * scale).astype(int)
+    return [WoodPiece(pixels[i].tolist(), tuple(centers[i].tolist()), float(lengths[i] * scale), float(widths[i] * scale))
+            for i in range(len(corners))]
@@ -0,0 +1,110 @@
+"""
+Blade planes of many beams at once.
+
+Does what Beam.get_cut_planes does for one beam, for every beam of a truss
+in a handful of array operations: the cut outlines are padded to a common
+length, moved into each beam's reference frame, split into the A (x > 0)
+and B (x < 0) sides, sorted by angle and turned into the two cut planes of
+each side. Both geometry backends use it through Truss.get_all_cut_planes.
+"""
+
+import numpy as np
+
+
+Z_AXIS = np.array([0.0, 0.0, 1.0])
+
+
+def _unitize(vectors):
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def _frames(xaxes, yaxes):
+    """Rows of orthonormal axes, built the way rg.Plane(origin, xaxis, yaxis) does."""
+    x = _unitize(xaxes)
+    z = _unitize(np.cross(x, yaxes))
+    y = np.cross(z, x)
+    return np.stack([x, y, z], axis=1)
+
+
+def pad_outlines(outlines):
+    """Stacks closed outlines of different lengths, without their closing point.
+
+    Returns an (n, k, 3) array padded with NaN and an (n, k) mask of the real points.
+    """
+    counts = np.array([len(outline) - 1 for outline in outlines], dtype=int)
+    points = np.full((len(outlines), max(counts, default=0), 3), np.nan)
+    mask = np.arange(points.shape[1]) < counts[:, None]
+    if len(outlines):
+        points[mask] = np.concatenate([np.asarray(outline, dtype=float)[:-1] for outline in outlines])
+    return points, mask
+
+
+def _sorted_side(points, mask, keys):
+    """Orders the masked points of every row by key; returns the points and their counts."""
+    order = np.argsort(np.where(mask, keys, np.inf), axis=1, kind="stable")
+    return np.take_along_axis(points, order[..., None], axis=1), mask.sum(axis=1)
+
+
+def _blade_planes(start, end, planes, blade_plane):
+    """Moves each beam plane by the transform taking the plane on the start->end edge onto the blade plane."""
+    yaxes = end - start
+    xaxes = np.cross(yaxes, -Z_AXIS)
+    source = _frames(xaxes, yaxes)
+    # rotation of plane_to_plane(source, blade_plane) for every row
+    rotation = np.einsum("ji,njk->nik", blade_plane[1:], source)
+    translation = blade_plane[0] - np.einsum("nij,nj->ni", rotation, start)
+
+    origins = np.einsum("nij,nj->ni", rotation, planes[:, 0]) + translation
+    axes = np.einsum("nak,njk->naj", planes[:, 1:], rotation)
+    return np.concatenate([origins[:, None], axes], axis=1)
+
+
+def cut_planes(outlines, centroids, widths, xaxes, yaxes, planes, blade_side_A, blade_side_B):
+    """Returns the cut planes and sorted outline points of n beams.
+
+    outlines is a list of closed (m, 3) outlines; centroids, xaxes and yaxes
+    are (n, 3), widths (n,), planes (n, 4, 3) and the blade planes (4, 3),
+    all as in Beam.get_cut_planes. Returns (frames, numbersA, numbersB, valid):
+    frames is (n, 4, 4, 3) holding planes A1, A2, B1, B2 of every beam,
+    numbersA / numbersB are lists of the side points in cutting order, and
+    valid marks the beams with at least three points on both sides; the
+    frames of the others are NaN.
+    """
+    centroids = np.asarray(centroids, dtype=float).reshape(-1, 3)
+    widths = np.asarray(widths, dtype=float)
+    xaxes = np.asarray(xaxes, dtype=float).reshape(-1, 3)
+    yaxes = np.asarray(yaxes, dtype=float).reshape(-1, 3)
+    planes = np.asarray(planes, dtype=float).reshape(-1, 4, 3)
+    blade_side_A = np.asarray(blade_side_A, dtype=float)
+    blade_side_B = np.asarray(blade_side_B, dtype=float)
+
+    points, mask = pad_outlines(outlines)
+
+    # the outline in the frame on the beam side, i.e. plane_to_plane(moved_ref_plane, WORLD_XY)
+    moved_centroids = centroids - 0.5 * widths[:, None] * yaxes
+    rotation = _frames(xaxes, yaxes)
+    local = np.einsum("nkj,nij->nki", points, rotation) - np.einsum("nij,nj->ni", rotation, moved_centroids)[:, None]
+
+    angles = np.arctan2(local[..., 1], local[..., 0])
+    with np.errstate(invalid="ignore"):
+        positive = mask & (local[..., 0] > 0)
+        negative = mask & (local[..., 0] < 0)
+    # side A anticlockwise and side B clockwise, both starting from the local y axis
+    sorted_A, count_A = _sorted_side(points, positive, (2 * np.pi - (angles - np.pi / 2)) % (2 * np.pi))
+    sorted_B, count_B = _sorted_side(points, negative, (angles - np.pi / 2) % (2 * np.pi))
+
+    numbersA = [sorted_A[i, :count_A[i]] for i in range(len(points))]
+    numbersB = [sorted_B[i, :count_B[i]] for i in range(len(points))]
+
+    valid = (count_A >= 3) & (count_B >= 3)
+    frames = np.full((len(points), 4, 4, 3), np.nan)
+    if valid.any():
+        A, B, beam_planes = sorted_A[valid], sorted_B[valid], planes[valid]
+        frames[valid] = np.stack([
+            _blade_planes(A[:, 0], A[:, 1], beam_planes, blade_side_A),
+            _blade_planes(A[:, 1], A[:, 2], beam_planes, blade_side_A),
+            _blade_planes(B[:, 0], B[:, 1], beam_planes, blade_side_B),
+            _blade_planes(B[:, 1], B[:, 2], beam_planes, blade_side_B),
+        ], axis=1)
+
+    return frames, numbersA, numbersB, valid
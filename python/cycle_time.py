@@ -0,0 +1,242 @@
+"""
+Offline cycle-time estimate of production action lists.
+
+Walks the actions of a ProductionData program (or its JSON file in data/)
+and estimates how long each one takes on the robot, so alternative
+sequences can be compared without sending them:
+
+- MoveToJoints: the slowest joint at its maximum velocity from
+  joint_limits.yaml, or the TCP speed of the action over the distance the
+  tool moves (estimated from the largest joint change and the robot's
+  reach), whichever is longer. With acceleration limits every end where the
+  robot stands still (a FINE zone, or the start of the program) adds
+  velocity / (2 * acceleration).
+- MoveToFrame and MoveToRobtarget: the distance between consecutive
+  Cartesian targets over the action's speed. Where a motion blends into
+  the next one, both segments are shortened by the corner the zone cuts
+  off: an arc tangent to them at the zone radius (at most half of either
+  segment) replaces the two straight pieces. Motions from an unknown
+  position take unknown_motion_time.
+- WaitTime: its time. Stop: stop_time, as the robot waits for the operator.
+- Every FINE motion adds fine_time for the robot to settle, and every
+  action with feedback adds feedback_time for the round trip to the driver.
+
+The motion times of the whole list are computed in one numpy pass.
+
+Estimates are biased low on blended paths: the robot is assumed to keep
+its programmed speed through every corner, while the real controller slows
+down on sharp ones. Joint motions do not cut corners at their zones,
+which biases them high.
+"""
+
+import json
+import os
+
+import numpy as np
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+from motions import FINE, MOTIONS, PASSTHROUGH, action_name, action_parameters, motion_target
+
+
+JOINT_LIMITS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docker", "for-use",
+                                 "abb_irb2600_12_185_dual_config", "config", "joint_limits.yaml")
+
+
+def _scalar(text):
+    text = text.strip()
+    if text.lower() in ("true", "false"):
+        return text.lower() == "true"
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text.strip("'\"")
+
+
+def parse_yaml(text):
+    """Parses the nested "key: value" mappings of the MoveIt config files, for when PyYAML is missing."""
+    root = {}
+    stack = [(-1, root)]
+    for line in text.splitlines():
+        content = line.split("#", 1)[0].rstrip()
+        if not content.strip():
+            continue
+        indent = len(content) - len(content.lstrip())
+        key, _, value = content.strip().partition(":")
+        while stack[-1][0] >= indent:
+            stack.pop()
+        parent = stack[-1][1]
+        if value.strip():
+            parent[key] = _scalar(value)
+        else:
+            parent[key] = {}
+            stack.append((indent, parent[key]))
+    return root
+
+
+def load_yaml(file_path):
+    with open(file_path, "r") as file:
+        text = file.read()
+    if YAML_AVAILABLE:
+        return yaml.safe_load(text)
+    return parse_yaml(text)
+
+
+def load_joint_limits(file_path=JOINT_LIMITS_PATH):
+    """Returns {joint name: (max velocity, max acceleration)}, None where a joint has no such limit."""
+    limits = {}
+    for name, joint in load_yaml(file_path)["joint_limits"].items():
+        velocity = joint.get("max_velocity") if joint.get("has_velocity_limits", True) else None
+        acceleration = joint.get("max_acceleration") if joint.get("has_acceleration_limits", False) else None
+        limits[name] = (velocity, acceleration or None)
+    return limits
+
+
+def load_actions(source):
+    """Returns the action list of a ProductionData, a JSON file written from one, or a list of actions."""
+    if isinstance(source, str):
+        with open(source, "r") as file:
+            return json.load(file)["actions"]
+    if hasattr(source, "actions"):
+        actions = source.actions
+        return list(actions.values()) if isinstance(actions, dict) else list(actions)
+    return list(source)
+
+
+class CycleTimeEstimator:
+    """Estimates action and program times for one robot of the cell.
+
+    Times are in s, speeds in mm/s and joint limits in rad/s (rad/s^2).
+    """
+
+    def __init__(self, joint_limits=None, group="robotA", reach=1850.0, unknown_motion_time=1.0, fine_time=0.05,
+                 stop_time=0.0, feedback_time=0.0):
+
+        if joint_limits is None:
+            joint_limits = load_joint_limits()
+        names = ["{}_joint_{}".format(group, i) for i in range(1, 7)]
+        self.max_velocities = np.array([joint_limits[name][0] or np.inf for name in names], dtype=float)
+        self.max_accelerations = np.array([joint_limits[name][1] or np.inf for name in names], dtype=float)
+        self.group = group
+        self.reach = reach
+        self.unknown_motion_time = unknown_motion_time
+        self.fine_time = fine_time
+        self.stop_time = stop_time
+        self.feedback_time = feedback_time
+
+    def joint_motion_times(self, starts, ends, speeds, rests):
+        """Times of joint motions between (n, 6) joint values in degrees.
+
+        rests counts the ends of each motion where the robot stands still.
+        """
+        deltas = np.abs(np.radians(ends - starts))
+        joint_times = deltas / self.max_velocities
+        # the accelerations of joints with a limit, assuming they reach their maximum velocity
+        ramps = np.where(np.isfinite(self.max_accelerations), self.max_velocities / (2 * self.max_accelerations), 0.0)
+        joint_times = joint_times + np.where(deltas > 0, ramps, 0.0) * rests[:, None]
+        tcp_times = deltas.max(axis=1, initial=0.0) * self.reach / speeds
+        return np.maximum(joint_times.max(axis=1, initial=0.0), tcp_times)
+
+    @staticmethod
+    def frame_motion_times(starts, ends, previous, zones):
+        """Path lengths (mm) of Cartesian segments between (n, 3) points, shortened by their blends.
+
+        Segment i blends from segment previous[i] (-1 for none) with the
+        zone radius zones[i]; FINE and zero zones do not blend.
+        """
+        vectors = ends - starts
+        lengths = np.linalg.norm(vectors, axis=1)
+        paths = lengths.copy()
+
+        blended = np.nonzero((previous >= 0) & (zones > 0))[0]
+        if len(blended):
+            before = previous[blended]
+            # the controller shrinks zones to half of the shorter segment
+            radii = np.minimum(zones[blended], 0.5 * np.minimum(lengths[before], lengths[blended]))
+            norms = lengths[before] * lengths[blended]
+            cosines = np.einsum("ij,ij->i", vectors[before], vectors[blended]) / np.where(norms > 0, norms, 1.0)
+            turns = np.arccos(np.clip(cosines, -1.0, 1.0))
+            # an arc of angle `turn` tangent to both segments at the radius: r * turn / tan(turn / 2)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                arcs = np.where(turns > 1e-9, radii * turns / np.tan(turns / 2), 2 * radii)
+            saved = np.where(norms > 0, 2 * radii - arcs, 0.0)
+            np.subtract.at(paths, before, 0.5 * saved)
+            np.subtract.at(paths, blended, 0.5 * saved)
+        return paths
+
+    def estimate(self, source):
+        """Returns (times, total): the estimated time of every action, in order, and their sum."""
+        actions = load_actions(source)
+        times = np.zeros(len(actions))
+
+        # motions are gathered first and timed together
+        joint_rows, joint_starts, joint_ends, joint_speeds, joint_rests = [], [], [], [], []
+        # Cartesian segments, with the zone of the blend from the segment before, if any
+        frame_rows, frame_starts, frame_ends, frame_speeds, blends = [], [], [], [], []
+        previous = None  # (kind, target) of the last motion
+        stopped = True
+        blend_from = None  # (segment, zone) of a Cartesian segment the next one may blend with
+
+        for row, action in enumerate(actions):
+            name = action_name(action)
+            parameters = action_parameters(action)
+            if parameters.get("feedback_level"):
+                times[row] += self.feedback_time
+
+            if name == "WaitTime":
+                times[row] += float(parameters.get("time", 0.0))
+            elif name == "Stop":
+                times[row] += self.stop_time
+            elif name in MOTIONS:
+                speed = float(parameters.get("speed", 100.0))
+                fine = parameters.get("zone", FINE) == FINE
+                if name == "MoveToJoints":
+                    target = ("joints", np.asarray(parameters["joints"], dtype=float))
+                else:
+                    target = motion_target(action, self.reach)
+
+                segment = None
+                if previous is None or previous[0] != target[0]:
+                    times[row] += self.unknown_motion_time
+                elif name == "MoveToJoints":
+                    joint_rows.append(row)
+                    joint_starts.append(previous[1])
+                    joint_ends.append(target[1])
+                    joint_speeds.append(speed)
+                    joint_rests.append(int(stopped) + int(fine))
+                else:
+                    segment = len(frame_rows)
+                    frame_rows.append(row)
+                    frame_starts.append(previous[1])
+                    frame_ends.append(target[1])
+                    frame_speeds.append(speed)
+                    blends.append(blend_from if blend_from is not None and not stopped else (-1, FINE))
+
+                if fine:
+                    times[row] += self.fine_time
+                previous, stopped = target, fine
+                blend_from = (segment, parameters.get("zone", FINE)) if segment is not None else None
+            if name not in MOTIONS and name not in PASSTHROUGH:
+                stopped = True
+
+        if frame_rows:
+            blends = np.array(blends, dtype=float).reshape(-1, 2)
+            times[frame_rows] += self.frame_motion_times(np.array(frame_starts), np.array(frame_ends),
+                                                         blends[:, 0].astype(int), blends[:, 1]) / np.array(frame_speeds)
+        if joint_rows:
+            times[joint_rows] += self.joint_motion_times(np.array(joint_starts), np.array(joint_ends),
+                                                         np.array(joint_speeds), np.array(joint_rests))
+        return times, float(times.sum())
+
+    def rank(self, sources):
+        """Returns the indices of several programs from the fastest to the slowest, and their totals."""
+        totals = [self.estimate(source)[1] for source in sources]
+        return sorted(range(len(totals)), key=totals.__getitem__), totals
@@ -3,67 +3,395 @@ import math
 import Rhino
 import json
 import os
+import heapq
 
+import numpy as np
+
+import polygon
+from beam_store import BeamStore
+import parallel_cut
+import cut_planes
+import validation
+import analysis
+import csv_io
+
+
+def _xyz(value):
+    return [value.X, value.Y, value.Z]
+
+
+def _plane_to_array(plane):
+    """Origin and axes of a plane as the (4, 3) rows used by cut_planes."""
+    return [_xyz(plane.Origin), _xyz(plane.XAxis), _xyz(plane.YAxis), _xyz(plane.ZAxis)]
+
+
+def _plane_from_array(rows):
+    origin, xaxis, yaxis, _ = rows
+    return rg.Plane(rg.Point3d(*origin), rg.Vector3d(*xaxis), rg.Vector3d(*yaxis))
+
+
+def _same_outline(a, b):
+    """Returns True if two cut polylines have exactly the same points."""
+    if a is b:
+        return True
+    if a is None or b is None:
+        return False
+    return list(a.ToPolyline()) == list(b.ToPolyline())
+
+
+class LabelTemplates:
+    """Extruded label glyphs, built once per text, height and depth on the world XY plane."""
 
-class Truss:
     def __init__(self):
+        self._breps = {}
+
+    def get(self, text, text_height=0.05, depth=0.01):
+        """Returns the label Brep on the world XY plane, building it on first use."""
+        key = (text, text_height, depth)
+        if key not in self._breps:
+            text_entity = rg.TextEntity()
+            text_entity.Plane = rg.Plane.WorldXY
+            text_entity.TextHeight = text_height
+            text_entity.Text = text
+
+            # Convert the text to a 2D curve
+            curve = rg.Curve.JoinCurves(text_entity.Explode())[0]
+            extrusion = rg.Extrusion.Create(curve, rg.Plane.WorldXY, depth, True)  # Extrude along the Z-axis
+            self._breps[key] = extrusion.ToBrep()
+        return self._breps[key]
+
+    def place(self, text, plane, text_height=0.05, depth=0.01):
+        """Returns a copy of the label Brep moved from the world XY plane onto the given plane."""
+        brep = self.get(text, text_height, depth).DuplicateBrep()
+        brep.Transform(rg.Transform.PlaneToPlane(rg.Plane.WorldXY, plane))
+        return brep
+
+    def clear(self):
+        self._breps.clear()
+
+
+LABEL_TEMPLATES = LabelTemplates()
+
+
+class Truss:
+    def __init__(self, tolerance=1e-6):
 
         self.nodes = []
         self.beams = []
+        self.tolerance = tolerance
+
+        # spatial hash of node indices, with grid cells the size of the tolerance
+        self._node_grid = {}
+        # maps an unordered pair of node indices to the beam between them
+        self._beam_index = {}
+        # axes and sections of self.beams as arrays, row i belonging to self.beams[i]
+        self.beam_store = BeamStore()
+
+        # node indices and beams whose cuts are out of date, see update_cuts
+        self._dirty_nodes = set()
+        self._dirty_beams = set()
+        # node indices and beams edited since the last versions.History commit
+        self._edited_nodes = set()
+        self._edited_beams = set()
+
+    def _cell(self, position):
+        """Returns the grid cell containing a position."""
+        return (
+            int(math.floor(position.X / self.tolerance)),
+            int(math.floor(position.Y / self.tolerance)),
+            int(math.floor(position.Z / self.tolerance)),
+        )
+
+    def _index_node(self, index):
+        """Adds the node at the given index to the spatial hash."""
+        cell = self._cell(self.nodes[index].position)
+        self._node_grid.setdefault(cell, []).append(index)
+
+    def _unindex_node(self, index, position):
+        """Removes the node at the given index from the cell of a (previous) position."""
+        cell = self._cell(position)
+        indices = self._node_grid.get(cell, [])
+        if index in indices:
+            indices.remove(index)
+            if not indices:
+                del self._node_grid[cell]
+
+    def _node_index(self, node):
+        """Returns the position of a node in self.nodes."""
+        if node.id < len(self.nodes) and self.nodes[node.id] is node:
+            return node.id
+        return self.nodes.index(node)
+
+    def reindex_node(self, node, old_position):
+        """Updates the spatial hash after a node moved away from old_position."""
+        index = self._node_index(node)
+        self._unindex_node(index, old_position)
+        self._index_node(index)
+
+    def invalidate_node(self, node):
+        """Marks the cuts around a node as out of date.
+
+        The node's beams have to be re-cut from their uncut outline, and the
+        nodes at their far ends have to trim them again.
+        """
+        index = self._node_index(node)
+        self._dirty_nodes.add(index)
+        self._edited_nodes.add(index)
+        for beam in node.connected_beams:
+            self._dirty_beams.add(beam)
+            self._edited_beams.add(beam)
+            self._dirty_nodes.add(beam.end_node if beam.start_node == index else beam.start_node)
+
+    def find_node(self, position):
+        """Returns the index of the node within tolerance of a position, or None."""
+        cx, cy, cz = self._cell(position)
+
+        # a point within tolerance can only sit in the same or a neighbouring cell
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    for i in self._node_grid.get((cx + dx, cy + dy, cz + dz), ()):
+                        if self.nodes[i].position.DistanceTo(position) < self.tolerance:
+                            return i
+        return None
+
+    def _beam_row(self, beam):
+        """Returns the position of a beam in self.beams (and its row in the beam store)."""
+        if beam.id < len(self.beams) and self.beams[beam.id] is beam:
+            return beam.id
+        return self.beams.index(beam)
+
+    def update_beam_geometry(self, beams=None):
+        """Recomputes outlines, centroids and planes of the given beams (all by default) in one pass."""
+        if beams is None:
+            rows = list(range(len(self.beams)))
+            self.beam_store.set_many(
+                [[[b.axis.From.X, b.axis.From.Y, b.axis.From.Z], [b.axis.To.X, b.axis.To.Y, b.axis.To.Z]] for b in self.beams],
+                [beam.width for beam in self.beams],
+                [beam.height for beam in self.beams],
+            )
+        else:
+            rows = [self._beam_row(beam) for beam in beams]
+            for row in rows:
+                beam = self.beams[row]
+                axis = [[beam.axis.From.X, beam.axis.From.Y, beam.axis.From.Z], [beam.axis.To.X, beam.axis.To.Y, beam.axis.To.Z]]
+                self.beam_store.set(row, axis, beam.width, beam.height)
+
+        self.beam_store.refresh(rows)
+        for row in rows:
+            self.beams[row].set_geometry(self.beam_store, row)
+
+    def find_beam(self, start_node_index, end_node_index):
+        """Returns the beam between two node indices (in either direction), or None."""
+        return self._beam_index.get(frozenset((start_node_index, end_node_index)))
 
     def add_node(self, position):
         """Adds a node"""
 
-        for node in self.nodes:
-            if node.position.DistanceTo(position) < 1e-6:
-                return node  # Return existing node if within tolerance
+        index = self.find_node(position)
+        if index is not None:
+            return self.nodes[index]  # Return existing node if within tolerance
 
         new_node = Node(len(self.nodes), position)
+        new_node.truss = self
         self.nodes.append(new_node)
+        self._index_node(len(self.nodes) - 1)
+        self._edited_nodes.add(len(self.nodes) - 1)
         
         return new_node
 
-    def add_beam(self, axis, height, width, isnew=False, fabricated = False):
-        """Creates a beam between two existing nodes and adds it to the truss."""
+    def add_beam(self, axis, height, width, isnew=False, fabricated = False, compute_geometry=True):
+        """Creates a beam between two existing nodes and adds it to the truss.
 
-        tolerance = 1e-6
+        With compute_geometry=False the beam's outline and plane are left for
+        a later update_beam_geometry call, which handles many beams at once.
+        """
 
         # find which nodes are connected to this beam
-        for i, node in enumerate(self.nodes):
-            # Check if either endpoint of the beam's axis is close to the node's position
-            if axis.From.DistanceTo(node.position) < tolerance:
-                start_node_index = i
-            if axis.To.DistanceTo(node.position) < tolerance:
-                end_node_index = i
+        start_node_index = self.find_node(axis.From)
+        end_node_index = self.find_node(axis.To)
+
+        if start_node_index is None or end_node_index is None:
+            raise ValueError(f"Beam axis endpoints do not match existing nodes: {axis}")
 
         # Check if a beam already exists between these nodes (considering both directions)
-        for beam in self.beams:
-            if ({beam.start_node, beam.end_node} == {start_node_index, end_node_index}):
-                return beam  # Return the existing beam if found
+        existing = self.find_beam(start_node_index, end_node_index)
+        if existing is not None:
+            return existing  # Return the existing beam if found
         
-        new_beam = Beam(len(self.beams), start_node_index, end_node_index, axis, height, width, isnew, fabricated)
+        new_beam = Beam(len(self.beams), start_node_index, end_node_index, axis, height, width, isnew, fabricated, compute_geometry)
 
         self.beams.append(new_beam)
+        self.beam_store.append([[axis.From.X, axis.From.Y, axis.From.Z], [axis.To.X, axis.To.Y, axis.To.Z]], width, height)
+        self._beam_index[frozenset((start_node_index, end_node_index))] = new_beam
 
         self.nodes[start_node_index].add_beam(new_beam)
         self.nodes[end_node_index].add_beam(new_beam)
 
+        self._dirty_beams.add(new_beam)
+        self._dirty_nodes.update((start_node_index, end_node_index))
+        self._edited_beams.add(new_beam)
+        self._edited_nodes.update((start_node_index, end_node_index))
+
+        return new_beam
+
     def remove_beam(self, beam):
 
+        self.beam_store.remove(self._beam_row(beam))
         self.beams.remove(beam)
+        self._beam_index.pop(frozenset((beam.start_node, beam.end_node)), None)
 
         # Remove beam references from connected nodes
         self.nodes[beam.start_node].remove_beam(beam)
         self.nodes[beam.end_node].remove_beam(beam)
 
-    def cut_all_beams(self):
+        self._dirty_beams.discard(beam)
+        self._dirty_nodes.update((beam.start_node, beam.end_node))
+        self._edited_beams.add(beam)
+        self._edited_nodes.update((beam.start_node, beam.end_node))
 
+    def cut_all_beams(self, executor=None, cache=None):
+        """Cuts every beam at every node.
+
+        Nodes are cut in index order. Pass a concurrent.futures executor to
+        cut independent nodes in parallel (see parallel_cut); the result is
+        the same as the serial loop. Pass a cache.CutCache to reuse the
+        outlines of joints cut before.
+        """
         for beam in self.beams:
             if not beam.fabricated:
                 beam.cut_polyline = beam.uncut_polyline
-        for n in self.nodes:
-            n.cut_beams()
-            
+
+        if executor is None:
+            for n in self.nodes:
+                n.cut_beams(cache)
+        else:
+            parallel_cut.cut_nodes(self, executor, cache)
+
+        if cache is not None:
+            cache.flush()
+
+        self._dirty_nodes.clear()
+        self._dirty_beams.clear()
+        self._edited_nodes.update(range(len(self.nodes)))
+        self._edited_beams.update(self.beams)
+
+    def update_cuts(self, cache=None):
+        """Re-cuts only the part of the truss invalidated since the last cut.
+
+        Invalidated beams are reset to their uncut outline and invalidated
+        nodes are cut again in index order, each starting from the outlines
+        its beams had before that node was cut in the previous pass (see
+        Node.cut_results). When this changes how a beam leaves a node, the
+        node at its other end is cut again as well, so the result matches
+        cut_all_beams.
+        """
+        if not self._dirty_nodes:
+            return
+        if any(node.cut_results is None for node in self.nodes):
+            self.cut_all_beams(cache=cache)
+            return
+
+        for beam in self._dirty_beams:
+            if not beam.fabricated:
+                beam.cut_polyline = beam.uncut_polyline
+
+        queue = sorted(self._dirty_nodes)
+        queued = set(queue)
+        touched = set()
+
+        while queue:
+            index = heapq.heappop(queue)
+            node = self.nodes[index]
+
+            # restore the outlines the beams had when cut_all_beams reached this node
+            for beam in node.connected_beams:
+                other = beam.end_node if beam.start_node == index else beam.start_node
+                if other < index:
+                    beam.cut_polyline = self.nodes[other].cut_results[beam]
+                elif not beam.fabricated:
+                    beam.cut_polyline = beam.uncut_polyline
+
+            previous = node.cut_results
+            node.cut_beams(cache)
+
+            for beam in node.connected_beams:
+                touched.add(beam)
+                other = beam.end_node if beam.start_node == index else beam.start_node
+                if other > index and other not in queued and not _same_outline(previous.get(beam), node.cut_results[beam]):
+                    heapq.heappush(queue, other)
+                    queued.add(other)
+
+        # beams whose last node was not cut again keep the outline and axis that node gave them
+        for beam in touched:
+            last = max(beam.start_node, beam.end_node)
+            if last not in queued:
+                beam.cut_polyline = self.nodes[last].cut_results[beam]
+                self.nodes[last].orient_beam(beam)
+
+        self._edited_nodes.update(queued)
+        self._edited_beams.update(touched)
+        self._dirty_nodes.clear()
+        self._dirty_beams.clear()
+
+    def get_all_cut_planes(self, blade_side_A, blade_side_B, beams=None):
+        """Beam.get_cut_planes for many beams (all by default) in one vectorized pass.
+
+        Returns one (A1, A2, B1, B2) tuple of planes per beam and sets numbersA /
+        numbersB on the beams. Beams with fewer than three outline points on
+        one side get None instead of raising.
+        """
+        if beams is None:
+            beams = self.beams
+
+        frames, numbersA, numbersB, valid = cut_planes.cut_planes(
+            [polygon.to_array(beam.cut_polyline) for beam in beams],
+            [_xyz(beam.centroid) for beam in beams],
+            [beam.width for beam in beams],
+            [_xyz(beam.xaxis) for beam in beams],
+            [_xyz(beam.yaxis) for beam in beams],
+            [_plane_to_array(beam.plane) for beam in beams],
+            _plane_to_array(blade_side_A), _plane_to_array(blade_side_B),
+        )
+
+        planes = []
+        for beam, beam_frames, points_A, points_B, ok in zip(beams, frames.tolist(), numbersA, numbersB, valid):
+            beam.numbersA = [rg.Point3d(*p) for p in points_A.tolist()]
+            beam.numbersB = [rg.Point3d(*p) for p in points_B.tolist()]
+            planes.append(tuple(_plane_from_array(frame) for frame in beam_frames) if ok else None)
+        return planes
+
+    def add_labels(self, beams=None, text_height=0.05, depth=0.01, join=False):
+        """Beam.add_labels for many beams (all by default) from one set of glyph templates.
+
+        The beams need numbersA / numbersB, see get_all_cut_planes. Returns
+        [brep_A, brep_B] per beam, or with join=True a single Brep holding
+        every label, which is cheaper to preview.
+        """
+        if beams is None:
+            beams = self.beams
+
+        labels = [beam.add_labels(text_height, depth) for beam in beams]
+        if not join:
+            return labels
+
+        joined = rg.Brep()
+        for brep_A, brep_B in labels:
+            joined.Append(brep_A)
+            joined.Append(brep_B)
+        return joined
+
+    def find_overlaps(self, min_area=1e-9):
+        """Returns the pairs of beams whose cut outlines overlap, see validation.find_overlaps."""
+        return validation.find_overlaps(self, min_area)
+
+    def find_gaps(self, tolerance=1e-6):
+        """Returns the neighbouring beams whose cut outlines do not meet at a joint, see validation.find_gaps."""
+        return validation.find_gaps(self, tolerance)
+
+    def analyze(self, supports, loads=None, **kwargs):
+        """Returns the axial forces and utilisation of every beam, see analysis.analyze."""
+        return analysis.analyze(self, supports, loads, **kwargs)
 
     def to_dict(self):
         """Serializes the truss into a dictionary format."""
@@ -72,10 +400,12 @@ class Truss:
             "beams": [beam.to_dict() for beam in self.beams]
         }
 
-    def to_json(self, file_path=None):
+    def to_json(self, file_path=None, indent=4):
         """Converts the dictionary representation to a JSON string or saves it to a file.
+
+        Pass indent=None for compact JSON.
         """
-        json_data = json.dumps(self.to_dict(), indent=4)
+        json_data = json.dumps(self.to_dict(), indent=indent)
 
         if file_path:
             with open(file_path, "w") as file:
@@ -93,37 +423,134 @@ class Truss:
         with open(file_path, "r") as file:
             data = json.load(file)
 
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a truss from the dictionary format of to_dict, see from_arrays.
+
+        As when the truss is rebuilt through add_node and add_beam, nodes
+        keep the ids stored with them, and a beam repeating the nodes of an
+        earlier beam is dropped, keeping the first one.
+        """
+        nodes = data["nodes"]
+        beams, pairs = [], set()
+        for beam_data in data["beams"]:
+            pair = frozenset((beam_data["start_node"], beam_data["end_node"]))
+            if pair not in pairs:
+                pairs.add(pair)
+                beams.append(beam_data)
+        cut_polylines = [beam_data["cut_polyline"] for beam_data in beams]
+
+        truss = cls.from_arrays({
+            "positions": np.array([node_data["position"] for node_data in nodes], dtype=float).reshape(-1, 3),
+            "has_moved": np.array([node_data.get("has_moved", False) for node_data in nodes], dtype=bool),
+            "beam_nodes": np.array([[b["start_node"], b["end_node"]] for b in beams], dtype=int).reshape(-1, 2),
+            "axes": np.array([[b["axis"]["from"], b["axis"]["to"]] for b in beams], dtype=float).reshape(-1, 2, 3),
+            "heights": np.array([b["height"] for b in beams], dtype=float),
+            "widths": np.array([b["width"] for b in beams], dtype=float),
+            "reference_widths": np.array([b["reference_width"] for b in beams], dtype=float),
+            "is_new": np.array([b["is_new"] for b in beams], dtype=bool),
+            "fabricated": np.array([b["fabricated"] for b in beams], dtype=bool),
+            "cut_points": np.array([p for points in cut_polylines for p in points], dtype=float).reshape(-1, 3),
+            "cut_offsets": np.cumsum([0] + [len(points) for points in cut_polylines]),
+        })
+        for node, node_data in zip(truss.nodes, nodes):
+            node.id = node_data["id"]
+        return truss
+
+    def to_arrays(self):
+        """Returns the truss as a dictionary of flat arrays.
+
+        Node i and beam j are rows i and j of the node and beam arrays; the cut
+        polyline of beam j is cut_points[cut_offsets[j]:cut_offsets[j + 1]].
+        """
+        cut_polylines = [polygon.to_array(beam.cut_polyline) for beam in self.beams]
+
+        return {
+            "positions": np.array([[n.position.X, n.position.Y, n.position.Z] for n in self.nodes], dtype=float).reshape(-1, 3),
+            "has_moved": np.array([node.has_moved for node in self.nodes], dtype=bool),
+            "beam_nodes": np.array([[beam.start_node, beam.end_node] for beam in self.beams], dtype=int).reshape(-1, 2),
+            "axes": np.array([[[b.axis.From.X, b.axis.From.Y, b.axis.From.Z], [b.axis.To.X, b.axis.To.Y, b.axis.To.Z]] for b in self.beams], dtype=float).reshape(-1, 2, 3),
+            "heights": np.array([beam.height for beam in self.beams], dtype=float),
+            "widths": np.array([beam.width for beam in self.beams], dtype=float),
+            "reference_widths": np.array([beam.reference_width for beam in self.beams], dtype=float),
+            "is_new": np.array([beam.is_new for beam in self.beams], dtype=bool),
+            "fabricated": np.array([beam.fabricated for beam in self.beams], dtype=bool),
+            "cut_points": np.concatenate(cut_polylines) if cut_polylines else np.zeros((0, 3)),
+            "cut_offsets": np.cumsum([0] + [len(points) for points in cut_polylines]),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Builds a truss from the arrays of to_arrays in one pass.
+
+        Unlike add_node and add_beam this trusts the stored topology: node ids
+        are row indices, beams join the nodes given in beam_nodes, and nothing
+        is searched for or merged.
+        """
         truss = cls()
 
-        # Reconstruct nodes
-        node_map = {}  # Maps node ID to actual node objects
-        for node_data in data["nodes"]:
-            position = rg.Point3d(*node_data["position"])
-            node = Node(node_data["id"], position)
-            node.has_moved = node_data.get("has_moved", False)
+        for index, position in enumerate(np.asarray(arrays["positions"], dtype=float).tolist()):
+            node = Node(index, rg.Point3d(*position))
+            node.has_moved = bool(arrays["has_moved"][index])
+            node.truss = truss
             truss.nodes.append(node)
-            node_map[node_data["id"]] = node  # Store mapping for later use
+            truss._index_node(index)
+
+        axes = np.asarray(arrays["axes"], dtype=float)
+        for row, (start_node, end_node) in enumerate(np.asarray(arrays["beam_nodes"]).tolist()):
+            (x0, y0, z0), (x1, y1, z1) = axes[row].tolist()
+            axis = rg.Line(rg.Point3d(x0, y0, z0), rg.Point3d(x1, y1, z1))
+            beam = Beam(row, start_node, end_node, axis, float(arrays["heights"][row]), float(arrays["widths"][row]),
+                        bool(arrays["is_new"][row]), bool(arrays["fabricated"][row]), compute_geometry=False)
+            beam.reference_width = float(arrays["reference_widths"][row])
+
+            truss.beams.append(beam)
+            truss._beam_index[frozenset((start_node, end_node))] = beam
+            truss.nodes[start_node].add_beam(beam)
+            truss.nodes[end_node].add_beam(beam)
+
+        truss.beam_store.set_many(axes, arrays["widths"], arrays["heights"])
+        truss.beam_store.refresh()
+        for row, beam in enumerate(truss.beams):
+            beam.set_geometry(truss.beam_store, row)
+
+        cut_points, offsets = np.asarray(arrays["cut_points"], dtype=float), arrays["cut_offsets"]
+        for row, beam in enumerate(truss.beams):
+            points = cut_points[offsets[row]:offsets[row + 1]].tolist()
+            beam.cut_polyline = rg.PolylineCurve([rg.Point3d(*p) for p in points])
 
-        cut_polylines = []
-        # Reconstruct beams
-        for beam_data in data["beams"]:
+        return truss
 
-            axis = rg.Line(
-                rg.Point3d(*beam_data["axis"]["from"]),
-                rg.Point3d(*beam_data["axis"]["to"]),
-            )
+    def to_npz(self, file_path):
+        """Saves the arrays of to_arrays to a compressed .npz file."""
+        np.savez_compressed(file_path, **self.to_arrays())
+        print(f"Truss data saved to: {file_path}")
 
-            # Reconstruct the cut polyline
-            cut_polyline_points = [rg.Point3d(*pt) for pt in beam_data["cut_polyline"]]
-            cut_polyline = rg.PolylineCurve(cut_polyline_points)
-            cut_polylines.append(cut_polyline)
+    @classmethod
+    def from_npz(cls, file_path):
+        """Loads a Truss object from a .npz file written by to_npz."""
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
 
-            truss.add_beam(axis, beam_data["height"], beam_data["width"], beam_data["is_new"], beam_data["fabricated"])
-            truss.beams[-1].reference_width = beam_data["reference_width"]
+        with np.load(file_path) as data:
+            return cls.from_arrays({name: data[name] for name in data.files})
 
-        for beam, ctp in zip(truss.beams, cut_polylines):
-            beam.cut_polyline = ctp
+    @classmethod
+    def from_csv(cls, file_path, height=0.06, width=0.05, tolerance=1e-6, chunk_rows=None):
+        """Builds a truss from a Grasshopper state export (points and lines), see csv_io.
+
+        Points closer than tolerance become one node. The beams have the given
+        section and their uncut outline as cut outline.
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
 
+        points, lines = csv_io.read_state(file_path, chunk_rows)
+        truss = cls.from_arrays(csv_io.state_arrays(points, lines, height, width, tolerance))
+        for beam in truss.beams:
+            beam.cut_polyline = beam.uncut_polyline
         return truss
 
     def __repr__(self):
@@ -131,7 +558,7 @@ class Truss:
 
 
 class Beam:
-    def __init__(self, id, start_node_index, end_node_index, axis, height, width, isnew=False, fabricated=False):
+    def __init__(self, id, start_node_index, end_node_index, axis, height, width, isnew=False, fabricated=False, compute_geometry=True):
 
         self.id = id
         # a line defining the main axis of the beam
@@ -140,13 +567,31 @@ class Beam:
         self.height = height
         self.width = width
         self.reference_width = width
+        self.fabricated = fabricated
+        self.is_new = isnew
+
+        if compute_geometry:
+            self.update_geometry()
+
+    def update_geometry(self):
+        """Recomputes the uncut outline, centroid and plane from the axis."""
         self.uncut_polyline = self.get_uncut_polyline()
-        self.centroid = rg.AreaMassProperties.Compute(self.uncut_polyline.ToNurbsCurve()).Centroid
+        # the outline is a rectangle centred on the axis, so its centroid is the axis midpoint
+        self.centroid = self.axis.PointAt(0.5)
         self.xaxis = self.axis.PointAt(0) - self.axis.PointAt(1)
         self.yaxis = rg.Vector3d.CrossProduct(self.xaxis, rg.Vector3d(0, 0, 1))
         self.plane = rg.Plane(self.centroid, self.xaxis, self.yaxis)
-        self.fabricated = fabricated
-        self.is_new = isnew
+
+        if not self.fabricated:
+            self.cut_polyline = self.uncut_polyline
+
+    def set_geometry(self, store, row):
+        """Takes the uncut outline, centroid and plane from a row of a BeamStore."""
+        self.uncut_polyline = rg.PolylineCurve([rg.Point3d(*p) for p in store.outlines[row]])
+        self.centroid = rg.Point3d(*store.centroids[row])
+        self.xaxis = rg.Vector3d(*store.xaxes[row])
+        self.yaxis = rg.Vector3d(*store.yaxes[row])
+        self.plane = rg.Plane(self.centroid, rg.Vector3d(*store.planes[row][1]), rg.Vector3d(*store.planes[row][2]))
 
         if not self.fabricated:
             self.cut_polyline = self.uncut_polyline
@@ -179,44 +624,12 @@ class Beam:
         # cut beam1
         if self.fabricated:
             return
-        
-        events = rg.Intersect.Intersection.CurveCurve(
-                self.cut_polyline, other.cut_polyline, 1e-6, 1e-6
-            )
 
-        if events.Count >= 2:
-            intersection_points = [event.PointA for event in events]
-            sorted_points = sorted(intersection_points, key=lambda pt: pt.DistanceTo(self.axis.From), reverse=True)
-            cutting_points = [ sorted_points[0], sorted_points[-1] ]
-
-            self.cut_polyline.Domain = rg.Interval(0,1)
-            par = [self.cut_polyline.ClosestPoint(p)[1] for p in cutting_points]
-            split_curves = self.cut_polyline.Split(par)
-            if split_curves[0].GetLength() > split_curves[1].GetLength():
-                self.cut_polyline = split_curves[0]
-            else:
-                self.cut_polyline = split_curves[1]
-
-            # close curve
-            new_points = [p for p in self.cut_polyline.TryGetPolyline()[1]]
-
-            if type == "pol":
-                other_cut_polyline = other.cut_polyline.Duplicate()
-                other_cut_polyline.Domain = rg.Interval(0,1)
-                par = [other_cut_polyline.ClosestPoint(p)[1] for p in cutting_points]
-                split_curves2 = other_cut_polyline.Split(par)
-                if len(split_curves2)>1:
-                    #select the shorter segment for beam2
-                    if split_curves2[0].GetLength() < split_curves2[1].GetLength():
-                        other_polyline = split_curves2[0]
-                    else:
-                        other_polyline = split_curves2[1]
-                    other_points = [p for p in other_polyline.TryGetPolyline()[1]]
-                    if len (other_points)==3:
-                        new_points.append(other_points[1])
-
-            new_points.append(new_points[0])
-            self.cut_polyline = rg.Curve.CreateInterpolatedCurve(new_points, 1)
+        # trim the outline points directly instead of intersecting and splitting curves
+        reference = [self.axis.From.X, self.axis.From.Y, self.axis.From.Z]
+        trimmed = polygon.trim(polygon.to_array(self.cut_polyline), polygon.to_array(other.cut_polyline), reference, type)
+        if trimmed is not None:
+            self.cut_polyline = rg.PolylineCurve([rg.Point3d(*p) for p in trimmed])
 
     def get_cut_planes(self, blade_side_A, blade_side_B):
 
@@ -276,31 +689,15 @@ class Beam:
 
         return in_cut_plane_side_a1, in_cut_plane_side_a2, in_cut_plane_side_b1, in_cut_plane_side_b2
 
-    def add_labels(self):
+    def add_labels(self, text_height=0.05, depth=0.01, templates=None):
         # Create a label 'A' on the right side and 'B' on the left side
         plane_A = rg.Plane(self.numbersA[1], -self.plane.XAxis, self.plane.YAxis)
         plane_B = rg.Plane(self.numbersB[1], -self.plane.XAxis, self.plane.YAxis)
 
-        text_A = rg.TextEntity()
-        text_A.Plane = plane_A
-        text_A.TextHeight = 0.05
-        text_A.Text = "A"
-
-        text_B = rg.TextEntity()
-        text_B.Plane = plane_B
-        text_B.TextHeight = 0.05
-        text_B.Text = "B"
-
-        # Convert the text to a 2D curve
-        curve_A = rg.Curve.JoinCurves(text_A.Explode())[0]
-        curve_B = rg.Curve.JoinCurves(text_B.Explode())[0]
-
-        extrusion_A = rg.Extrusion.Create(curve_A, plane_A, 0.01, True)  # Extrude along the Z-axis
-        extrusion_B = rg.Extrusion.Create(curve_B, plane_B, 0.01, True)  # Same for B
-
-        # Convert extrusions to Breps
-        brep_A = extrusion_A.ToBrep()
-        brep_B = extrusion_B.ToBrep()
+        # the glyphs never change, so they are built once and moved onto the planes
+        templates = templates or LABEL_TEMPLATES
+        brep_A = templates.place("A", plane_A, text_height, depth)
+        brep_B = templates.place("B", plane_B, text_height, depth)
 
         return [brep_A, brep_B]
 
@@ -337,6 +734,10 @@ class Node:
         self.connected_beams = []
         self.connected_beams_ids = []
         self.has_moved = False
+        # the truss owning this node, kept so moves update its spatial index
+        self.truss = None
+        # outline of each connected beam right after this node cut it
+        self.cut_results = None
 
         self.helper = []
 
@@ -345,39 +746,53 @@ class Node:
         self.connected_beams.append(beam)
         self.connected_beams_ids.append(beam.id)
 
+    def remove_beam(self, beam):
+
+        self.connected_beams.remove(beam)
+        self.connected_beams_ids.remove(beam.id)
+
     def move_node(self, new_position):
 
         old_position = self.position
         self.position = new_position
         self.has_moved = True
 
+        if self.truss is not None:
+            self.truss.reindex_node(self, old_position)
+            self.truss.invalidate_node(self)
+
         for beam in self.connected_beams:
             if beam.axis.From.DistanceTo(old_position) < 1e-6:
                 beam.axis = rg.Line(new_position, beam.axis.To)
             else:
                 beam.axis = rg.Line(beam.axis.From, new_position)
 
-            # Update beam geometry
-            beam.uncut_polyline = beam.get_uncut_polyline()
-            beam.cut_polyline = beam.uncut_polyline
             beam.is_new = True
 
-            # Update beam centroid and plane
-            beam.centroid = rg.AreaMassProperties.Compute(beam.uncut_polyline.ToNurbsCurve()).Centroid
-            beam.xaxis = beam.axis.PointAt(0) - beam.axis.PointAt(1)
-            beam.yaxis = rg.Vector3d.CrossProduct(beam.xaxis, rg.Vector3d(0, 0, 1))
-            beam.plane = rg.Plane(beam.centroid, beam.xaxis, beam.yaxis)
+        # Update beam geometry, centroid and plane
+        if self.truss is not None:
+            self.truss.update_beam_geometry(self.connected_beams)
+        else:
+            for beam in self.connected_beams:
+                beam.update_geometry()
+        for beam in self.connected_beams:
+            beam.cut_polyline = beam.uncut_polyline
+
+    def orient_beam(self, beam):
+        """Makes the beam's axis start at this node and returns its direction."""
+        if beam.axis.From.DistanceTo(self.position) < 1e-6:
+            direction = beam.axis.To - self.position
+        else:
+            direction = beam.axis.From - self.position
+
+        beam.axis = rg.Line(self.position, self.position + direction)
+        return direction
 
     def organize_beams(self):
 
         angles = []
         for beam in self.connected_beams:
-            if beam.axis.From.DistanceTo(self.position) < 1e-6:
-                direction = beam.axis.To - self.position
-            else:
-                direction = beam.axis.From - self.position
-
-            beam.axis = rg.Line(self.position, self.position + direction)
+            direction = self.orient_beam(beam)
 
             # Calculate angle using atan2
             angles.append(math.atan2(direction.Y, direction.X))
@@ -449,10 +864,20 @@ class Node:
                 beam1.cut_with_beam(organized_beams[i-1], "pol")
                 beam1.cut_with_beam(organized_beams[(i+1)%len(organized_beams)], "pol")
 
-    def cut_beams(self):
+    def cut_beams(self, cache=None):
 
         organized_beams = self.organize_beams()
 
+        if cache is not None:
+            key = cache.key(self)
+            outlines = cache.get_outlines(key, self)
+            if outlines is not None:
+                for beam, outline in zip(self.connected_beams, outlines):
+                    if not beam.fabricated:
+                        beam.cut_polyline = rg.PolylineCurve([rg.Point3d(*p) for p in outline])
+                self.cut_results = {beam: beam.cut_polyline for beam in self.connected_beams}
+                return
+
         for i, beam1 in enumerate(organized_beams):
 
             beam2 = organized_beams[(i+1) % len(organized_beams)]
@@ -484,6 +909,10 @@ class Node:
         self.fix_reflex_angles(organized_beams)
         self.fix_is_new(organized_beams)
 
+        self.cut_results = {beam: beam.cut_polyline for beam in self.connected_beams}
+        if cache is not None:
+            cache.put_outlines(key, self)
+
 
     def to_dict(self):
         """Serializes the node into a dictionary format."""
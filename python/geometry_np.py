@@ -0,0 +1,863 @@
+"""
+Rhino-free version of the Truss / Beam / Node model in geometry.py.
+
+Points and vectors are float arrays of shape (3,), lines are (2, 3) arrays
+(from, to), polylines are (n, 3) arrays and planes are (4, 3) arrays holding
+origin, x axis, y axis and z axis. Everything else mirrors geometry.py so the
+two can be used interchangeably outside of Rhino.
+"""
+
+import math
+import json
+import os
+import heapq
+
+import numpy as np
+
+import polygon
+from beam_store import BeamStore
+import parallel_cut
+import cut_planes
+import validation
+import analysis
+import csv_io
+
+
+Z_AXIS = np.array([0.0, 0.0, 1.0])
+WORLD_XY = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+
+
+def unitize(vector):
+    return vector / np.linalg.norm(vector)
+
+
+def make_plane(origin, xaxis, yaxis):
+    """Builds an orthonormal plane the way rg.Plane(origin, xaxis, yaxis) does."""
+    x = unitize(np.asarray(xaxis, dtype=float))
+    z = unitize(np.cross(x, yaxis))
+    y = np.cross(z, x)
+    return np.array([origin, x, y, z], dtype=float)
+
+
+def plane_to_plane(source, target):
+    """Returns the 4x4 transform mapping the source plane onto the target plane."""
+    rotation = target[1:].T @ source[1:]
+    transform = np.eye(4)
+    transform[:3, :3] = rotation
+    transform[:3, 3] = target[0] - rotation @ source[0]
+    return transform
+
+
+def transform_points(transform, points):
+    points = np.asarray(points, dtype=float)
+    return points @ transform[:3, :3].T + transform[:3, 3]
+
+
+def transform_plane(plane, transform):
+    origin = transform_points(transform, plane[0])
+    axes = plane[1:] @ transform[:3, :3].T
+    return np.vstack([origin, axes])
+
+
+def vector_angle(a, b):
+    """Angle from a to b measured anticlockwise in the XY plane, in [0, 2pi)."""
+    angle = math.atan2(a[0] * b[1] - a[1] * b[0], a[0] * b[0] + a[1] * b[1])
+    return angle % (2 * math.pi)
+
+
+def line_line_parameters(line_a, line_b):
+    """Parameters of the closest points of two infinite lines, like rg.Intersect.Intersection.LineLine."""
+    da = line_a[1] - line_a[0]
+    db = line_b[1] - line_b[0]
+    r = line_a[0] - line_b[0]
+    a, b, c = da @ da, da @ db, db @ db
+    d, e = da @ r, db @ r
+    denom = a * c - b * b
+    if abs(denom) < 1e-15:
+        return False, 0.0, e / c
+    return True, (b * e - c * d) / denom, (a * e - b * d) / denom
+
+
+def index_of(points, point):
+    """Index of the first point equal to the given one."""
+    return int(np.nonzero(np.all(points == point, axis=1))[0][0])
+
+
+def _same_outline(a, b):
+    """Returns True if two cut polylines have exactly the same points."""
+    if a is b:
+        return True
+    if a is None or b is None:
+        return False
+    return a.shape == b.shape and np.array_equal(a, b)
+
+
+class Truss:
+    def __init__(self, tolerance=1e-6):
+
+        self.nodes = []
+        self.beams = []
+        self.tolerance = tolerance
+
+        # spatial hash of node indices, with grid cells the size of the tolerance
+        self._node_grid = {}
+        # maps an unordered pair of node indices to the beam between them
+        self._beam_index = {}
+        # axes and sections of self.beams as arrays, row i belonging to self.beams[i]
+        self.beam_store = BeamStore()
+
+        # node indices and beams whose cuts are out of date, see update_cuts
+        self._dirty_nodes = set()
+        self._dirty_beams = set()
+        # node indices and beams edited since the last versions.History commit
+        self._edited_nodes = set()
+        self._edited_beams = set()
+
+    def _cell(self, position):
+        """Returns the grid cell containing a position."""
+        return tuple(int(math.floor(c / self.tolerance)) for c in position)
+
+    def _index_node(self, index):
+        """Adds the node at the given index to the spatial hash."""
+        cell = self._cell(self.nodes[index].position)
+        self._node_grid.setdefault(cell, []).append(index)
+
+    def _unindex_node(self, index, position):
+        """Removes the node at the given index from the cell of a (previous) position."""
+        cell = self._cell(position)
+        indices = self._node_grid.get(cell, [])
+        if index in indices:
+            indices.remove(index)
+            if not indices:
+                del self._node_grid[cell]
+
+    def _node_index(self, node):
+        """Returns the position of a node in self.nodes."""
+        if node.id < len(self.nodes) and self.nodes[node.id] is node:
+            return node.id
+        return self.nodes.index(node)
+
+    def reindex_node(self, node, old_position):
+        """Updates the spatial hash after a node moved away from old_position."""
+        index = self._node_index(node)
+        self._unindex_node(index, old_position)
+        self._index_node(index)
+
+    def invalidate_node(self, node):
+        """Marks the cuts around a node as out of date.
+
+        The node's beams have to be re-cut from their uncut outline, and the
+        nodes at their far ends have to trim them again.
+        """
+        index = self._node_index(node)
+        self._dirty_nodes.add(index)
+        self._edited_nodes.add(index)
+        for beam in node.connected_beams:
+            self._dirty_beams.add(beam)
+            self._edited_beams.add(beam)
+            self._dirty_nodes.add(beam.end_node if beam.start_node == index else beam.start_node)
+
+    def find_node(self, position):
+        """Returns the index of the node within tolerance of a position, or None."""
+        cx, cy, cz = self._cell(position)
+
+        # a point within tolerance can only sit in the same or a neighbouring cell
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    for i in self._node_grid.get((cx + dx, cy + dy, cz + dz), ()):
+                        if np.linalg.norm(self.nodes[i].position - position) < self.tolerance:
+                            return i
+        return None
+
+    def _beam_row(self, beam):
+        """Returns the position of a beam in self.beams (and its row in the beam store)."""
+        if beam.id < len(self.beams) and self.beams[beam.id] is beam:
+            return beam.id
+        return self.beams.index(beam)
+
+    def update_beam_geometry(self, beams=None):
+        """Recomputes outlines, centroids and planes of the given beams (all by default) in one pass."""
+        if beams is None:
+            rows = list(range(len(self.beams)))
+            self.beam_store.set_many(
+                [beam.axis for beam in self.beams],
+                [beam.width for beam in self.beams],
+                [beam.height for beam in self.beams],
+            )
+        else:
+            rows = [self._beam_row(beam) for beam in beams]
+            for row in rows:
+                beam = self.beams[row]
+                self.beam_store.set(row, beam.axis, beam.width, beam.height)
+
+        self.beam_store.refresh(rows)
+        for row in rows:
+            self.beams[row].set_geometry(self.beam_store, row)
+
+    def find_beam(self, start_node_index, end_node_index):
+        """Returns the beam between two node indices (in either direction), or None."""
+        return self._beam_index.get(frozenset((start_node_index, end_node_index)))
+
+    def add_node(self, position):
+        """Adds a node"""
+
+        position = np.asarray(position, dtype=float)
+        index = self.find_node(position)
+        if index is not None:
+            return self.nodes[index]  # Return existing node if within tolerance
+
+        new_node = Node(len(self.nodes), position)
+        new_node.truss = self
+        self.nodes.append(new_node)
+        self._index_node(len(self.nodes) - 1)
+        self._edited_nodes.add(len(self.nodes) - 1)
+
+        return new_node
+
+    def add_beam(self, axis, height, width, isnew=False, fabricated=False, compute_geometry=True):
+        """Creates a beam between two existing nodes and adds it to the truss.
+
+        With compute_geometry=False the beam's outline and plane are left for
+        a later update_beam_geometry call, which handles many beams at once.
+        """
+
+        axis = np.asarray(axis, dtype=float)
+
+        # find which nodes are connected to this beam
+        start_node_index = self.find_node(axis[0])
+        end_node_index = self.find_node(axis[1])
+
+        if start_node_index is None or end_node_index is None:
+            raise ValueError(f"Beam axis endpoints do not match existing nodes: {axis.tolist()}")
+
+        # Check if a beam already exists between these nodes (considering both directions)
+        existing = self.find_beam(start_node_index, end_node_index)
+        if existing is not None:
+            return existing  # Return the existing beam if found
+
+        new_beam = Beam(len(self.beams), start_node_index, end_node_index, axis, height, width, isnew, fabricated, compute_geometry)
+
+        self.beams.append(new_beam)
+        self.beam_store.append(axis, width, height)
+        self._beam_index[frozenset((start_node_index, end_node_index))] = new_beam
+
+        self.nodes[start_node_index].add_beam(new_beam)
+        self.nodes[end_node_index].add_beam(new_beam)
+
+        self._dirty_beams.add(new_beam)
+        self._dirty_nodes.update((start_node_index, end_node_index))
+        self._edited_beams.add(new_beam)
+        self._edited_nodes.update((start_node_index, end_node_index))
+
+        return new_beam
+
+    def remove_beam(self, beam):
+
+        self.beam_store.remove(self._beam_row(beam))
+        self.beams.remove(beam)
+        self._beam_index.pop(frozenset((beam.start_node, beam.end_node)), None)
+
+        # Remove beam references from connected nodes
+        self.nodes[beam.start_node].remove_beam(beam)
+        self.nodes[beam.end_node].remove_beam(beam)
+
+        self._dirty_beams.discard(beam)
+        self._dirty_nodes.update((beam.start_node, beam.end_node))
+        self._edited_beams.add(beam)
+        self._edited_nodes.update((beam.start_node, beam.end_node))
+
+    def cut_all_beams(self, executor=None, cache=None):
+        """Cuts every beam at every node.
+
+        Nodes are cut in index order. Pass a concurrent.futures executor to
+        cut independent nodes in parallel (see parallel_cut); the result is
+        the same as the serial loop. Pass a cache.CutCache to reuse the
+        outlines of joints cut before.
+        """
+        for beam in self.beams:
+            if not beam.fabricated:
+                beam.cut_polyline = beam.uncut_polyline
+
+        if executor is None:
+            for n in self.nodes:
+                n.cut_beams(cache)
+        else:
+            parallel_cut.cut_nodes(self, executor, cache)
+
+        if cache is not None:
+            cache.flush()
+
+        self._dirty_nodes.clear()
+        self._dirty_beams.clear()
+        self._edited_nodes.update(range(len(self.nodes)))
+        self._edited_beams.update(self.beams)
+
+    def update_cuts(self, cache=None):
+        """Re-cuts only the part of the truss invalidated since the last cut.
+
+        Invalidated beams are reset to their uncut outline and invalidated
+        nodes are cut again in index order, each starting from the outlines
+        its beams had before that node was cut in the previous pass (see
+        Node.cut_results). When this changes how a beam leaves a node, the
+        node at its other end is cut again as well, so the result matches
+        cut_all_beams.
+        """
+        if not self._dirty_nodes:
+            return
+        if any(node.cut_results is None for node in self.nodes):
+            self.cut_all_beams(cache=cache)
+            return
+
+        for beam in self._dirty_beams:
+            if not beam.fabricated:
+                beam.cut_polyline = beam.uncut_polyline
+
+        queue = sorted(self._dirty_nodes)
+        queued = set(queue)
+        touched = set()
+
+        while queue:
+            index = heapq.heappop(queue)
+            node = self.nodes[index]
+
+            # restore the outlines the beams had when cut_all_beams reached this node
+            for beam in node.connected_beams:
+                other = beam.end_node if beam.start_node == index else beam.start_node
+                if other < index:
+                    beam.cut_polyline = self.nodes[other].cut_results[beam]
+                elif not beam.fabricated:
+                    beam.cut_polyline = beam.uncut_polyline
+
+            previous = node.cut_results
+            node.cut_beams(cache)
+
+            for beam in node.connected_beams:
+                touched.add(beam)
+                other = beam.end_node if beam.start_node == index else beam.start_node
+                if other > index and other not in queued and not _same_outline(previous.get(beam), node.cut_results[beam]):
+                    heapq.heappush(queue, other)
+                    queued.add(other)
+
+        # beams whose last node was not cut again keep the outline and axis that node gave them
+        for beam in touched:
+            last = max(beam.start_node, beam.end_node)
+            if last not in queued:
+                beam.cut_polyline = self.nodes[last].cut_results[beam]
+                self.nodes[last].orient_beam(beam)
+
+        self._edited_nodes.update(queued)
+        self._edited_beams.update(touched)
+        self._dirty_nodes.clear()
+        self._dirty_beams.clear()
+
+    def get_all_cut_planes(self, blade_side_A, blade_side_B, beams=None):
+        """Beam.get_cut_planes for many beams (all by default) in one vectorized pass.
+
+        Returns an (n, 4, 4, 3) array with planes A1, A2, B1, B2 of every beam
+        and sets numbersA / numbersB on the beams. Beams with fewer than three
+        outline points on one side get NaN planes instead of raising.
+        """
+        if beams is None:
+            beams = self.beams
+
+        frames, numbersA, numbersB, _ = cut_planes.cut_planes(
+            [beam.cut_polyline for beam in beams],
+            [beam.centroid for beam in beams],
+            [beam.width for beam in beams],
+            [beam.xaxis for beam in beams],
+            [beam.yaxis for beam in beams],
+            [beam.plane for beam in beams],
+            blade_side_A, blade_side_B,
+        )
+        for beam, points_A, points_B in zip(beams, numbersA, numbersB):
+            beam.numbersA = list(points_A)
+            beam.numbersB = list(points_B)
+        return frames
+
+    def find_overlaps(self, min_area=1e-9):
+        """Returns the pairs of beams whose cut outlines overlap, see validation.find_overlaps."""
+        return validation.find_overlaps(self, min_area)
+
+    def find_gaps(self, tolerance=1e-6):
+        """Returns the neighbouring beams whose cut outlines do not meet at a joint, see validation.find_gaps."""
+        return validation.find_gaps(self, tolerance)
+
+    def analyze(self, supports, loads=None, **kwargs):
+        """Returns the axial forces and utilisation of every beam, see analysis.analyze."""
+        return analysis.analyze(self, supports, loads, **kwargs)
+
+    def to_dict(self):
+        """Serializes the truss into a dictionary format."""
+        return {
+            "nodes": [node.to_dict() for node in self.nodes],
+            "beams": [beam.to_dict() for beam in self.beams]
+        }
+
+    def to_json(self, file_path=None, indent=4):
+        """Converts the dictionary representation to a JSON string or saves it to a file.
+
+        Pass indent=None for compact JSON.
+        """
+        json_data = json.dumps(self.to_dict(), indent=indent)
+
+        if file_path:
+            with open(file_path, "w") as file:
+                file.write(json_data)
+            print(f"Truss data saved to: {file_path}")
+        else:
+            return json_data
+
+    @classmethod
+    def from_json(cls, file_path):
+        """Loads a Truss object from a JSON file."""
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        with open(file_path, "r") as file:
+            data = json.load(file)
+
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a truss from the dictionary format of to_dict, see from_arrays.
+
+        As when the truss is rebuilt through add_node and add_beam, nodes
+        keep the ids stored with them, and a beam repeating the nodes of an
+        earlier beam is dropped, keeping the first one.
+        """
+        nodes = data["nodes"]
+        beams, pairs = [], set()
+        for beam_data in data["beams"]:
+            pair = frozenset((beam_data["start_node"], beam_data["end_node"]))
+            if pair not in pairs:
+                pairs.add(pair)
+                beams.append(beam_data)
+        cut_polylines = [beam_data["cut_polyline"] for beam_data in beams]
+
+        truss = cls.from_arrays({
+            "positions": np.array([node_data["position"] for node_data in nodes], dtype=float).reshape(-1, 3),
+            "has_moved": np.array([node_data.get("has_moved", False) for node_data in nodes], dtype=bool),
+            "beam_nodes": np.array([[b["start_node"], b["end_node"]] for b in beams], dtype=int).reshape(-1, 2),
+            "axes": np.array([[b["axis"]["from"], b["axis"]["to"]] for b in beams], dtype=float).reshape(-1, 2, 3),
+            "heights": np.array([b["height"] for b in beams], dtype=float),
+            "widths": np.array([b["width"] for b in beams], dtype=float),
+            "reference_widths": np.array([b["reference_width"] for b in beams], dtype=float),
+            "is_new": np.array([b["is_new"] for b in beams], dtype=bool),
+            "fabricated": np.array([b["fabricated"] for b in beams], dtype=bool),
+            "cut_points": np.array([p for points in cut_polylines for p in points], dtype=float).reshape(-1, 3),
+            "cut_offsets": np.cumsum([0] + [len(points) for points in cut_polylines]),
+        })
+        for node, node_data in zip(truss.nodes, nodes):
+            node.id = node_data["id"]
+        return truss
+
+    def to_arrays(self):
+        """Returns the truss as a dictionary of flat arrays.
+
+        Node i and beam j are rows i and j of the node and beam arrays; the cut
+        polyline of beam j is cut_points[cut_offsets[j]:cut_offsets[j + 1]].
+        """
+        cut_polylines = [beam.cut_polyline for beam in self.beams]
+
+        return {
+            "positions": np.array([node.position for node in self.nodes], dtype=float).reshape(-1, 3),
+            "has_moved": np.array([node.has_moved for node in self.nodes], dtype=bool),
+            "beam_nodes": np.array([[beam.start_node, beam.end_node] for beam in self.beams], dtype=int).reshape(-1, 2),
+            "axes": np.array([beam.axis for beam in self.beams], dtype=float).reshape(-1, 2, 3),
+            "heights": np.array([beam.height for beam in self.beams], dtype=float),
+            "widths": np.array([beam.width for beam in self.beams], dtype=float),
+            "reference_widths": np.array([beam.reference_width for beam in self.beams], dtype=float),
+            "is_new": np.array([beam.is_new for beam in self.beams], dtype=bool),
+            "fabricated": np.array([beam.fabricated for beam in self.beams], dtype=bool),
+            "cut_points": np.concatenate(cut_polylines) if cut_polylines else np.zeros((0, 3)),
+            "cut_offsets": np.cumsum([0] + [len(points) for points in cut_polylines]),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Builds a truss from the arrays of to_arrays in one pass.
+
+        Unlike add_node and add_beam this trusts the stored topology: node ids
+        are row indices, beams join the nodes given in beam_nodes, and nothing
+        is searched for or merged.
+        """
+        truss = cls()
+
+        for index, position in enumerate(np.asarray(arrays["positions"], dtype=float)):
+            node = Node(index, position.copy())
+            node.has_moved = bool(arrays["has_moved"][index])
+            node.truss = truss
+            truss.nodes.append(node)
+            truss._index_node(index)
+
+        axes = np.asarray(arrays["axes"], dtype=float)
+        for row, (start_node, end_node) in enumerate(np.asarray(arrays["beam_nodes"]).tolist()):
+            beam = Beam(row, start_node, end_node, axes[row].copy(), float(arrays["heights"][row]), float(arrays["widths"][row]),
+                        bool(arrays["is_new"][row]), bool(arrays["fabricated"][row]), compute_geometry=False)
+            beam.reference_width = float(arrays["reference_widths"][row])
+
+            truss.beams.append(beam)
+            truss._beam_index[frozenset((start_node, end_node))] = beam
+            truss.nodes[start_node].add_beam(beam)
+            truss.nodes[end_node].add_beam(beam)
+
+        truss.beam_store.set_many(axes, arrays["widths"], arrays["heights"])
+        truss.beam_store.refresh()
+        for row, beam in enumerate(truss.beams):
+            beam.set_geometry(truss.beam_store, row)
+
+        cut_points, offsets = np.asarray(arrays["cut_points"], dtype=float), arrays["cut_offsets"]
+        for row, beam in enumerate(truss.beams):
+            beam.cut_polyline = cut_points[offsets[row]:offsets[row + 1]].copy()
+
+        return truss
+
+    def to_npz(self, file_path):
+        """Saves the arrays of to_arrays to a compressed .npz file."""
+        np.savez_compressed(file_path, **self.to_arrays())
+        print(f"Truss data saved to: {file_path}")
+
+    @classmethod
+    def from_npz(cls, file_path):
+        """Loads a Truss object from a .npz file written by to_npz."""
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        with np.load(file_path) as data:
+            return cls.from_arrays({name: data[name] for name in data.files})
+
+    @classmethod
+    def from_csv(cls, file_path, height=0.06, width=0.05, tolerance=1e-6, chunk_rows=None):
+        """Builds a truss from a Grasshopper state export (points and lines), see csv_io.
+
+        Points closer than tolerance become one node. The beams have the given
+        section and their uncut outline as cut outline.
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        points, lines = csv_io.read_state(file_path, chunk_rows)
+        truss = cls.from_arrays(csv_io.state_arrays(points, lines, height, width, tolerance))
+        for beam in truss.beams:
+            beam.cut_polyline = beam.uncut_polyline
+        return truss
+
+    def __repr__(self):
+        return f"Truss(Nodes={len(self.nodes)}, Beams={len(self.beams)})"
+
+
+class Beam:
+    def __init__(self, id, start_node_index, end_node_index, axis, height, width, isnew=False, fabricated=False, compute_geometry=True):
+
+        self.id = id
+        # a (2, 3) array defining the main axis of the beam
+        self.axis = np.asarray(axis, dtype=float)
+        self.start_node, self.end_node = start_node_index, end_node_index
+        self.height = height
+        self.width = width
+        self.reference_width = width
+        self.fabricated = fabricated
+        self.is_new = isnew
+
+        if compute_geometry:
+            self.update_frame()
+
+    def set_geometry(self, store, row):
+        """Takes the uncut outline, centroid and plane from a row of a BeamStore."""
+        self.uncut_polyline = store.outlines[row].copy()
+        self.centroid = store.centroids[row].copy()
+        self.xaxis = store.xaxes[row].copy()
+        self.yaxis = store.yaxes[row].copy()
+        self.plane = store.planes[row].copy()
+
+        if not self.fabricated:
+            self.cut_polyline = self.uncut_polyline
+
+    def update_frame(self):
+        """Recomputes the uncut outline, centroid and plane from the axis."""
+        self.uncut_polyline = self.get_uncut_polyline()
+        # the outline is a rectangle, so its area centroid is its vertex average
+        self.centroid = self.uncut_polyline[:-1].mean(axis=0)
+        self.xaxis = self.axis[0] - self.axis[1]
+        self.yaxis = np.cross(self.xaxis, Z_AXIS)
+        self.plane = make_plane(self.centroid, self.xaxis, self.yaxis)
+
+        if not self.fabricated:
+            self.cut_polyline = self.uncut_polyline
+
+    def get_uncut_polyline(self):
+
+        line_direction = unitize(self.axis[1] - self.axis[0])
+
+        # Create a perpendicular vector for width
+        perp = unitize(np.cross(line_direction, Z_AXIS)) * (0.5 * self.width)
+
+        # Define the corners of the rectangular profile
+        start, end = self.axis
+        return np.array([start + perp, start - perp, end - perp, end + perp, start + perp])
+
+    def cut_with_beam(self, other, type="line"):
+
+        # cut beam1
+        if self.fabricated:
+            return
+
+        trimmed = polygon.trim(self.cut_polyline, other.cut_polyline, self.axis[0], type)
+        if trimmed is not None:
+            self.cut_polyline = trimmed
+
+    def get_cut_planes(self, blade_side_A, blade_side_B):
+
+        def angle_from_center_clockwise(pt):
+            angle = math.atan2(pt[1], pt[0])
+            # Rotate reference so positive Y-axis is 0 radians
+            return (angle - math.pi / 2) % (2 * math.pi)
+
+        def angle_from_center_anticlockwise(pt):
+            angle = math.atan2(pt[1], pt[0])
+            # Rotate reference so positive Y-axis is 0 radians and reverse for CCW
+            return (2 * math.pi - (angle - math.pi / 2)) % (2 * math.pi)
+
+        def get_plane(pt1, pt2, blade_plane):
+            yaxis = pt2 - pt1
+            xaxis = np.cross(yaxis, -Z_AXIS)
+            source = make_plane(pt1, xaxis, yaxis)
+            return transform_plane(self.plane, plane_to_plane(source, blade_plane))
+
+        moved_centroid = self.centroid - 0.5 * (self.width * self.yaxis)
+        moved_ref_plane = make_plane(moved_centroid, self.xaxis, self.yaxis)
+
+        trans = plane_to_plane(moved_ref_plane, WORLD_XY)
+        points = transform_points(trans, self.cut_polyline[:-1])
+
+        positive_x = [pt for pt in points if pt[0] > 0]
+        negative_x = [pt for pt in points if pt[0] < 0]
+
+        positive_x_sorted = sorted(positive_x, key=angle_from_center_anticlockwise)
+        negative_x_sorted = sorted(negative_x, key=angle_from_center_clockwise)
+
+        inverse_trans = np.linalg.inv(trans)
+
+        self.numbersA = list(transform_points(inverse_trans, np.reshape(positive_x_sorted, (-1, 3))))
+        self.numbersB = list(transform_points(inverse_trans, np.reshape(negative_x_sorted, (-1, 3))))
+
+        in_cut_plane_side_a1 = get_plane(self.numbersA[0], self.numbersA[1], blade_side_A)
+        in_cut_plane_side_a2 = get_plane(self.numbersA[1], self.numbersA[2], blade_side_A)
+
+        in_cut_plane_side_b1 = get_plane(self.numbersB[0], self.numbersB[1], blade_side_B)
+        in_cut_plane_side_b2 = get_plane(self.numbersB[1], self.numbersB[2], blade_side_B)
+
+        return in_cut_plane_side_a1, in_cut_plane_side_a2, in_cut_plane_side_b1, in_cut_plane_side_b2
+
+    def to_dict(self):
+        """Serializes the beam into a dictionary format."""
+        return {
+            "id": self.id,
+            "start_node": self.start_node,
+            "end_node": self.end_node,
+            "axis": {
+                "from": self.axis[0].tolist(),
+                "to": self.axis[1].tolist()
+            },
+            "height": self.height,
+            "width": self.width,
+            "fabricated": self.fabricated,
+            "is_new": self.is_new,
+            "reference_width": self.reference_width,
+            "cut_polyline": self.cut_polyline.tolist()
+        }
+
+    def __repr__(self):
+        return f"Beam(ID={self.id}, Start={self.start_node}, End={self.end_node}, Fabricated={self.fabricated}, New={self.is_new})"
+
+
+class Node:
+    def __init__(self, id, position):
+
+        self.id = id
+        self.position = np.asarray(position, dtype=float)
+        self.connected_beams = []
+        self.connected_beams_ids = []
+        self.has_moved = False
+        # the truss owning this node, kept so moves update its spatial index
+        self.truss = None
+        # outline of each connected beam right after this node cut it
+        self.cut_results = None
+
+        self.helper = []
+
+    def add_beam(self, beam):
+
+        self.connected_beams.append(beam)
+        self.connected_beams_ids.append(beam.id)
+
+    def remove_beam(self, beam):
+
+        self.connected_beams.remove(beam)
+        self.connected_beams_ids.remove(beam.id)
+
+    def move_node(self, new_position):
+
+        old_position = self.position
+        new_position = np.asarray(new_position, dtype=float)
+        self.position = new_position
+        self.has_moved = True
+
+        if self.truss is not None:
+            self.truss.reindex_node(self, old_position)
+            self.truss.invalidate_node(self)
+
+        for beam in self.connected_beams:
+            if np.linalg.norm(beam.axis[0] - old_position) < 1e-6:
+                beam.axis = np.array([new_position, beam.axis[1]])
+            else:
+                beam.axis = np.array([beam.axis[0], new_position])
+
+            beam.is_new = True
+
+        # Update beam geometry
+        if self.truss is not None:
+            self.truss.update_beam_geometry(self.connected_beams)
+        else:
+            for beam in self.connected_beams:
+                beam.update_frame()
+        for beam in self.connected_beams:
+            beam.cut_polyline = beam.uncut_polyline
+
+    def orient_beam(self, beam):
+        """Makes the beam's axis start at this node and returns its direction."""
+        if np.linalg.norm(beam.axis[0] - self.position) < 1e-6:
+            direction = beam.axis[1] - self.position
+        else:
+            direction = beam.axis[0] - self.position
+
+        beam.axis = np.array([self.position, self.position + direction])
+        return direction
+
+    def organize_beams(self):
+
+        angles = []
+        for beam in self.connected_beams:
+            direction = self.orient_beam(beam)
+
+            # Calculate angle using atan2
+            angles.append(math.atan2(direction[1], direction[0]))
+
+        # Sort connected beams by angle
+        order = sorted(range(len(angles)), key=lambda i: angles[i])
+        return [self.connected_beams[i] for i in order]
+
+    def _second_closest_point(self, points):
+        """The polyline point second closest to the node, skipping the closing duplicate."""
+        ordered = sorted(points, key=lambda pt: np.linalg.norm(pt - self.position))
+        if np.linalg.norm(ordered[1] - ordered[0]) < 1e-6:
+            return ordered[2]
+        return ordered[1]
+
+    def fix_reflex_angles(self, organized_beams):
+
+        # fix those that have >180 degrees angle
+        for i, beam1 in enumerate(organized_beams):
+
+            beam2 = organized_beams[(i + 1) % len(organized_beams)]
+
+            pt_beam1 = beam1.axis[0] + 0.05 * unitize(beam1.axis[1] - beam1.axis[0])
+            dir_beam1 = pt_beam1 - self.position
+            pt_beam2 = beam2.axis[0] + 0.05 * unitize(beam2.axis[1] - beam2.axis[0])
+            dir_beam2 = pt_beam2 - self.position
+
+            if math.degrees(vector_angle(dir_beam1, dir_beam2)) > 180:
+
+                bisector_direction = (pt_beam1 + pt_beam2) / 2 - self.position
+                bisector_line = np.array([self.position, self.position - bisector_direction * 10])
+                # Find the second closest point to self.position on beam1's cut polyline
+                second_closest_point = self._second_closest_point(beam1.cut_polyline)
+
+                # Project this point along dir_beam1
+                start = second_closest_point
+                end = second_closest_point + 0.25 * unitize(dir_beam1)
+                line = np.array([start, end])
+                par = line_line_parameters(line, bisector_line)[1]
+                projected_point = start + par * (end - start)
+
+                if not beam1.fabricated:
+
+                    # Update the point's location in the polyline
+                    polyline_points = beam1.cut_polyline.copy()
+                    polyline_points[index_of(polyline_points, second_closest_point)] = projected_point
+                    beam1.cut_polyline = polygon.remove_duplicates(polyline_points)
+
+                if not beam2.fabricated:
+                    # Find the second closest point to self.position on beam2's cut polyline
+                    second_closest_point = self._second_closest_point(beam2.cut_polyline)
+
+                    # Update the point's location in the polyline
+                    polyline_points = beam2.cut_polyline.copy()
+                    polyline_points[index_of(polyline_points, second_closest_point)] = projected_point
+                    beam2.cut_polyline = polygon.remove_duplicates(polyline_points)
+
+    def fix_is_new(self, organized_beams):
+        for i, beam1 in enumerate(organized_beams):
+            if beam1.is_new and ((organized_beams[i - 1].fabricated or organized_beams[(i + 1) % len(organized_beams)].fabricated)):
+
+                beam1.cut_with_beam(organized_beams[i - 1], "pol")
+                beam1.cut_with_beam(organized_beams[(i + 1) % len(organized_beams)], "pol")
+
+    def cut_beams(self, cache=None):
+
+        organized_beams = self.organize_beams()
+
+        if cache is not None:
+            key = cache.key(self)
+            outlines = cache.get_outlines(key, self)
+            if outlines is not None:
+                for beam, outline in zip(self.connected_beams, outlines):
+                    if not beam.fabricated:
+                        beam.cut_polyline = outline
+                self.cut_results = {beam: beam.cut_polyline for beam in self.connected_beams}
+                return
+
+        for i, beam1 in enumerate(organized_beams):
+
+            beam2 = organized_beams[(i + 1) % len(organized_beams)]
+
+            # cut beam1
+            if beam2.fabricated and beam1.width > beam1.reference_width:
+                t = "pol"
+            else:
+                t = "line"
+
+            if beam2.is_new and organized_beams[(i + 2) % len(organized_beams)].fabricated:
+                beam2 = organized_beams[(i + 2) % len(organized_beams)]
+
+            beam1.cut_with_beam(beam2, t)
+
+            # cut beam2
+            if beam1.fabricated and beam2.width > beam2.reference_width:
+                t = "pol"
+            else:
+                t = "line"
+            if beam1.is_new and organized_beams[i - 1].fabricated:
+                beam1 = organized_beams[i - 1]
+            beam2.cut_with_beam(beam1, t)
+
+        self.fix_reflex_angles(organized_beams)
+        self.fix_is_new(organized_beams)
+
+        self.cut_results = {beam: beam.cut_polyline for beam in self.connected_beams}
+        if cache is not None:
+            cache.put_outlines(key, self)
+
+    def to_dict(self):
+        """Serializes the node into a dictionary format."""
+        return {
+            "id": self.id,
+            "position": self.position.tolist(),
+            "connected_beams_ids": [id for id in self.connected_beams_ids],
+            "has_moved": self.has_moved
+        }
+
+    def __repr__(self):
+        return f"Node(ID={self.id}, Position={self.position.tolist()}, connected_beams_ids={self.connected_beams_ids}, has_moved={self.has_moved})"
@@ -0,0 +1,217 @@
+"""
+Memoization of repeated joint configurations.
+
+Reclaimed-timber trusses repeat the same joint many times: the same beam
+widths and flags meeting at the same relative angles. JointPatternCache maps
+each node into a local frame (origin at the node, x axis along its first
+beam) and derives a signature that does not change under rotation about Z
+or translation. The first time a signature is cut, the part of each outline
+near the node is stored in local coordinates; later joints with the same
+signature get it transformed back onto their own beams instead of being
+trimmed again.
+
+The ends of the outlines near the node are what a joint cut changes. How
+far a cut can reach along a beam follows from where the neighbouring beams
+overlap it: two strips of half widths a and b crossing at an angle t overlap
+up to (b + a |cos t|) / sin t from the node (see _cut_reach). The near region of a joint is
+margin times the largest such reach. A joint is memoized when the part of
+each outline in that region is joined to the rest by edges parallel to the
+beam axis, and the cut leaves the rest of every outline untouched. Other
+joints are cut directly. Results agree with a direct cut up to rounding,
+although the outlines may start at a different vertex.
+"""
+
+import math
+
+import numpy as np
+
+from polygon import coordinates
+
+
+class _Joint:
+    """A node mapped into its local frame, as returned by JointPatternCache.key."""
+
+    def __init__(self, signature, origin, rotation, order, near_limit, far_chains):
+        self.signature = signature
+        self.origin = origin
+        self.rotation = rotation
+        self.order = order
+        self.near_limit = near_limit
+        self.far_chains = far_chains
+
+
+def _split_ring(points, direction, origin, near_limit):
+    """Splits a closed outline into the chain near the node and the chain away from it.
+
+    Returns (near, far) with far starting where the outline leaves the near
+    chain, or None if the near vertices are not one contiguous chain.
+    """
+    ring = points[:-1]
+    near = (ring - origin)[:, :2] @ direction[:2] < near_limit
+    if near.all() or not near.any() or np.count_nonzero(near != np.roll(near, 1)) != 2:
+        return None
+    start = int(np.nonzero(~near & np.roll(near, 1))[0][0])
+    ring = np.roll(ring, -start, axis=0)
+    count = int(np.count_nonzero(~near))
+    return ring[count:], ring[:count]
+
+
+def _cut_reach(angles, widths, pairs):
+    """Farthest distance from the node at which beams cutting each other along the (i, j) pairs overlap.
+
+    Beams leave the node, so beyond a right angle the overlap of a beam of
+    half width a is also bounded by a tan(pi - t), which vanishes for beams
+    running straight through the node.
+    """
+    reach = 0.0
+    for i, j in pairs:
+        turn = angles[j] - angles[i]
+        sine, cosine = abs(math.sin(turn)), math.cos(turn)
+        for a, b in ((0.5 * widths[i], 0.5 * widths[j]), (0.5 * widths[j], 0.5 * widths[i])):
+            if cosine < 0:
+                limit = a * sine / -cosine
+                if sine > 1e-9:
+                    limit = min(limit, (b + a * -cosine) / sine)
+            elif sine > 1e-9:
+                limit = (b + a * cosine) / sine
+            else:
+                return math.inf
+            reach = max(reach, limit)
+    return reach
+
+
+def _parallel_links(near, far, direction, tolerance):
+    """True if the edges joining the two chains run parallel to the beam axis."""
+    perp = np.array([-direction[1], direction[0]])
+    return (abs((far[-1] - near[0])[:2] @ perp) <= tolerance and
+            abs((near[-1] - far[0])[:2] @ perp) <= tolerance)
+
+
+class JointPatternCache:
+    """Cut outlines per rotation- and translation-invariant joint signature, kept in memory.
+
+    Implements the same key / get_outlines / put_outlines / flush interface as
+    cache.CutCache, so it can be passed wherever Node.cut_beams takes a cache.
+    """
+
+    def __init__(self, precision=1e-9, margin=2.0):
+
+        self.precision = precision
+        self.margin = margin
+        self._patterns = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _quantize(self, values):
+        return tuple(int(v) for v in np.round(np.asarray(values, dtype=float).ravel() / self.precision))
+
+    def key(self, node):
+        """Returns the node in its local frame, or None if the joint cannot be memoized.
+
+        Call it after Node.organize_beams, which orients the beam axes.
+        """
+        beams = node.connected_beams
+        if not beams:
+            return None
+
+        origin = coordinates(node.position)[0]
+        directions = []
+        for beam in beams:
+            axis = coordinates(beam.axis)
+            directions.append(axis[1] - axis[0])
+        lengths = [float(np.linalg.norm(d[:2])) for d in directions]
+        if min(lengths) == 0.0:
+            return None
+
+        # the order Node.organize_beams cuts in
+        angles = [math.atan2(d[1], d[0]) for d in directions]
+        order = sorted(range(len(beams)), key=lambda i: angles[i])
+
+        # Node.cut_beams cuts neighbours in that order, and the next but one where a new beam sits in between
+        count = len(order)
+        steps = (1, 2) if any(beam.is_new for beam in beams) else (1,)
+        pairs = {(order[k], order[(k + step) % count]) for k in range(count) for step in steps if count > 1}
+        pairs = [(i, j) for i, j in pairs if i != j]
+        near_limit = self.margin * _cut_reach(angles, [beam.width for beam in beams], pairs)
+        if not math.isfinite(near_limit):
+            return None
+
+        first = angles[order[0]]
+        c, s = math.cos(first), math.sin(first)
+        # maps world offsets to the local frame, whose x axis runs along the first beam
+        rotation = np.array([[c, s, 0.0], [-s, c, 0.0], [0.0, 0.0, 1.0]])
+
+        signature = [len(beams)]
+        far_chains = []
+        for i in order:
+            beam = beams[i]
+            direction = directions[i] / lengths[i]
+            chains = _split_ring(coordinates(beam.cut_polyline), direction, origin, near_limit)
+            if chains is None or not _parallel_links(chains[0], chains[1], direction, self.precision):
+                return None
+            near, far = chains
+            far_chains.append(far)
+
+            local_near = (near - origin) @ rotation.T
+            signature += self._quantize([beam.width, beam.reference_width])
+            signature += [int(beam.is_new), int(beam.fabricated), len(local_near)]
+            signature += self._quantize(direction @ rotation.T)
+            signature += self._quantize(local_near)
+
+        return _Joint(tuple(signature), origin, rotation, order, near_limit, far_chains)
+
+    def get_outlines(self, joint, node):
+        """Returns the node's cut outlines in connected beam order, or None if the pattern is unknown."""
+        if joint is None:
+            return None
+        pattern = self._patterns.get(joint.signature)
+        if pattern is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        outlines = [None] * len(node.connected_beams)
+        for k, i in enumerate(joint.order):
+            beam = node.connected_beams[i]
+            if pattern[k] is None:
+                outlines[i] = coordinates(beam.cut_polyline)
+                continue
+            near = pattern[k] @ joint.rotation + joint.origin
+            far = joint.far_chains[k]
+            outlines[i] = np.vstack([far, near, far[:1]])
+        return outlines
+
+    def put_outlines(self, joint, node):
+        """Stores the near ends of the node's cut outlines under the joint's signature.
+
+        Nothing is stored if the cut reached beyond the near ends.
+        """
+        if joint is None or joint.signature in self._patterns:
+            return
+
+        pattern = []
+        for k, i in enumerate(joint.order):
+            beam = node.connected_beams[i]
+            if beam.fabricated:
+                pattern.append(None)
+                continue
+            axis = coordinates(beam.axis)
+            direction = (axis[1] - axis[0]) / np.linalg.norm((axis[1] - axis[0])[:2])
+            chains = _split_ring(coordinates(beam.cut_polyline), direction, joint.origin, joint.near_limit)
+            if chains is None:
+                return
+            near, far = chains
+            if not np.array_equal(far, joint.far_chains[k]) or not _parallel_links(near, far, direction, self.precision):
+                return
+            pattern.append((near - joint.origin) @ joint.rotation.T)
+
+        self._patterns[joint.signature] = pattern
+
+    def flush(self):
+        """Patterns are only kept in memory, so there is nothing to write."""
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def __repr__(self):
+        return f"JointPatternCache(Patterns={len(self._patterns)}, Hits={self.hits}, Misses={self.misses})"
@@ -0,0 +1,204 @@
+"""
+Assignment of scanned wood pieces to the beams of a truss.
+
+The vision pipeline measures every piece in the yard as a WoodPiece, whose
+width is its length and whose height is its cross-section width, in cm. A
+piece can become a beam if it is at least as long as the beam's cut outline
+along the axis and at least as wide as the beam's reference width (and not
+more than max_oversize times wider). PieceMatcher pairs pieces with the
+unfabricated beams so that as little wood as possible is cut away:
+
+- pieces are kept sorted by length, so the pieces long enough for a beam
+  are found by bisection, and each beam only keeps its `candidates` least
+  wasteful pieces;
+- the resulting beam-piece graph falls apart into independent groups, and
+  each group is solved exactly with the Hungarian algorithm
+  (scipy.optimize.linear_sum_assignment), or greedily without scipy;
+- groups whose candidate edges did not change since the last solve keep
+  their previous assignment, so scanning new pieces only re-solves the
+  beams those pieces can serve.
+"""
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+from polygon import coordinates
+
+
+def beam_requirements(truss, beams=None):
+    """Returns the length along the axis of each beam's cut outline, and its reference width.
+
+    Only beams that are not fabricated yet are considered; returns the beams
+    together with two arrays of lengths and widths.
+    """
+    if beams is None:
+        beams = [beam for beam in truss.beams if not beam.fabricated]
+
+    lengths = np.zeros(len(beams))
+    for i, beam in enumerate(beams):
+        axis = coordinates(beam.axis)
+        direction = (axis[1] - axis[0]) / np.linalg.norm(axis[1] - axis[0])
+        projection = coordinates(beam.cut_polyline) @ direction
+        lengths[i] = projection.max() - projection.min()
+    widths = np.array([beam.reference_width for beam in beams], dtype=float)
+    return beams, lengths, widths
+
+
+class PieceMatcher:
+    """Pairs wood pieces with beams, minimizing the wood cut away.
+
+    Waste is the area of a piece minus the area of the beam cut from it,
+    in the units of the truss; scale converts piece dimensions to those
+    units (cm to m by default). A beam left without a piece costs
+    unassigned_cost.
+    """
+
+    def __init__(self, beams, lengths, widths, scale=0.01, max_oversize=1.5, candidates=16, unassigned_cost=1e3):
+
+        self.beams = list(beams)
+        self.lengths = np.asarray(lengths, dtype=float)
+        self.widths = np.asarray(widths, dtype=float)
+        self.scale = scale
+        self.max_oversize = max_oversize
+        self.candidates = candidates
+        self.unassigned_cost = unassigned_cost
+
+        self.pieces = []
+        self._piece_lengths = np.zeros(0)
+        self._piece_widths = np.zeros(0)
+
+        # solved groups, keyed by their candidate edges
+        self._solutions = {}
+        self.assignment = {}
+
+    @classmethod
+    def from_truss(cls, truss, **kwargs):
+        """A matcher for the unfabricated beams of a truss."""
+        return cls(*beam_requirements(truss), **kwargs)
+
+    def add_pieces(self, pieces):
+        """Adds scanned pieces; they are used by the next solve."""
+        pieces = list(pieces)
+        self.pieces += pieces
+        self._piece_lengths = np.append(self._piece_lengths, [piece.width * self.scale for piece in pieces])
+        self._piece_widths = np.append(self._piece_widths, [piece.height * self.scale for piece in pieces])
+
+    def remove_piece(self, piece):
+        """Removes a piece, e.g. once it has been picked for another use."""
+        index = self.pieces.index(piece)
+        del self.pieces[index]
+        self._piece_lengths = np.delete(self._piece_lengths, index)
+        self._piece_widths = np.delete(self._piece_widths, index)
+
+    def _waste(self, beam, pieces):
+        return (self._piece_lengths[pieces] * self._piece_widths[pieces]
+                - self.lengths[beam] * self.widths[beam])
+
+    def candidate_edges(self):
+        """Returns (beam, piece, waste) arrays of the pieces each beam may be cut from."""
+        order = np.argsort(self._piece_lengths, kind="stable")
+        sorted_lengths = self._piece_lengths[order]
+
+        beams, pieces, wastes = [], [], []
+        for beam in range(len(self.beams)):
+            # the pieces long enough for the beam
+            fitting = order[np.searchsorted(sorted_lengths, self.lengths[beam], side="left"):]
+            width = self._piece_widths[fitting]
+            fitting = fitting[(width >= self.widths[beam]) & (width <= self.widths[beam] * self.max_oversize)]
+            if len(fitting) == 0:
+                continue
+
+            waste = self._waste(beam, fitting)
+            if len(fitting) > self.candidates:
+                best = np.argpartition(waste, self.candidates)[:self.candidates]
+                fitting, waste = fitting[best], waste[best]
+
+            beams.append(np.full(len(fitting), beam))
+            pieces.append(fitting)
+            wastes.append(waste)
+
+        if not beams:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0)
+        return np.concatenate(beams), np.concatenate(pieces), np.concatenate(wastes)
+
+    def _groups(self, beams, pieces):
+        """Splits the edges into connected groups of beams and pieces (union-find)."""
+        parent = {}
+
+        def find(x):
+            while parent.setdefault(x, x) != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for beam, piece in zip(beams.tolist(), pieces.tolist()):
+            root_beam, root_piece = find(("beam", beam)), find(("piece", piece))
+            if root_beam != root_piece:
+                parent[root_piece] = root_beam
+
+        groups = {}
+        for k, beam in enumerate(beams.tolist()):
+            groups.setdefault(find(("beam", beam)), []).append(k)
+        return list(groups.values())
+
+    def _solve_group(self, beams, pieces, wastes):
+        """Optimal assignment of one group; returns {beam: piece}."""
+        rows = sorted(set(beams))
+        columns = sorted(set(pieces))
+        row_of = {beam: i for i, beam in enumerate(rows)}
+        column_of = {piece: j for j, piece in enumerate(columns)}
+
+        if not SCIPY_AVAILABLE:
+            # greedy fallback: least wasteful pairs first
+            result, used = {}, set()
+            for k in np.argsort(wastes, kind="stable"):
+                if beams[k] not in result and pieces[k] not in used:
+                    result[beams[k]] = pieces[k]
+                    used.add(pieces[k])
+            return result
+
+        # one column per piece, then one "no piece" column per beam
+        forbidden = 1e3 * self.unassigned_cost + 1e3 * max(float(np.abs(wastes).max()), 1.0)
+        cost = np.full((len(rows), len(columns) + len(rows)), forbidden)
+        cost[np.arange(len(rows)), len(columns) + np.arange(len(rows))] = self.unassigned_cost
+        for beam, piece, waste in zip(beams, pieces, wastes):
+            cost[row_of[beam], column_of[piece]] = waste
+
+        row_index, column_index = linear_sum_assignment(cost)
+        return {rows[i]: columns[j] for i, j in zip(row_index, column_index) if j < len(columns)}
+
+    def solve(self):
+        """Assigns pieces to beams and returns {beam: piece}.
+
+        Groups whose candidate edges are unchanged reuse their last solution.
+        """
+        beams, pieces, wastes = self.candidate_edges()
+
+        solutions = {}
+        self.assignment = {}
+        for group in self._groups(beams, pieces):
+            # pieces are keyed by object so that removing a piece does not invalidate other groups
+            key = frozenset((self.beams[b], id(self.pieces[p]), w) for b, p, w in zip(beams[group].tolist(), pieces[group].tolist(), wastes[group].tolist()))
+            solution = self._solutions.get(key)
+            if solution is None:
+                result = self._solve_group(beams[group].tolist(), pieces[group].tolist(), wastes[group].tolist())
+                solution = {self.beams[b]: self.pieces[p] for b, p in result.items()}
+            solutions[key] = solution
+            self.assignment.update(solution)
+
+        self._solutions = solutions
+        return self.assignment
+
+    def waste(self):
+        """Total waste of the current assignment."""
+        index = {id(piece): i for i, piece in enumerate(self.pieces)}
+        beam_index = {beam: i for i, beam in enumerate(self.beams)}
+        return float(sum(self._waste(beam_index[beam], np.array([index[id(piece)]]))[0] for beam, piece in self.assignment.items()))
+
+    def __repr__(self):
+        return f"PieceMatcher(Beams={len(self.beams)}, Pieces={len(self.pieces)}, Assigned={len(self.assignment)})"
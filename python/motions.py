@@ -0,0 +1,62 @@
+"""
+Motions of a production action list.
+
+zones, speeds and cycle_time all walk the actions of a program, given as
+production_data.Action objects or as their data dicts, and measure the
+motions among them. The helpers here read an action either way and turn
+the target of a motion into coordinates.
+"""
+
+import numpy as np
+
+
+FINE = -1
+
+MOTIONS = ("MoveToJoints", "MoveToFrame", "MoveToRobtarget")
+# actions the robot can run while moving; any other action needs it to stand still
+PASSTHROUGH = ("PrintText", "SetTool", "SetWorkObject", "CustomInstruction")
+
+
+def action_name(action):
+    return action["name"] if isinstance(action, dict) else action.name
+
+
+def action_parameters(action):
+    return action["parameters"] if isinstance(action, dict) else action.parameters
+
+
+def is_linear(action):
+    return "LINEAR" in str(action_parameters(action).get("motion_type", "")).upper()
+
+
+def is_linear_frame(action):
+    """True for linear MoveToFrame motions."""
+    return action_name(action) == "MoveToFrame" and is_linear(action)
+
+
+def target_frame(action):
+    """The frame of a Cartesian target, a compas Frame or its data dict."""
+    parameters = action_parameters(action)
+    frame = parameters.get("frame", parameters.get("target"))
+    if isinstance(frame, dict):
+        frame = frame.get("value", frame)
+    return frame
+
+
+def motion_target(action, reach, forward_kinematics=None):
+    """The target of a motion as (kind, coordinates): mm for frames, rad * reach for joints.
+
+    With forward_kinematics(joints in degrees) returning the TCP point in
+    mm, joint targets are measured in mm as well, but as kind "tcp": the
+    forward kinematics point is in the frame of the robot model, while
+    frame targets are in the robot base frame (t0cf), so the two are not
+    compared.
+    """
+    parameters = action_parameters(action)
+    if action_name(action) == "MoveToJoints":
+        if forward_kinematics is not None:
+            return "tcp", np.asarray(forward_kinematics(parameters["joints"]), dtype=float)
+        return "joints", np.radians(np.asarray(parameters["joints"], dtype=float)) * reach
+    frame = target_frame(action)
+    point = frame["point"] if isinstance(frame, dict) else frame.point
+    return "frame", np.asarray(point, dtype=float)
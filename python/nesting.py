@@ -0,0 +1,256 @@
+"""
+Nesting of several beams into each reclaimed piece.
+
+A scanned WoodPiece is often long enough for more than one truss member.
+The beams to cut are one-dimensional items: the extent of their cut outline
+along the axis plus one saw kerf, and they fit a piece if its cross-section
+is at least their reference width (and at most max_oversize times wider).
+nest packs them into as little stock length as possible:
+
+- the default is first-fit decreasing, followed by a local improvement that
+  empties the least filled pieces into the others and swaps every used piece
+  for the shortest unused piece its beams still fit in;
+- exact=True runs a branch and bound over the same choices, seeded with the
+  heuristic solution, for batches of up to exact_limit beams. The search
+  stops after exact_nodes branches and keeps the best packing found so
+  far, which is never worse than the heuristic one.
+"""
+
+import numpy as np
+
+from matching import beam_requirements
+
+
+class Nesting:
+    """Beams packed into pieces.
+
+    layouts maps each used piece index to the indices of its beams, in
+    cutting order; offsets gives the start of each beam along its piece.
+    unplaced lists the beams no piece could hold.
+    """
+
+    def __init__(self, layouts, unplaced, lengths, piece_lengths, kerf):
+
+        self.layouts = {piece: list(beams) for piece, beams in layouts.items() if beams}
+        self.unplaced = sorted(unplaced)
+        self.lengths = lengths
+        self.piece_lengths = piece_lengths
+        self.kerf = kerf
+
+    @property
+    def used_length(self):
+        return float(sum(self.piece_lengths[piece] for piece in self.layouts))
+
+    @property
+    def material_yield(self):
+        """Share of the used stock length that ends up in beams."""
+        used = self.used_length
+        placed = sum(self.lengths[beam] for beams in self.layouts.values() for beam in beams)
+        return float(placed / used) if used else 0.0
+
+    def offsets(self):
+        """Returns {beam: (piece, offset)}, cutting the beams of a piece one after the other."""
+        result = {}
+        for piece, beams in self.layouts.items():
+            offset = 0.0
+            for beam in beams:
+                result[beam] = (piece, offset)
+                offset += self.lengths[beam] + self.kerf
+        return result
+
+    def __repr__(self):
+        return f"Nesting(Pieces={len(self.layouts)}, Unplaced={len(self.unplaced)}, Yield={self.material_yield:.3f})"
+
+
+def _compatible(widths, piece_widths, max_oversize):
+    """(n_beams, n_pieces) mask of the pieces each beam's section can be cut from."""
+    return (piece_widths[None] >= widths[:, None]) & (piece_widths[None] <= widths[:, None] * max_oversize)
+
+
+def first_fit_decreasing(needs, piece_lengths, compatible):
+    """Places the longest beams first, in the first opened piece with room left,
+    or else in the shortest unused piece that holds them.
+
+    Returns (layouts, unplaced) as lists of beam indices per piece and of beams.
+    """
+    remaining = np.array(piece_lengths, dtype=float)
+    opened = np.full(len(remaining), np.inf)
+    layouts = [[] for _ in remaining]
+    unplaced = []
+
+    for beam in np.argsort(-needs, kind="stable"):
+        fits = compatible[beam] & (remaining >= needs[beam])
+        if not fits.any():
+            unplaced.append(int(beam))
+            continue
+        in_open = fits & np.isfinite(opened)
+        if in_open.any():
+            piece = int(np.argmin(np.where(in_open, opened, np.inf)))
+        else:
+            piece = int(np.argmin(np.where(fits, remaining, np.inf)))
+            opened[piece] = np.count_nonzero(np.isfinite(opened))
+        layouts[piece].append(int(beam))
+        remaining[piece] -= needs[beam]
+
+    return layouts, unplaced
+
+
+def improve(layouts, needs, piece_lengths, compatible):
+    """Local improvement of a packing, in place.
+
+    Repeatedly moves all the beams of the least filled piece into the room
+    left in other used pieces, then swaps every used piece for the shortest
+    unused compatible piece still holding its beams.
+    """
+    piece_lengths = np.asarray(piece_lengths, dtype=float)
+
+    def load(piece):
+        return sum(needs[beam] for beam in layouts[piece])
+
+    changed = True
+    while changed:
+        changed = False
+        used = [piece for piece in range(len(layouts)) if layouts[piece]]
+        remaining = {piece: piece_lengths[piece] - load(piece) for piece in used}
+
+        for source in sorted(used, key=lambda piece: load(piece) / piece_lengths[piece]):
+            moves = {}
+            room = dict(remaining)
+            del room[source]
+            for beam in sorted(layouts[source], key=lambda beam: -needs[beam]):
+                target = next((piece for piece in room if compatible[beam, piece] and room[piece] >= needs[beam]), None)
+                if target is None:
+                    break
+                moves[beam] = target
+                room[target] -= needs[beam]
+            if len(moves) == len(layouts[source]):
+                for beam, target in moves.items():
+                    layouts[target].append(beam)
+                layouts[source] = []
+                changed = True
+                break
+
+    # shortest stock that still holds each used piece's beams
+    free = np.array([not beams for beams in layouts])
+    for piece in sorted((piece for piece in range(len(layouts)) if layouts[piece]), key=lambda piece: -piece_lengths[piece]):
+        beams = layouts[piece]
+        fits = free & compatible[beams].all(axis=0) & (piece_lengths >= load(piece)) & (piece_lengths < piece_lengths[piece])
+        if fits.any():
+            target = int(np.argmin(np.where(fits, piece_lengths, np.inf)))
+            layouts[target], layouts[piece] = beams, []
+            free[target], free[piece] = False, True
+
+    return layouts
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+def exact(needs, piece_lengths, compatible, layouts=None, unplaced_cost=None, max_nodes=None):
+    """Branch and bound packing minimizing the used stock length, with unplaced_cost per unplaced beam.
+
+    layouts is an optional starting solution giving the first upper bound.
+    Unused pieces of the same length and width class are interchangeable,
+    so only one of each is tried when opening a piece. With max_nodes, the
+    search gives up after that many branches and returns the best packing
+    found so far (the starting one if nothing better was found).
+    """
+    piece_lengths = np.asarray(piece_lengths, dtype=float)
+    if unplaced_cost is None:
+        unplaced_cost = 1.0 + float(piece_lengths.sum())
+
+    order = [int(beam) for beam in np.argsort(-needs, kind="stable")]
+    classes = {}
+    for piece in range(len(piece_lengths)):
+        classes.setdefault((piece_lengths[piece], compatible[:, piece].tobytes()), []).append(piece)
+
+    def cost(layout):
+        placed = {beam for beams in layout for beam in beams}
+        return (sum(piece_lengths[piece] for piece, beams in enumerate(layout) if beams)
+                + unplaced_cost * (len(needs) - len(placed)))
+
+    best_layout = [list(beams) for beams in layouts] if layouts is not None else [[] for _ in piece_lengths]
+    best = [cost(best_layout), best_layout]
+
+    current = [[] for _ in piece_lengths]
+    remaining = piece_lengths.copy()
+    nodes = [0]
+
+    def search(k, used, skipped):
+        nodes[0] += 1
+        if max_nodes is not None and nodes[0] > max_nodes:
+            raise _BudgetExceeded
+        if used + unplaced_cost * skipped >= best[0] - 1e-12:
+            return
+        if k == len(order):
+            best[0], best[1] = used + unplaced_cost * skipped, [list(beams) for beams in current]
+            return
+
+        beam = order[k]
+        candidates = [piece for piece in range(len(current)) if current[piece]]
+        for members in classes.values():
+            fresh = next((piece for piece in members if not current[piece]), None)
+            if fresh is not None:
+                candidates.append(fresh)
+
+        for piece in candidates:
+            if not compatible[beam, piece] or remaining[piece] < needs[beam]:
+                continue
+            opening = not current[piece]
+            current[piece].append(beam)
+            remaining[piece] -= needs[beam]
+            search(k + 1, used + (piece_lengths[piece] if opening else 0.0), skipped)
+            remaining[piece] += needs[beam]
+            current[piece].pop()
+
+        search(k + 1, used, skipped + 1)
+
+    try:
+        search(0, 0.0, 0)
+    except _BudgetExceeded:
+        pass
+    return best[1]
+
+
+def nest(lengths, widths, piece_lengths, piece_widths, kerf=0.004, max_oversize=1.5, exact_mode=False, exact_limit=12, exact_nodes=100000):
+    """Packs beams of the given lengths and widths into pieces; returns a Nesting.
+
+    Every beam takes its length plus one kerf of stock. The exact mode is
+    only used when there are at most exact_limit beams, and explores at most
+    exact_nodes branches before settling for the best packing found.
+    """
+    lengths = np.asarray(lengths, dtype=float)
+    widths = np.asarray(widths, dtype=float)
+    piece_lengths = np.asarray(piece_lengths, dtype=float)
+    piece_widths = np.asarray(piece_widths, dtype=float)
+
+    needs = lengths + kerf
+    compatible = _compatible(widths, piece_widths, max_oversize)
+
+    layouts, _ = first_fit_decreasing(needs, piece_lengths, compatible)
+    layouts = improve(layouts, needs, piece_lengths, compatible)
+    if exact_mode and len(lengths) <= exact_limit:
+        layouts = exact(needs, piece_lengths, compatible, layouts, max_nodes=exact_nodes)
+
+    placed = {beam for beams in layouts for beam in beams}
+    unplaced = [beam for beam in range(len(lengths)) if beam not in placed]
+    return Nesting(dict(enumerate(layouts)), unplaced, lengths, piece_lengths, kerf)
+
+
+def nest_beams(truss, pieces, kerf=0.004, scale=0.01, beams=None, **kwargs):
+    """Nests the unfabricated beams of a truss into WoodPieces.
+
+    Piece dimensions are converted to truss units with scale (cm to m by
+    default). Returns {piece: [beams]} in cutting order, the unplaced beams
+    and the Nesting itself.
+    """
+    beams, lengths, widths = beam_requirements(truss, beams)
+    pieces = list(pieces)
+    nesting = nest(lengths, widths,
+                   [piece.width * scale for piece in pieces],
+                   [piece.height * scale for piece in pieces],
+                   kerf, **kwargs)
+
+    layouts = {pieces[piece]: [beams[beam] for beam in members] for piece, members in nesting.layouts.items()}
+    return layouts, [beams[beam] for beam in nesting.unplaced], nesting
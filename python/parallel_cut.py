@@ -0,0 +1,98 @@
+"""
+Cutting the nodes of a truss in parallel.
+
+Node.cut_beams only touches the beams meeting at that node, so nodes that do
+not share a beam can be cut at the same time. Where a beam is cut at both
+ends, the order of the two cuts can change its outline, so colour_nodes
+groups the nodes into classes ordered so that every beam is still cut at its
+lower index node first, which keeps the result identical to the serial loop
+in Truss.cut_all_beams.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+
+def colour_nodes(truss):
+    """Returns lists of node indices; nodes in the same list share no beam.
+
+    A node gets the class after the latest class of its lower index
+    neighbours, so running the classes one after the other cuts each beam
+    in the same order as the serial loop.
+    """
+    colours = []
+    for index, node in enumerate(truss.nodes):
+        colour = 0
+        for beam in node.connected_beams:
+            other = beam.end_node if beam.start_node == index else beam.start_node
+            if other < index:
+                colour = max(colour, colours[other] + 1)
+        colours.append(colour)
+
+    classes = [[] for _ in range(max(colours, default=-1) + 1)]
+    for index, colour in enumerate(colours):
+        classes[colour].append(index)
+    return classes
+
+
+def _cut_node(node, cache=None):
+    node.cut_beams(cache)
+    return node
+
+
+def _cut_node_copy(node_type, id, position, beams):
+    """Cuts a detached copy of a node in a worker process and returns the new beam state."""
+    node = node_type(id, position)
+    for beam in beams:
+        node.add_beam(beam)
+    node.cut_beams()
+    return [(beam.cut_polyline, beam.axis) for beam in beams]
+
+
+def cut_nodes(truss, executor, cache=None):
+    """Runs Node.cut_beams on every node of the truss, one colour class at a time.
+
+    With a thread pool the nodes are cut in place. With a process pool each
+    node is sent with copies of its beams and the resulting outlines and
+    axes are copied back; this needs picklable geometry, i.e. geometry_np.
+    Results are merged in node order, so the outcome does not depend on the
+    order in which workers finish. A cut cache is only read and written in
+    this process: nodes found in it are not sent to the workers.
+    """
+    processes = isinstance(executor, ProcessPoolExecutor)
+
+    for indices in colour_nodes(truss):
+        nodes = [truss.nodes[i] for i in indices]
+
+        if not processes:
+            list(executor.map(_cut_node, nodes, [cache] * len(nodes)))
+            continue
+
+        keys = {}
+        if cache is not None:
+            missing = []
+            for node in nodes:
+                # orients the beam axes the way the cut will, which the key depends on
+                node.organize_beams()
+                key = cache.key(node)
+                outlines = cache.get_outlines(key, node)
+                if outlines is None:
+                    keys[node] = key
+                    missing.append(node)
+                    continue
+                for beam, outline in zip(node.connected_beams, outlines):
+                    if not beam.fabricated:
+                        beam.cut_polyline = outline
+                node.cut_results = {beam: beam.cut_polyline for beam in node.connected_beams}
+            nodes = missing
+
+        futures = [
+            executor.submit(_cut_node_copy, type(node), node.id, node.position, node.connected_beams)
+            for node in nodes
+        ]
+        for node, future in zip(nodes, futures):
+            for beam, (cut_polyline, axis) in zip(node.connected_beams, future.result()):
+                beam.cut_polyline = cut_polyline
+                beam.axis = axis
+            node.cut_results = {beam: beam.cut_polyline for beam in node.connected_beams}
+            if cache is not None:
+                cache.put_outlines(keys[node], node)
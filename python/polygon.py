@@ -0,0 +1,434 @@
+"""
+Polyline helpers working on (n, 3) float arrays.
+
+A closed polyline repeats its first point at the end, like the point lists
+returned by Rhino's Polyline. Intersections are computed in the XY plane,
+which is the plane the trusses are drawn in; Z is carried along.
+"""
+
+import numpy as np
+
+
+def is_closed(points, tolerance=1e-12):
+    """Returns True if the polyline ends where it starts."""
+    return len(points) > 2 and np.linalg.norm(points[0] - points[-1]) <= tolerance
+
+
+def remove_duplicates(points, tolerance=1e-12):
+    """Drops consecutive repeated points, like Rhino does when building a polyline curve."""
+    points = np.asarray(points, dtype=float)
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = np.linalg.norm(np.diff(points, axis=0), axis=1) > tolerance
+    return points[keep]
+
+
+def length(points):
+    """Returns the total length of a polyline."""
+    return float(np.linalg.norm(np.diff(points, axis=0), axis=1).sum())
+
+
+def point_at(points, parameter):
+    """Returns the point at a polyline parameter (segment index + fraction)."""
+    i = min(int(np.floor(parameter)), len(points) - 2)
+    t = parameter - i
+    return points[i] + t * (points[i + 1] - points[i])
+
+
+def to_array(points):
+    """Returns polyline points as an (n, 3) float array.
+
+    Accepts arrays, lists of coordinates, and Rhino polyline curves or point
+    lists, so both geometry backends can hand their outlines over.
+    """
+    if hasattr(points, "ToPolyline"):
+        points = points.ToPolyline()
+    if len(points) and hasattr(points[0], "X"):
+        return np.array([[p.X, p.Y, p.Z] for p in points], dtype=float)
+    return np.asarray(points, dtype=float)
+
+
+def coordinates(value):
+    """Returns a point, line or polyline of either geometry backend as an (n, 3) float array."""
+    if hasattr(value, "From"):
+        value = [value.From, value.To]
+    elif hasattr(value, "X"):
+        value = [value]
+    return to_array(value).reshape(-1, 3)
+
+
+def intersections(a, b, tolerance=1e-6):
+    """Returns (point, parameter on a, parameter on b) where polylines a and b meet.
+
+    Crossing and touching segments give one point each. Collinear overlapping
+    segments give a single point at the start of the overlap along a, and
+    swallow the touching points at their ends, as Rhino's overlap events do.
+    Points closer than the tolerance are merged, so a hit on a shared vertex
+    is reported once. Parameters are segment index + fraction.
+    """
+    a0, a1 = a[:-1], a[1:]
+    b0, b1 = b[:-1], b[1:]
+    da = (a1 - a0)[:, None, :2]
+    db = (b1 - b0)[None, :, :2]
+    r = (b0[None, :, :2] - a0[:, None, :2])
+
+    denom = da[..., 0] * db[..., 1] - da[..., 1] * db[..., 0]
+    cross_r_db = r[..., 0] * db[..., 1] - r[..., 1] * db[..., 0]
+    cross_r_da = r[..., 0] * da[..., 1] - r[..., 1] * da[..., 0]
+
+    len_a = np.linalg.norm(da, axis=2)
+    len_b = np.linalg.norm(db, axis=2)
+    len_a[len_a == 0] = np.inf
+    len_b[len_b == 0] = np.inf
+    tol_a = np.broadcast_to(tolerance / len_a, denom.shape)
+    tol_b = np.broadcast_to(tolerance / len_b, denom.shape)
+
+    parallel = np.abs(denom) <= 1e-15 * len_a * len_b
+    safe = np.where(parallel, 1.0, denom)
+    t = cross_r_db / safe
+    u = cross_r_da / safe
+
+    # segments of b whose both ends lie within tolerance of the line through a segment of a
+    cross_r1_da = (b1[None, :, :2] - a0[:, None, :2])
+    cross_r1_da = cross_r1_da[..., 0] * da[..., 1] - cross_r1_da[..., 1] * da[..., 0]
+    collinear = (np.abs(cross_r_da) <= tolerance * len_a) & (np.abs(cross_r1_da) <= tolerance * len_a)
+
+    # collinear overlaps count as a single event at the start of the overlap along a
+    overlaps = []
+    events = []
+    for i, j in zip(*np.nonzero(collinear)):
+        direction = a1[i] - a0[i]
+        other = b1[j] - b0[j]
+        sq_length = float(direction[:2] @ direction[:2])
+        sq_other = float(other[:2] @ other[:2])
+        if sq_length == 0 or sq_other == 0:
+            continue
+        s0 = float((b0[j] - a0[i])[:2] @ direction[:2]) / sq_length
+        s1 = float((b1[j] - a0[i])[:2] @ direction[:2]) / sq_length
+        start, end = max(0.0, min(s0, s1)), min(1.0, max(s0, s1))
+        if end - start > tol_a[i, j]:
+            point = a0[i] + start * direction
+            overlaps.append((point, a0[i] + end * direction))
+            u_start = min(1.0, max(0.0, float((point - b0[j])[:2] @ other[:2]) / sq_other))
+            events.append((point, i + start, j + u_start))
+
+    def on_overlap(point):
+        for start, end in overlaps:
+            direction = end - start
+            t = np.clip((point - start)[:2] @ direction[:2] / (direction[:2] @ direction[:2]), 0.0, 1.0)
+            if np.linalg.norm(point - (start + t * direction)) < tolerance:
+                return True
+        return False
+
+    hits = ~parallel & ~collinear & (t >= -tol_a) & (t <= 1 + tol_a) & (u >= -tol_b) & (u <= 1 + tol_b)
+    for i, j in zip(*np.nonzero(hits)):
+        ti = min(1.0, max(0.0, float(t[i, j])))
+        uj = min(1.0, max(0.0, float(u[i, j])))
+        point = a0[i] + ti * (a1[i] - a0[i])
+        if not on_overlap(point):
+            events.append((point, i + ti, j + uj))
+
+    unique = []
+    for event in events:
+        if all(np.linalg.norm(event[0] - other[0]) >= tolerance for other in unique):
+            unique.append(event)
+    return unique
+
+
+def split(points, parameters):
+    """Splits a polyline at the given parameters.
+
+    A closed polyline is split into as many pieces as there are distinct
+    parameters, the first piece starting at the smallest parameter; an open
+    polyline also keeps the pieces before the first and after the last one.
+    """
+    n = len(points) - 1
+    closed = is_closed(points)
+    # parameters a rounding error away from a vertex split at the vertex
+    parameters = [float(round(p)) if abs(p - round(p)) < 1e-9 else float(p) for p in parameters]
+    if closed:
+        parameters = [p % n for p in parameters]
+    parameters = sorted(set(float(p) for p in parameters))
+
+    def piece(t0, t1):
+        # vertices strictly between the two parameters, on the way from t0 to t1
+        if t1 > t0:
+            inner = [points[k] for k in range(n + 1) if t0 < k < t1]
+        else:
+            inner = [points[k] for k in range(1, n) if k > t0]
+            inner += [points[k] for k in range(n) if k < t1]
+        return np.array([point_at(points, t0)] + inner + [point_at(points, t1)])
+
+    if closed:
+        if len(parameters) < 2:
+            return [points.copy()]
+        return [piece(t0, t1) for t0, t1 in zip(parameters, parameters[1:] + parameters[:1])]
+
+    bounds = [0.0] + [t for t in parameters if 0.0 < t < n] + [float(n)]
+    return [piece(t0, t1) for t0, t1 in zip(bounds[:-1], bounds[1:])]
+
+
+def trim(outline, other, reference, mode="line", tolerance=1e-6):
+    """Trims a closed outline where it crosses another one.
+
+    The outline is cut between the crossing points farthest from and nearest
+    to the reference point, and the longer side is kept. In "pol" mode, when
+    the shorter side of the other outline between the same points turns
+    around a single corner, that corner is added to the result. Returns the
+    new closed outline, or None if the outlines meet in fewer than two points.
+    """
+    events = intersections(outline, other, tolerance)
+    if len(events) < 2:
+        return None
+
+    distances = [np.linalg.norm(point - reference) for point, _, _ in events]
+    order = sorted(range(len(events)), key=lambda k: distances[k], reverse=True)
+    cutting = [events[order[0]], events[order[-1]]]
+
+    pieces = split(outline, [ta for _, ta, _ in cutting])
+    if length(pieces[0]) > length(pieces[1]):
+        new_points = list(pieces[0])
+    else:
+        new_points = list(pieces[1])
+
+    if mode == "pol":
+        other_pieces = split(other, [tb for _, _, tb in cutting])
+        if len(other_pieces) > 1:
+            # the shorter side of the other outline
+            if length(other_pieces[0]) < length(other_pieces[1]):
+                other_points = other_pieces[0]
+            else:
+                other_points = other_pieces[1]
+            if len(other_points) == 3:
+                new_points.append(other_points[1])
+
+    # close the outline
+    new_points.append(new_points[0])
+    return remove_duplicates(new_points)
+
+
+def pad(polylines, closed=True):
+    """Stacks XY polylines of different lengths into one (n, k, 2) array.
+
+    Closed polylines lose their closing point. Short rows repeat their last
+    point, which only adds zero-length edges. Returns the array and the
+    number of real points per row.
+    """
+    arrays = [np.asarray(p, dtype=float)[:-1 if closed else None, :2] for p in polylines]
+    sizes = np.array([len(a) for a in arrays], dtype=int)
+    if not arrays:
+        return np.zeros((0, 0, 2)), sizes
+    points = np.concatenate(arrays)
+    starts = np.cumsum(sizes) - sizes
+    index = np.minimum(np.arange(sizes.max()), (sizes - 1)[:, None]) + starts[:, None]
+    return points[index], sizes
+
+
+def convex_hull(points):
+    """Returns the closed anticlockwise XY convex hull of a polyline's points (monotone chain)."""
+    unique = sorted(set(map(tuple, np.asarray(points, dtype=float)[:, :3].tolist())))
+    if len(unique) < 3:
+        return np.array(unique + unique[:1])
+
+    def half(ordered):
+        chain = []
+        for p in ordered:
+            while len(chain) >= 2 and ((chain[-1][0] - chain[-2][0]) * (p[1] - chain[-2][1]) -
+                                       (chain[-1][1] - chain[-2][1]) * (p[0] - chain[-2][0])) <= 0:
+                chain.pop()
+            chain.append(p)
+        return chain
+
+    lower, upper = half(unique), half(unique[::-1])
+    hull = lower[:-1] + upper[:-1]
+    return np.array(hull + hull[:1])
+
+
+def _edges(points, sizes):
+    """Edge vectors of padded closed polylines, the last real point joining the first."""
+    rows = np.arange(len(points))
+    edges = np.roll(points, -1, axis=1) - points
+    edges[rows, sizes - 1] = points[:, 0] - points[rows, sizes - 1]
+    edges[np.arange(points.shape[1]) >= sizes[:, None]] = 0.0
+    return edges
+
+
+def _pad_pairs(a_list, b_list, pairs):
+    """Pads two lists of closed polylines and lines them up by the (m, 2) index pairs, if given."""
+    a, a_sizes = pad(a_list)
+    b, b_sizes = pad(b_list)
+    if pairs is not None:
+        pairs = np.asarray(pairs, dtype=int).reshape(-1, 2)
+        a, a_sizes = a[pairs[:, 0]], a_sizes[pairs[:, 0]]
+        b, b_sizes = b[pairs[:, 1]], b_sizes[pairs[:, 1]]
+    return a, a_sizes, b, b_sizes
+
+
+def separated(a_list, b_list, tolerance=1e-9, pairs=None):
+    """Returns, for each pair of closed convex polylines, True if they overlap by less than the tolerance.
+
+    Separating axis test in XY over the edge normals of both polylines. The
+    lists are compared item by item, or along the (m, 2) index pairs if given.
+    """
+    if len(a_list) == 0 or (pairs is not None and len(pairs) == 0):
+        return np.zeros(0, dtype=bool)
+
+    def normals(points, sizes):
+        edges = _edges(points, sizes)
+        normals = np.stack([-edges[..., 1], edges[..., 0]], axis=-1)
+        lengths = np.linalg.norm(normals, axis=-1, keepdims=True)
+        return np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+    a, a_sizes, b, b_sizes = _pad_pairs(a_list, b_list, pairs)
+    axes = np.concatenate([normals(a, a_sizes), normals(b, b_sizes)], axis=1)
+
+    projected_a = axes @ a.transpose(0, 2, 1)
+    projected_b = axes @ b.transpose(0, 2, 1)
+    gap = np.maximum(projected_b.min(axis=2) - projected_a.max(axis=2), projected_a.min(axis=2) - projected_b.max(axis=2))
+    usable = np.any(axes != 0, axis=2)
+    return np.any(usable & (gap >= -tolerance), axis=1)
+
+
+def signed_area(points):
+    """Returns the signed XY area of a closed polyline, positive when anticlockwise."""
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * float(np.sum(x[:-1] * y[1:] - x[1:] * y[:-1]))
+
+
+def are_convex(polylines, tolerance=1e-12):
+    """Returns, for each closed polyline, True if it turns the same way at every vertex (straight runs allowed)."""
+    if len(polylines) == 0:
+        return np.zeros(0, dtype=bool)
+    points, sizes = pad(polylines)
+    edges = _edges(points, sizes)
+    # turn from each edge to the next, the last real edge turning into the first
+    following = np.roll(edges, -1, axis=1)
+    following[np.arange(len(points)), sizes - 1] = edges[:, 0]
+    turns = edges[..., 0] * following[..., 1] - edges[..., 1] * following[..., 0]
+    return np.all(turns >= -tolerance, axis=1) | np.all(turns <= tolerance, axis=1)
+
+
+def convex_pieces(points, convex=None, tolerance=1e-12):
+    """Splits a closed polyline into closed anticlockwise convex pieces.
+
+    A convex outline is returned as is; others are cut into triangles by
+    ear clipping. Pass convex if it is already known whether the outline is.
+    """
+    if signed_area(points) < 0:
+        points = points[::-1]
+    if convex is None:
+        convex = are_convex([points], tolerance)[0]
+    if convex:
+        return [points]
+
+    ring = [p for p in points[:-1]]
+    triangles = []
+
+    def cross(a, b, c):
+        return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+    def inside(p, a, b, c):
+        return cross(a, b, p) >= -tolerance and cross(b, c, p) >= -tolerance and cross(c, a, p) >= -tolerance
+
+    while len(ring) > 3:
+        n = len(ring)
+        for i in range(n):
+            a, b, c = ring[i - 1], ring[i], ring[(i + 1) % n]
+            turn = cross(a, b, c)
+            if abs(turn) <= tolerance:
+                # a straight (or folded back) vertex adds no area
+                del ring[i]
+                break
+            if turn > 0 and not any(inside(p, a, b, c) for k, p in enumerate(ring) if k not in ((i - 1) % n, i, (i + 1) % n)):
+                triangles.append(np.array([a, b, c, a]))
+                del ring[i]
+                break
+        else:
+            # no ear left, which only happens for self-intersecting outlines
+            break
+    if len(ring) == 3 and abs(cross(*ring)) > tolerance:
+        triangles.append(np.array(ring + ring[:1]))
+    return triangles
+
+
+def intersection_areas(subjects, clips, pairs=None):
+    """Returns the XY area shared by each subject polygon and convex clip polygon.
+
+    subjects and clips are lists of closed polylines, compared item by item
+    or along the (m, 2) index pairs if given; every clip has to be convex and
+    anticlockwise (see convex_pieces). The pairs are clipped together with
+    Sutherland-Hodgman, one clip edge at a time.
+    """
+    if len(subjects) == 0 or (pairs is not None and len(pairs) == 0):
+        return np.zeros(0)
+
+    polygon, sizes, clip, clip_sizes = _pad_pairs(subjects, clips, pairs)
+    count = len(polygon)
+    rows = np.arange(count)
+
+    for k in range(clip.shape[1]):
+        active = k < clip_sizes
+        start = clip[:, k]
+        edge = clip[rows, (k + 1) % clip_sizes] - start
+
+        width = polygon.shape[1]
+        real = np.arange(width) < sizes[:, None]
+        current = polygon
+        previous = polygon[rows[:, None], (np.arange(width) - 1) % np.maximum(sizes, 1)[:, None]]
+
+        def side(points):
+            offset = points - start[:, None]
+            return edge[:, None, 0] * offset[..., 1] - edge[:, None, 1] * offset[..., 0]
+
+        side_current, side_previous = side(current), side(previous)
+        inside_current = side_current >= 0
+        inside_previous = side_previous >= 0
+
+        denom = side_previous - side_current
+        t = np.divide(side_previous, denom, out=np.zeros_like(denom), where=denom != 0)
+        crossing = previous + t[..., None] * (current - previous)
+
+        # every vertex emits the crossing into or out of the half plane, then itself if inside
+        emitted = np.stack([crossing, current], axis=2).reshape(count, 2 * width, 2)
+        keep = np.stack([real & (inside_current != inside_previous), real & inside_current], axis=2)
+        # pairs whose clip has fewer edges keep their polygon
+        keep[~active, :, 0] = False
+        keep[~active, :, 1] = real[~active]
+        keep = keep.reshape(count, 2 * width)
+
+        # move the kept points to the front of each row, in order
+        positions = np.cumsum(keep, axis=1) - 1
+        sizes = keep.sum(axis=1)
+        polygon = np.zeros((count, max(int(sizes.max()), 1), 2))
+        polygon[np.nonzero(keep)[0], positions[keep]] = emitted[keep]
+
+    real = np.arange(polygon.shape[1]) < sizes[:, None]
+    following = polygon[rows[:, None], (np.arange(polygon.shape[1]) + 1) % np.maximum(sizes, 1)[:, None]]
+    terms = polygon[..., 0] * following[..., 1] - following[..., 0] * polygon[..., 1]
+    return 0.5 * np.abs(np.where(real, terms, 0.0).sum(axis=1))
+
+
+def distances(a_list, b_list):
+    """Returns the smallest XY distance between each pair of closed polylines (0 where they cross)."""
+    if len(a_list) == 0:
+        return np.zeros(0)
+
+    a, _ = pad(a_list, closed=False)
+    b, _ = pad(b_list, closed=False)
+
+    def point_segment(points, polylines):
+        start, end = polylines[:, None, :-1], polylines[:, None, 1:]
+        segment = end - start
+        length = np.einsum("...i,...i->...", segment, segment)
+        offset = points[:, :, None] - start
+        projection = np.einsum("...i,...i->...", offset, segment)
+        length = np.broadcast_to(length, projection.shape)
+        t = np.clip(np.divide(projection, length, out=np.zeros_like(projection), where=length > 0), 0.0, 1.0)
+        return np.linalg.norm(offset - t[..., None] * segment, axis=-1).min(axis=(1, 2))
+
+    result = np.minimum(point_segment(a, b), point_segment(b, a))
+
+    # apart at the vertices, but crossing in between
+    for i in np.nonzero(result > 0)[0]:
+        if intersections(np.asarray(a_list[i], dtype=float), np.asarray(b_list[i], dtype=float)):
+            result[i] = 0.0
+    return result
@@ -1,13 +1,18 @@
 import compas_rrc as rrc
-from compas.geometry import Scale, Frame
+from compas.geometry import Scale, Frame, transform_points
 import math
 from compas_rhino.geometry import RhinoMesh
-from compas_fab.robots import AttachedCollisionMesh, CollisionMesh
+from compas_fab.robots import AttachedCollisionMesh, CollisionMesh, JointTrajectory
 from compas_ghpython import draw_frame
 from compas_rhino.conversions import plane_to_compas_frame
 import Rhino.Geometry as rg
 import uuid
+import numpy as np
 from production_data import Action
+from cache import data_hash
+from trajectory import joint_columns, simplify
+import zones
+import speeds
 
 def generate_default_tolerances(joints):
     DEFAULT_TOLERANCE_METERS = .001
@@ -21,19 +26,75 @@ def generate_default_tolerances(joints):
 
 
 class TFTProcess(object):
-    def __init__(self, robot, TRANSFORM_ROBOT_A_TO_ROBOT_B = rg.Transform(), TRANSFORM_ROBOT_B_TO_ROBOT_A = rg.Transform(), speed = 100):
+    def __init__(self, robot, TRANSFORM_ROBOT_A_TO_ROBOT_B = rg.Transform(), TRANSFORM_ROBOT_B_TO_ROBOT_A = rg.Transform(), speed = 100, plan_cache = None):
         self.robot = robot
         self.speed = speed
         self.actions = []
         self.TRANSFORM_ROBOT_A_TO_ROBOT_B = TRANSFORM_ROBOT_A_TO_ROBOT_B
         self.TRANSFORM_ROBOT_B_TO_ROBOT_A = TRANSFORM_ROBOT_B_TO_ROBOT_A
         self.S = Scale.from_factors([1000] * 3)
+        # robot frames (t0cf, in mm) of the target planes converted so far, per tool, see target_frames
+        self.frame_cache = {}
+        # cache.PlanCache of motion plans, see motion_start_config_target_config
+        self.plan_cache = plan_cache
+        # column of each group joint in the trajectory points, per group and joint name order
+        self.joint_indices = {}
+        # FK frames of the last trajectory, drawn as planes, when preview is on
+        self.preview = False
+        self.preview_planes = []
+        # joint-space tolerance (rad) for dropping waypoints, None keeps them all, see trajectory.simplify
+        self.simplify_tolerance = None
+        # segment_valid(start, end) check of the shortened segments, required with simplify_tolerance,
+        # see trajectory.sampled_checker
+        self.segment_valid = None
+        # ids of the actions moving the beam through the blade, capped at the cutting speed by assign_speeds
+        self.cutting_action_ids = set()
 
     def setup(self):
 
         self.actions.append(Action('SetTool', dict(tool_name='tool0')))
         self.actions.append(Action('SetWorkObject', dict(wobj_name='wobj0')))
 
+    @staticmethod
+    def plane_key(plane, digits=9):
+        """A hashable key of a plane's origin and axes."""
+        return tuple(round(value, digits) for point in (plane.Origin, plane.XAxis, plane.YAxis) for value in (point.X, point.Y, point.Z))
+
+    def tool_key(self, digits=9):
+        """A hashable key of the tool frame (TCP) attached to the robot, None without a tool."""
+        tool = getattr(self.robot, 'attached_tool', None)
+        if tool is None:
+            return None
+        frame = tool.frame
+        return tuple(round(value, digits) for vector in (frame.point, frame.xaxis, frame.yaxis) for value in vector)
+
+    def target_frames(self, planes):
+        """Converts target planes to robot frames scaled to mm, in one batch.
+
+        Planes converted before with the same tool attached are taken from
+        frame_cache; the others are turned into compas frames and sent
+        through a single from_tcf_to_t0cf call, and their origins are scaled
+        to mm in one transform_points call. Pass all the planes of a process
+        (pick, cuts, place) at once to convert them together.
+        """
+        # the flange frame of a target depends on the TCP, so frames are cached per tool frame
+        tool = self.tool_key()
+        keys = [(tool, self.plane_key(plane)) for plane in planes]
+
+        missing = {}
+        for key, plane in zip(keys, planes):
+            if key not in self.frame_cache and key not in missing:
+                missing[key] = plane
+
+        if missing:
+            frames = self.robot.from_tcf_to_t0cf([plane_to_compas_frame(plane) for plane in missing.values()])
+            # a uniform scale only moves the origins, the unit axes stay as they are
+            points = transform_points([frame.point for frame in frames], self.S.matrix)
+            for key, frame, point in zip(missing, frames, points):
+                self.frame_cache[key] = Frame(point, frame.xaxis, frame.yaxis)
+
+        return [self.frame_cache[key] for key in keys]
+
     def pick(self, APPROACH_PICK_CONFIG, pick_plane, approach_distance):
 
         configurations = []
@@ -46,20 +107,19 @@ class TFTProcess(object):
         #open gripper
         self.actions.append(Action('SetDigital', dict(io_name = 'Local_IO_0_DO1', value = 1),action_id = len(self.actions)))
 
-        #send to approach_pick_plane
+        #convert the targets in one batch
         approach_pick_plane = pick_plane + rg.Vector3d(0, 0, approach_distance)
         approach_pick_plane.Transform(self.TRANSFORM_ROBOT_A_TO_ROBOT_B)
-        frame = plane_to_compas_frame(approach_pick_plane)
-        frame_rob = self.robot.from_tcf_to_t0cf([frame])[0]
-        scaled_frame = frame_rob.transformed(self.S)
+        pick_plane = rg.Plane(pick_plane)
+        pick_plane.Transform(self.TRANSFORM_ROBOT_A_TO_ROBOT_B)
+        approach_frame, pick_frame = self.target_frames([approach_pick_plane, pick_plane])
+
+        #send to approach_pick_plane
+        scaled_frame = approach_frame
         self.actions.append(Action('MoveToFrame', dict(frame= scaled_frame, speed=self.speed, zone=rrc.Zone.FINE, motion_type='rrc.Motion.LINEAR',feedback_level=rrc.FeedbackLevel.DONE), action_id = len(self.actions)))
 
         #send to pick_plane
-
-        pick_plane.Transform(self.TRANSFORM_ROBOT_A_TO_ROBOT_B)
-        frame = plane_to_compas_frame(pick_plane)
-        frame_rob = self.robot.from_tcf_to_t0cf([frame])[0]
-        scaled_frame = frame_rob.transformed(self.S)
+        scaled_frame = pick_frame
         self.actions.append(Action('MoveToFrame', dict(frame= scaled_frame, speed=self.speed, zone=rrc.Zone.FINE, motion_type='rrc.Motion.LINEAR',feedback_level=rrc.FeedbackLevel.DONE), action_id = len(self.actions)))
 
         #wait
@@ -73,9 +133,7 @@ class TFTProcess(object):
         self.actions.append(Action('Stop', dict(), action_id = len(self.actions)))
 
         #send to approach_pick_plane
-        frame = plane_to_compas_frame(approach_pick_plane)
-        frame_rob = self.robot.from_tcf_to_t0cf([frame])[0]
-        scaled_frame = frame_rob.transformed(self.S)
+        scaled_frame = approach_frame
         self.actions.append(Action('MoveToFrame', dict(frame= scaled_frame, speed=self.speed, zone=rrc.Zone.FINE, motion_type='rrc.Motion.LINEAR',feedback_level=rrc.FeedbackLevel.DONE), action_id = len(self.actions)))
 
         #text
@@ -112,6 +170,10 @@ class TFTProcess(object):
         - attached_mesh: A mesh representing any object attached to the robot, affecting motion planning.
         - group: The name of the joint group to be used for motion planning.
 
+        With a plan_cache, a plan made before for the same start and target
+        values, group, planner and attached mesh is reused instead of
+        calling plan_motion again.
+
         Returns:
         - configurations: A list of the planned configurations
         """
@@ -130,6 +192,7 @@ class TFTProcess(object):
         #get attached collision mesh
         identifier = str(uuid.uuid4())
         compas_mesh = RhinoMesh.from_geometry(attached_mesh).to_compas()
+        mesh_hash = data_hash(compas_mesh.to_vertices_and_faces())
         collision_mesh = CollisionMesh(compas_mesh, identifier)
         link_name = group + "_tool0"
         touch_links = [group + "_tool0", group + "_link_6"]
@@ -150,42 +213,112 @@ class TFTProcess(object):
                 config_A.joint_values = start_configuration.joint_values
             start_configuration = config_A.merged(config_B)
 
-        trajectory = self.robot.plan_motion(goal_constraints,
-                                                start_configuration=start_configuration,
-                                                group=group,
-                                                options=dict(
-                                                    attached_collision_meshes=attached_collision_meshes,
-                                                    path_constraints=None,
-                                                    planner_id=planner_id,
-                                                ))
-
-        merged_configurations = []
-        planes = []
-        for c in trajectory.points:
-            merged_configurations.append(self.robot.merge_group_with_full_configuration(c, trajectory.start_configuration, group))
-            frame = self.robot.forward_kinematics(c, group, options=dict(solver='model'))
-            planes.append(draw_frame(frame))
+        trajectory = None
+        if self.plan_cache is not None:
+            key = self.plan_cache.key(start_configuration.joint_values, target_configuration.joint_values, group, planner_id, mesh_hash)
+            data = self.plan_cache.get_plan(key)
+            if data is not None:
+                trajectory = JointTrajectory.from_data(data)
+
+        if trajectory is None:
+            trajectory = self.robot.plan_motion(goal_constraints,
+                                                    start_configuration=start_configuration,
+                                                    group=group,
+                                                    options=dict(
+                                                        attached_collision_meshes=attached_collision_meshes,
+                                                        path_constraints=None,
+                                                        planner_id=planner_id,
+                                                    ))
+            if self.plan_cache is not None:
+                self.plan_cache.put_plan(key, trajectory.to_data())
+
+        configurations = self.trajectory_to_actions(trajectory, group, zone=5)
 
-        configurations = []
+        return configurations
 
-        for conf in merged_configurations:
-            config = self.robot.zero_configuration(group)
+    def tcp_point(self, joints, group):
+        """The TCP position (mm) of joint values in degrees, by forward kinematics."""
+        config = self.robot.zero_configuration(group)
+        config.joint_values = [math.radians(j) for j in joints]
+        frame = self.robot.forward_kinematics(config, group, options=dict(solver='model'))
+        return [1000 * value for value in frame.point]
+
+    def assign_zones(self, group, max_deviation=10.0, critical=zones.default_critical):
+        """Replaces the hand-set zones of all motions so far with the largest safe ones, see zones.assign_zones.
+
+        Joint targets are measured by the forward kinematics of group, the
+        planning group the process moves.
+        """
+        zones.assign_zones(self.actions, max_deviation=max_deviation, critical=critical,
+                           forward_kinematics=lambda joints: self.tcp_point(joints, group))
+        return self.actions
+
+    def assign_speeds(self, group, cut_speed=20.0, cutting=None):
+        """Replaces the global speed of all motions so far with the fastest the limits allow, see speeds.assign_speeds.
 
-            # Extract joint values in the correct order
-            joint_values = []
-            for i in range(1, 7):  # Ensure order is maintained
-                joint_name = "{}_joint_{}".format(group, i)
-                for n, j in zip(conf.joint_names, conf.joint_values):
-                    if n == joint_name:
-                        joint_values.append(j)
-                        break  # Stop searching once we find the correct value
+        Without cutting, the actions in cutting_action_ids are the cutting
+        segments. Linear MoveToFrame motions, such as the pick approaches,
+        keep at most the speed they were generated with. Joint segments are
+        measured by the forward kinematics of group.
+        """
+        if cutting is None:
+            cutting = lambda action: action.id in self.cutting_action_ids
+        speeds.assign_speeds(self.actions, cutting=cutting, cut_speed=cut_speed, group=group,
+                             forward_kinematics=lambda joints: self.tcp_point(joints, group))
+        return self.actions
+
+    def group_joint_indices(self, group, joint_names):
+        """Returns the positions of group_joint_1 ... group_joint_6 in joint_names, resolved once per group."""
+        key = (group, tuple(joint_names))
+        if key not in self.joint_indices:
+            self.joint_indices[key] = joint_columns(joint_names, group)
+        return self.joint_indices[key]
+
+    def trajectory_to_actions(self, trajectory, group, zone=5):
+        """Appends one MoveToJoints action per trajectory point and returns the group configurations.
+
+        The joint values of all points are gathered into one array and
+        converted to degrees at once. With a simplify_tolerance, waypoints
+        the joint-space path does not need are dropped first; this raises
+        ValueError if no segment_valid check is set. With preview
+        on, the FK frames of all points are drawn into preview_planes.
+        """
+        points = trajectory.points
+        if not points:
+            return []
+
+        joint_names = points[0].joint_names
+        if all("{}_joint_{}".format(group, i) in joint_names for i in range(1, 7)):
+            values = np.array([point.joint_values for point in points], dtype=float)
+        else:
+            # points without the group's joints are completed from the start configuration
+            merged = [self.robot.merge_group_with_full_configuration(point, trajectory.start_configuration, group) for point in points]
+            joint_names = merged[0].joint_names
+            values = np.array([configuration.joint_values for configuration in merged], dtype=float)
+
+        values = values[:, self.group_joint_indices(group, joint_names)]
+        if self.simplify_tolerance is not None:
+            if self.segment_valid is None:
+                # the shortened segments were never planned, so they must be checked for collisions
+                raise ValueError("simplify_tolerance needs a segment_valid collision check, e.g. trajectory.sampled_checker.")
+            kept = simplify(values, self.simplify_tolerance, self.segment_valid)
+            values = values[kept]
+            points = [points[i] for i in kept]
+        degrees = np.degrees(values).tolist()
 
+        configurations = []
+        for joint_values, joints in zip(values.tolist(), degrees):
+            config = self.robot.zero_configuration(group)
             config.joint_values = joint_values
             configurations.append(config)
+            self.actions.append(Action('MoveToJoints', dict(joints = joints, ext_axes = [], speed=self.speed, zone= zone, feedback_level=rrc.FeedbackLevel.DONE), action_id = len(self.actions)))
 
-            for config in configurations:
-                joints = [math.degrees(j) for j in config.joint_values]
-                self.actions.append(Action('MoveToJoints', dict(joints = joints, ext_axes = [], speed=self.speed, zone= 5, feedback_level=rrc.FeedbackLevel.DONE), action_id = len(self.actions)))
-
+        if self.preview:
+            self.preview_planes = self.preview_frames(points, group)
 
         return configurations
+
+    def preview_frames(self, configurations, group):
+        """Draws the FK frames of many configurations as planes, in one pass."""
+        options = dict(solver='model')
+        return [draw_frame(self.robot.forward_kinematics(configuration, group, options=options)) for configuration in configurations]
@@ -0,0 +1,179 @@
+"""
+Speed assignment for the motions of a production action list.
+
+Instead of one global speed, assign_speeds gives every motion the speed
+the robot can actually reach on it, TOPP style: each segment between two
+consecutive targets gets a speed cap from the limits, the robot has to be
+at rest on FINE targets, and a forward pass (acceleration) and a backward
+pass (deceleration) over the waypoints give the fastest speed profile within
+those limits. The speed data of a motion is the peak speed of that profile
+on its segment.
+
+Segment caps come from:
+
+- joint_limits.yaml: the TCP speed at which the fastest moving joint of a
+  MoveToJoints segment reaches its maximum velocity, with TCP distances
+  from forward_kinematics, or estimated from the robot's reach as in zones;
+- cartesian_limits.yaml: max_trans_vel for every segment and max_rot_vel
+  for the rotation between consecutive frames; max_trans_acc and
+  max_trans_dec for the forward and backward passes;
+- cut_speed for the segments cutting(action) marks, near the blade;
+- the programmed speed of the segments precise(action) marks, by default
+  the linear MoveToFrame approach, pick and cut moves, which are never
+  made faster than they were written.
+
+As in MoveIt, the velocity limits are scaled by the
+default_velocity_scaling_factor of joint_limits.yaml and the acceleration
+limits by its default_acceleration_scaling_factor. Speeds are in mm/s, like the speed data of the actions.
+"""
+
+import math
+import os
+
+import numpy as np
+
+from cycle_time import JOINT_LIMITS_PATH, load_joint_limits, load_yaml
+from motions import FINE, MOTIONS, PASSTHROUGH, action_name, action_parameters, is_linear_frame, motion_target, target_frame
+
+
+CARTESIAN_LIMITS_PATH = os.path.join(os.path.dirname(JOINT_LIMITS_PATH), "cartesian_limits.yaml")
+
+
+def load_cartesian_limits(file_path=CARTESIAN_LIMITS_PATH):
+    """Returns the cartesian_limits mapping (m/s, m/s^2, rad/s), with max_trans_dec as a positive value."""
+    limits = dict(load_yaml(file_path)["cartesian_limits"])
+    limits["max_trans_dec"] = abs(limits["max_trans_dec"])
+    return limits
+
+
+def load_scaling_factors(file_path=JOINT_LIMITS_PATH):
+    """Returns the default (velocity, acceleration) scaling factors of joint_limits.yaml, 1.0 where missing."""
+    config = load_yaml(file_path)
+    return (float(config.get("default_velocity_scaling_factor", 1.0)),
+            float(config.get("default_acceleration_scaling_factor", 1.0)))
+
+
+def _axes(action):
+    """The (3, 3) rotation of a frame target, rows x, y, z."""
+    frame = target_frame(action)
+    if isinstance(frame, dict):
+        x, y = np.asarray(frame["xaxis"], dtype=float), np.asarray(frame["yaxis"], dtype=float)
+    else:
+        x, y = np.asarray(frame.xaxis, dtype=float), np.asarray(frame.yaxis, dtype=float)
+    x = x / np.linalg.norm(x)
+    z = np.cross(x, y)
+    z = z / np.linalg.norm(z)
+    return np.stack([x, np.cross(z, x), z])
+
+
+def rotation_angle(a, b):
+    """Angle of the rotation between two (3, 3) frames."""
+    cosine = (np.trace(a @ b.T) - 1.0) / 2.0
+    return math.acos(float(np.clip(cosine, -1.0, 1.0)))
+
+
+def profile(lengths, caps, rests, acceleration, deceleration):
+    """Fastest waypoint speeds along segments of the given lengths and speed caps.
+
+    rests marks the n + 1 waypoints where the speed is zero. Returns the
+    waypoint speeds and the peak speed on every segment.
+    """
+    n = len(lengths)
+    limits = np.full(n + 1, np.inf)
+    limits[:-1] = np.minimum(limits[:-1], caps)
+    limits[1:] = np.minimum(limits[1:], caps)
+    limits[np.asarray(rests, dtype=bool)] = 0.0
+
+    speeds = limits.copy()
+    for i in range(n):
+        speeds[i + 1] = min(speeds[i + 1], math.sqrt(speeds[i] ** 2 + 2 * acceleration * lengths[i]))
+    for i in range(n - 1, -1, -1):
+        speeds[i] = min(speeds[i], math.sqrt(speeds[i + 1] ** 2 + 2 * deceleration * lengths[i]))
+
+    # highest speed reachable between the two ends, accelerating then decelerating
+    start, end = speeds[:-1], speeds[1:]
+    peaks = np.sqrt((2 * acceleration * deceleration * lengths + deceleration * start ** 2 + acceleration * end ** 2)
+                    / (acceleration + deceleration))
+    return speeds, np.minimum(peaks, caps)
+
+
+def assign_speeds(actions, joint_limits=None, cartesian_limits=None, cutting=None, cut_speed=20.0, reach=1850.0,
+                  group="robotA", min_speed=1.0, precise=is_linear_frame, forward_kinematics=None,
+                  velocity_scaling=None, acceleration_scaling=None):
+    """Sets the speed of every motion in a list of Actions (or their data dicts) and returns the list.
+
+    cutting(action) marks the motions capped at cut_speed, precise(action)
+    those capped at their current speed. forward_kinematics(joints in
+    degrees) returns the TCP point (mm) of a joint target, as in
+    zones.assign_zones. The scaling factors default to those of
+    joint_limits.yaml. Motions whose start cannot be measured, after a
+    switch between joint and Cartesian targets, start and end at rest.
+    """
+    if joint_limits is None:
+        joint_limits = load_joint_limits()
+    if cartesian_limits is None:
+        cartesian_limits = load_cartesian_limits()
+    if velocity_scaling is None or acceleration_scaling is None:
+        default_velocity, default_acceleration = load_scaling_factors()
+        velocity_scaling = default_velocity if velocity_scaling is None else velocity_scaling
+        acceleration_scaling = default_acceleration if acceleration_scaling is None else acceleration_scaling
+    names = ["{}_joint_{}".format(group, i) for i in range(1, 7)]
+    max_velocities = velocity_scaling * np.array([joint_limits[name][0] or np.inf for name in names], dtype=float)
+    max_linear = velocity_scaling * 1000.0 * cartesian_limits["max_trans_vel"]
+    max_rotation = velocity_scaling * cartesian_limits["max_rot_vel"]
+    acceleration = acceleration_scaling * 1000.0 * cartesian_limits["max_trans_acc"]
+    deceleration = acceleration_scaling * 1000.0 * cartesian_limits["max_trans_dec"]
+
+    motions = [i for i, action in enumerate(actions) if action_name(action) in MOTIONS]
+    if not motions:
+        return actions
+
+    lengths = np.zeros(len(motions))
+    caps = np.full(len(motions), max_linear)
+    # waypoint k + 1 is the target of motion k; waypoint 0 is where the robot starts, at rest
+    rests = np.zeros(len(motions) + 1, dtype=bool)
+    rests[0] = rests[-1] = True
+
+    previous = None
+    for k, i in enumerate(motions):
+        action = actions[i]
+        kind, target = motion_target(action, reach, forward_kinematics)
+
+        if previous is None or previous[0] != kind:
+            # unknown start: at rest on both ends, only the cap applies
+            rests[k] = rests[k + 1] = True
+        elif action_name(action) == "MoveToJoints":
+            deltas = np.abs(np.radians(np.asarray(action_parameters(action)["joints"], dtype=float) - previous[2]))
+            # the TCP distance with forward kinematics, else reach times the largest joint change
+            lengths[k] = float(np.linalg.norm(target - previous[1])) if kind == "tcp" else reach * deltas.max()
+            slowest = (deltas / max_velocities).max()
+            # joint moves that leave the TCP in place keep the cap, like reorientations
+            if slowest > 0 and lengths[k] > 0:
+                caps[k] = min(caps[k], lengths[k] / slowest)
+        else:
+            lengths[k] = float(np.linalg.norm(target - previous[1]))
+            angle = rotation_angle(previous[2], _axes(action))
+            # pure reorientations keep the cap, ABB times them with the orientation speed
+            if angle > 0 and lengths[k] > 0:
+                caps[k] = min(caps[k], lengths[k] * max_rotation / angle)
+
+        if cutting is not None and cutting(action):
+            caps[k] = min(caps[k], cut_speed)
+        elif precise is not None and precise(action):
+            caps[k] = min(caps[k], float(action_parameters(action).get("speed", caps[k])))
+        if action_parameters(action).get("zone", FINE) == FINE:
+            rests[k + 1] = True
+        # the robot stands still for IO, waits and stops between motions
+        following = motions[k + 1] if k + 1 < len(motions) else len(actions)
+        if any(action_name(actions[j]) not in PASSTHROUGH for j in range(i + 1, following)):
+            rests[k + 1] = True
+
+        extra = np.asarray(action_parameters(action)["joints"], dtype=float) if kind != "frame" else _axes(action)
+        previous = (kind, target, extra)
+
+    _, peaks = profile(lengths, caps, rests, acceleration, deceleration)
+    # segments of zero length, or with an unknown start, move at their cap
+    peaks = np.where(lengths > 0, peaks, caps)
+    for k, i in enumerate(motions):
+        action_parameters(actions[i])["speed"] = float(max(min_speed, math.floor(peaks[k])))
+    return actions
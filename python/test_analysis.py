@@ -0,0 +1,60 @@
+import math
+
+import numpy as np
+import pytest
+
+import analysis
+from geometry_np import Truss
+
+
+def build(points, pairs):
+    truss = Truss()
+    for point in points:
+        truss.add_node(point)
+    for a, b in pairs:
+        truss.add_beam([points[a], points[b]], 0.06, 0.05)
+    return truss
+
+
+def rotated(points, degrees):
+    angle = math.radians(degrees)
+    rotation = np.array([[math.cos(angle), -math.sin(angle), 0.0], [math.sin(angle), math.cos(angle), 0.0], [0.0, 0.0, 1.0]])
+    return [tuple(rotation @ np.array(point, dtype=float)) for point in points]
+
+
+def test_triangle_forces_and_reactions():
+    truss = build([(0, 0, 0), (2, 0, 0), (1, 1, 0)], [(0, 1), (0, 2), (1, 2)])
+    result = analysis.analyze(truss, {0: (True, True), 1: (False, True)}, {2: (0, -1000, 0)})
+    assert np.allclose(result.forces, [500.0, -1000 / math.sqrt(2), -1000 / math.sqrt(2)])
+    assert np.allclose(result.reactions[:, :2], [[0, 500], [0, 500], [0, 0]])
+    assert result.displacements[2, 1] < 0
+    assert result.failing() == []
+
+
+def test_three_dimensional_truss_is_balanced():
+    points = [(0, 0, 0), (1, 0, 0), (0, 1, 0), (0.3, 0.3, 1)]
+    truss = build(points, [(0, 1), (1, 2), (2, 0), (0, 3), (1, 3), (2, 3)])
+    result = analysis.analyze(truss, [0, 1, 2], {3: (100, 0, -1000)})
+    assert np.allclose(result.reactions.sum(axis=0), [-100, 0, 1000])
+
+
+@pytest.mark.parametrize("degrees", [0, 10, 30, 45])
+def test_square_without_diagonal_is_a_mechanism(degrees):
+    # the rotated square used to give a finite, meaningless solution
+    truss = build(rotated([(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)], degrees), [(0, 1), (1, 2), (2, 3), (3, 0)])
+    with pytest.raises(ValueError):
+        analysis.analyze(truss, [0, 1], {2: (1000, 0, 0)})
+
+
+def test_square_with_diagonal_is_stable():
+    truss = build(rotated([(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)], 30), [(0, 1), (1, 2), (2, 3), (3, 0), (0, 2)])
+    result = analysis.analyze(truss, [0, 1], {2: (1000, 0, 0)})
+    assert np.abs(result.displacements).max() < 1e-3
+
+
+def test_dense_solver_agrees(monkeypatch):
+    truss = build([(0, 0, 0), (2, 0, 0), (1, 1, 0)], [(0, 1), (0, 2), (1, 2)])
+    sparse = analysis.analyze(truss, [0, 1], {2: (300, -1000, 0)})
+    monkeypatch.setattr(analysis, "SCIPY_AVAILABLE", False)
+    dense = analysis.analyze(truss, [0, 1], {2: (300, -1000, 0)})
+    assert np.allclose(sparse.forces, dense.forces)
@@ -0,0 +1,52 @@
+import numpy as np
+
+from beam_store import BeamStore
+from geometry_np import Beam
+
+
+def random_axes(count, seed=0):
+    rng = np.random.default_rng(seed)
+    axes = rng.uniform(-2.0, 2.0, (count, 2, 3))
+    axes[:, :, 2] = rng.uniform(-1.0, 1.0, (count, 1))
+    return axes
+
+
+def test_refresh_matches_per_beam_geometry():
+    axes = random_axes(40)
+    widths = np.linspace(0.03, 0.08, len(axes))
+    store = BeamStore()
+    store.set_many(axes, widths, 0.06)
+    store.refresh()
+
+    for row, axis in enumerate(axes):
+        beam = Beam(row, 0, 1, axis, 0.06, widths[row])
+        assert np.allclose(store.outlines[row], beam.uncut_polyline)
+        assert np.allclose(store.centroids[row], beam.centroid)
+        assert np.allclose(store.xaxes[row], beam.xaxis)
+        assert np.allclose(store.yaxes[row], beam.yaxis)
+        assert np.allclose(store.planes[row], beam.plane)
+
+
+def test_append_grows_and_remove_shifts_rows():
+    axes = random_axes(20, seed=1)
+    store = BeamStore(capacity=2)
+    for axis in axes:
+        store.append(axis, 0.05, 0.06)
+    assert len(store) == 20
+    store.remove(3)
+    assert len(store) == 19
+    assert np.allclose(store.axes[3], axes[4])
+    assert np.allclose(store.axes[18], axes[19])
+
+
+def test_refresh_rows_leaves_other_rows():
+    axes = random_axes(5, seed=2)
+    store = BeamStore()
+    store.set_many(axes, 0.05, 0.06)
+    store.refresh()
+    before = store.outlines.copy()
+
+    store.set(1, axes[1] + 1.0)
+    store.refresh([1])
+    assert np.allclose(store.outlines[1], before[1] + 1.0)
+    assert np.allclose(np.delete(store.outlines[:5], 1, axis=0), np.delete(before[:5], 1, axis=0))
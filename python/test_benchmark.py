@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+import benchmark
+
+
+def test_generate_layout_size():
+    layout = benchmark.generate_layout(1000, seed=1)
+    assert 900 <= len(layout["beam_nodes"]) <= 1100
+    assert layout["beam_nodes"].max() < len(layout["positions"])
+
+
+def test_benchmark_size_reports_failed_beams():
+    result = benchmark.benchmark_size(100)
+    assert result["beams"] == len(benchmark.generate_layout(100)["beam_nodes"])
+    assert set(result["seconds"]) == {"add_node", "add_beam", "cut_all_beams", "get_cut_planes", "to_json", "from_json"}
+    assert result["cut_plane_failures"] == [91]
+
+
+def run_script(tmp_path, *sizes):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark.py")
+    output = str(tmp_path / "results.json")
+    return subprocess.run([sys.executable, script, "--sizes", *map(str, sizes), "--output", output],
+                          capture_output=True, text=True)
+
+
+def test_script_fails_when_cut_planes_fail(tmp_path):
+    assert run_script(tmp_path, 10).returncode == 0
+    failed = run_script(tmp_path, 100)
+    assert failed.returncode == 1
+    assert "FAILED" in failed.stdout
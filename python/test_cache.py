@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+
+from benchmark import build_truss, generate_layout
+from cache import CutCache, LRUStore, PlanCache, data_hash
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    with LRUStore(str(tmp_path / "store.sqlite"), max_entries=2) as store:
+        store.put("a", 1)
+        store.put("b", 2)
+        assert store.get("a") == 1
+        store.put("c", 3)
+        assert len(store) == 2
+        assert store.get("b") is None
+        assert store.get("a") == 1 and store.get("c") == 3
+
+
+def test_store_persists_after_close(tmp_path):
+    path = str(tmp_path / "store.sqlite")
+    with LRUStore(path) as store:
+        store.put("key", {"value": [1.5, 2.5]})
+    with LRUStore(path) as store:
+        assert len(store) == 1
+        assert store.get("key") == {"value": [1.5, 2.5]}
+
+
+def outlines(truss):
+    return [beam.cut_polyline for beam in truss.beams]
+
+
+def test_cut_cache_reproduces_uncached_cuts(tmp_path):
+    layout = generate_layout(200, seed=6)
+    reference = build_truss(layout)
+    reference.cut_all_beams()
+
+    path = str(tmp_path / "cuts.sqlite")
+    with CutCache(path) as cache:
+        build_truss(layout).cut_all_beams(cache=cache)
+        entries = len(cache)
+    assert entries > 0
+
+    with CutCache(path) as cache:
+        truss = build_truss(layout)
+        truss.cut_all_beams(cache=cache)
+        assert len(cache) == entries
+    for a, b in zip(outlines(reference), outlines(truss)):
+        assert np.allclose(a, b)
+
+
+def test_cut_cache_key_depends_on_the_beams(tmp_path):
+    truss = build_truss(generate_layout(20, seed=7))
+    node = max(truss.nodes, key=lambda node: len(node.connected_beams))
+    node.organize_beams()
+    with CutCache(os.path.join(str(tmp_path), "cuts.sqlite")) as cache:
+        key = cache.key(node)
+        assert cache.key(node) == key
+        node.connected_beams[0].width += 0.01
+        assert cache.key(node) != key
+
+
+def test_plan_keys_quantize_joint_values(tmp_path):
+    with PlanCache(str(tmp_path / "plans.sqlite"), robot_version="v1", precision=1e-3) as cache:
+        key = cache.key([0.0, 1.0], [0.5, 0.5], "robotA", "RRTConnect")
+        assert cache.key([0.0001, 1.0], [0.5, 0.5], "robotA", "RRTConnect") == key
+        assert cache.key([0.01, 1.0], [0.5, 0.5], "robotA", "RRTConnect") != key
+        assert cache.key([0.0, 1.0], [0.5, 0.5], "robotB", "RRTConnect") != key
+        assert cache.key([0.0, 1.0], [0.5, 0.5], "robotA", "RRTConnect", "mesh") != key
+
+
+def test_plans_of_another_robot_are_not_returned(tmp_path):
+    path = str(tmp_path / "plans.sqlite")
+    with PlanCache(path, robot_version="v1") as cache:
+        key = cache.key([0.0], [1.0], "robotA", "RRTConnect")
+        cache.put_plan(key, {"points": [[0.0], [1.0]]})
+        assert cache.get_plan(key) == {"points": [[0.0], [1.0]]}
+    with PlanCache(path, robot_version="v2") as cache:
+        assert cache.key([0.0], [1.0], "robotA", "RRTConnect") != key
+        assert cache.get_plan(key) is None
+
+
+def test_data_hash_rounds_floats():
+    assert data_hash({"a": [1.0, 2.0]}) == data_hash({"a": [1.0 + 1e-12, 2.0]})
+    assert data_hash({"a": [1.0, 2.0]}) != data_hash({"a": [1.0, 2.001]})
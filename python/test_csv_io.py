@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+
+import csv_io
+from geometry_np import Truss
+
+
+CSV_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "csv")
+
+
+def test_chunked_reading_matches_whole_tables():
+    path = os.path.join(CSV_DIR, "State_A.csv")
+    points, lines = csv_io.read_state(path)
+    chunked_points, chunked_lines = csv_io.read_state(path, chunk_rows=3)
+    assert np.array_equal(points, chunked_points)
+    assert np.array_equal(lines, chunked_lines)
+    assert lines.max() < len(points)
+
+
+def test_boxes_are_read_only_from_box_exports():
+    corners = csv_io.read_boxes(os.path.join(CSV_DIR, "State_A_Boxes.csv"))
+    assert corners.shape[1:] == (4, 3) and len(corners) > 0
+    # Boxes.csv is a state export of points and lines
+    with pytest.raises(ValueError):
+        csv_io.read_boxes(os.path.join(CSV_DIR, "Boxes.csv"))
+
+
+def test_box_dimensions_of_a_rectangle():
+    corners = np.array([[0, 0, 0], [2, 0, 0], [2, 0.1, 0], [0, 0.1, 0]], dtype=float)
+    centers, axes, lengths, widths = csv_io.box_dimensions(corners)
+    assert np.allclose(centers, [[1, 0.05, 0]])
+    assert np.allclose(axes, [[[0, 0.05, 0], [2, 0.05, 0]]])
+    assert np.allclose(lengths, [2]) and np.allclose(widths, [0.1])
+
+
+def test_merge_points_does_not_chain():
+    # each point is 0.9 tolerance from the next, so the chain splits every other point
+    tolerance = 1e-3
+    points = np.array([[0.9 * tolerance * i, 0.0, 0.0] for i in range(6)])
+    merged, inverse = csv_io.merge_points(points, tolerance)
+    assert np.allclose(merged[:, 0], [0.0, 1.8e-3, 3.6e-3])
+    assert inverse.tolist() == [0, 0, 1, 1, 2, 2]
+
+
+def test_merge_points_keeps_the_nodes_add_node_keeps():
+    for seed in range(3):
+        rng = np.random.default_rng(seed)
+        points = rng.uniform(0, 5e-6, (300, 3))
+        truss = Truss()
+        for point in points:
+            truss.add_node(point)
+
+        merged, inverse = csv_io.merge_points(points, truss.tolerance)
+        assert np.array_equal(merged, np.array([node.position for node in truss.nodes]))
+        assert np.all(np.linalg.norm(merged[inverse] - points, axis=1) < truss.tolerance)
+
+
+def test_state_arrays_drop_collapsed_and_repeated_lines():
+    points = np.array([[0, 0, 0], [1, 0, 0], [1, 1e-8, 0], [0, 1, 0]], dtype=float)
+    lines = np.array([[0, 1], [1, 2], [2, 0], [3, 0], [0, 3]])
+    arrays = csv_io.state_arrays(points, lines)
+    assert len(arrays["positions"]) == 3
+    assert arrays["beam_nodes"].tolist() == [[0, 1], [2, 0]]
@@ -0,0 +1,39 @@
+import numpy as np
+
+from benchmark import build_truss, generate_layout
+from geometry_np import make_plane
+
+
+BLADE_A = make_plane([0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0])
+BLADE_B = make_plane([0.5, 0.2, 0.1], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0])
+
+
+def test_batch_planes_match_per_beam_planes():
+    truss = build_truss(generate_layout(300, seed=8))
+    truss.cut_all_beams()
+    beams = [beam for beam in truss.beams if not beam.fabricated]
+    frames = truss.get_all_cut_planes(BLADE_A, BLADE_B, beams)
+    assert frames.shape == (len(beams), 4, 4, 3)
+
+    checked = 0
+    for beam, planes in zip(beams, frames):
+        batch_A, batch_B = [p.copy() for p in beam.numbersA], [p.copy() for p in beam.numbersB]
+        try:
+            expected = beam.get_cut_planes(BLADE_A, BLADE_B)
+        except IndexError:
+            # fewer than three outline points on one side
+            assert np.isnan(planes).any()
+            continue
+        assert np.allclose(planes, np.array(expected))
+        assert np.allclose(batch_A, beam.numbersA)
+        assert np.allclose(batch_B, beam.numbersB)
+        checked += 1
+    assert checked > 0.9 * len(beams)
+
+
+def test_failing_beam_gets_nan_planes():
+    truss = build_truss(generate_layout(100))
+    truss.cut_all_beams()
+    beam = next(beam for beam in truss.beams if beam.id == 91)
+    frames = truss.get_all_cut_planes(BLADE_A, BLADE_B, [beam])
+    assert np.isnan(frames).any()
@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+import pytest
+
+import cycle_time
+from cycle_time import CycleTimeEstimator
+
+
+def frame_move(x, y, zone=-1, speed=100.0):
+    return {"name": "MoveToFrame", "parameters": {"frame": {"point": [x, y, 0.0], "xaxis": [1, 0, 0], "yaxis": [0, 1, 0]},
+                                                  "speed": speed, "zone": zone}}
+
+
+def joint_move(joints, zone=-1, speed=100.0):
+    return {"name": "MoveToJoints", "parameters": {"joints": joints, "speed": speed, "zone": zone}}
+
+
+@pytest.fixture
+def estimator():
+    limits = {"robotA_joint_{}".format(i): (1.0, None) for i in range(1, 7)}
+    return CycleTimeEstimator(limits, reach=1000.0, unknown_motion_time=1.0, fine_time=0.0)
+
+
+def test_joint_limits_are_read_from_the_config():
+    limits = cycle_time.load_joint_limits()
+    assert limits["robotA_joint_1"] == (3.054, None)
+    with open(cycle_time.JOINT_LIMITS_PATH) as file:
+        assert cycle_time.parse_yaml(file.read())["joint_limits"]["robotA_joint_1"]["max_velocity"] == 3.054
+
+
+def test_fine_corner_is_not_shortened(estimator):
+    actions = [frame_move(0, 0), frame_move(100, 0), frame_move(100, 100)]
+    times, total = estimator.estimate(actions)
+    assert np.allclose(times, [1.0, 1.0, 1.0])
+
+
+def test_blended_corner_by_hand(estimator):
+    # two 100 mm segments at a right angle, blended with a 10 mm zone:
+    # the arc of radius 10 replaces 2 * 10 mm of straight path with 10 * pi / 2 mm
+    actions = [frame_move(0, 0), frame_move(100, 0), frame_move(100, 100, zone=10), frame_move(200, 100)]
+    times, _ = estimator.estimate(actions)
+    saved = 20.0 - 10.0 * math.pi / 2
+    # the first corner is FINE; the second one's saving is shared by its two segments
+    assert np.allclose(times[1:], [1.0, (100 - saved / 2) / 100, (100 - saved / 2) / 100])
+
+
+def test_straight_blend_saves_nothing(estimator):
+    actions = [frame_move(0, 0), frame_move(100, 0, zone=50), frame_move(200, 0)]
+    times, _ = estimator.estimate(actions)
+    assert np.allclose(times[1:], [1.0, 1.0])
+
+
+def test_robtarget_is_timed_like_a_frame(estimator):
+    robtarget = {"name": "MoveToRobtarget", "parameters": {"target": {"point": [200, 0, 0], "xaxis": [1, 0, 0], "yaxis": [0, 1, 0]},
+                                                          "speed": 100.0, "zone": -1}}
+    actions = [frame_move(0, 0), frame_move(100, 0), robtarget, frame_move(300, 0)]
+    times, _ = estimator.estimate(actions)
+    assert np.allclose(times, [1.0, 1.0, 1.0, 1.0])
+
+
+def test_stop_between_motions_prevents_the_blend(estimator):
+    actions = [frame_move(0, 0), frame_move(100, 0, zone=10),
+               {"name": "WaitTime", "parameters": {"time": 0.5}}, frame_move(100, 100)]
+    times, total = estimator.estimate(actions)
+    assert np.allclose(times, [1.0, 1.0, 0.5, 1.0])
+
+
+def test_joint_motion_takes_the_slowest_limit(estimator):
+    actions = [joint_move([0] * 6), joint_move([90, 0, 0, 0, 0, 0], speed=1000.0), joint_move([90, 0, 0, 0, 0, 0.5], speed=5.0)]
+    times, total = estimator.estimate(actions)
+    # joint velocity: pi / 2 rad at 1 rad/s; TCP speed: 0.5 degrees at 1000 mm reach and 5 mm/s
+    assert np.allclose(times, [1.0, math.pi / 2, math.radians(0.5) * 1000.0 / 5.0])
+    assert np.isclose(total, times.sum())
+
+
+def test_rank_orders_programs_by_total(estimator):
+    slow = [frame_move(0, 0), frame_move(100, 0, speed=10.0)]
+    fast = [frame_move(0, 0), frame_move(100, 0)]
+    order, totals = estimator.rank([slow, fast])
+    assert order == [1, 0]
+    assert np.allclose(totals, [11.0, 2.0])
@@ -0,0 +1,137 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from geometry_np import Truss
+
+
+JSON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "json")
+
+
+def same_outline(a, b, tolerance=1e-9):
+    """True if two closed polylines have the same vertices in the same cyclic order."""
+    a, b = np.asarray(a)[:-1], np.asarray(b)[:-1]
+    if a.shape != b.shape:
+        return False
+    return any(np.allclose(np.roll(a, shift, axis=0), b, atol=tolerance) for shift in range(len(a)))
+
+
+def square_truss():
+    truss = Truss()
+    corners = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)]
+    for corner in corners:
+        truss.add_node(corner)
+    for a, b in [(0, 1), (1, 2), (2, 3), (3, 0), (0, 2)]:
+        truss.add_beam([corners[a], corners[b]], 0.06, 0.05)
+    return truss
+
+
+def test_add_node_merges_within_tolerance():
+    truss = Truss()
+    first = truss.add_node([1.0, 2.0, 0.0])
+    assert truss.add_node([1.0 + 1e-7, 2.0, 0.0]) is first
+    assert truss.add_node([1.0 + 1e-5, 2.0, 0.0]) is not first
+    assert len(truss.nodes) == 2
+
+
+def test_add_beam_between_existing_nodes():
+    truss = square_truss()
+    assert len(truss.beams) == 5
+    beam = truss.beams[0]
+    assert truss.add_beam([(1, 0, 0), (0, 0, 0)], 0.06, 0.05) is beam
+    assert truss.find_beam(1, 0) is beam
+    with pytest.raises(ValueError):
+        truss.add_beam([(0, 0, 0), (5, 5, 0)], 0.06, 0.05)
+
+
+def test_uncut_outline_is_a_closed_rectangle():
+    beam = square_truss().beams[0]
+    outline = beam.uncut_polyline
+    assert outline.shape == (5, 3)
+    assert np.allclose(outline[0], outline[-1])
+    assert np.allclose(np.ptp(outline[:, 0]), 1.0)
+    assert np.allclose(np.ptp(outline[:, 1]), 0.05)
+    assert np.allclose(beam.centroid, [0.5, 0.0, 0.0])
+
+
+# truss_01 and truss_03 were edited after their cuts were stored
+@pytest.mark.parametrize("name", ["truss.json", "truss_02.json"])
+def test_cut_all_beams_matches_stored_rhino_cuts(name):
+    truss = Truss.from_json(os.path.join(JSON_DIR, name))
+    stored = [beam.cut_polyline.copy() for beam in truss.beams]
+    truss.cut_all_beams()
+    for outline, beam in zip(stored, truss.beams):
+        assert same_outline(outline, beam.cut_polyline)
+
+
+def test_dict_round_trip():
+    truss = Truss.from_json(os.path.join(JSON_DIR, "truss.json"))
+    copy = Truss.from_dict(truss.to_dict())
+    assert copy.to_dict() == truss.to_dict()
+
+
+def test_json_keeps_node_ids_and_drops_repeated_beams(tmp_path):
+    truss = square_truss()
+    data = truss.to_dict()
+    for node_data, id in zip(data["nodes"], [10, 20, 35, 40]):
+        node_data["id"] = id
+    repeated = dict(data["beams"][0], start_node=1, end_node=0, width=0.08, cut_polyline=[[0, 0, 0]])
+    data["beams"].append(repeated)
+
+    path = str(tmp_path / "truss.json")
+    with open(path, "w") as file:
+        json.dump(data, file)
+    loaded = Truss.from_json(path)
+
+    assert [node.id for node in loaded.nodes] == [10, 20, 35, 40]
+    assert len(loaded.beams) == len(truss.beams)
+    assert [beam.id for beam in loaded.beams] == list(range(len(truss.beams)))
+    assert loaded.beams[0].width == 0.05
+    assert np.allclose(loaded.beams[0].cut_polyline, truss.beams[0].cut_polyline)
+    assert loaded.to_dict() == dict(data, beams=data["beams"][:-1])
+
+    # the node ids do not get in the way of editing the loaded truss
+    loaded.nodes[2].move_node(loaded.nodes[2].position + np.array([0.1, 0.0, 0.0]))
+    loaded.update_cuts()
+
+
+@pytest.mark.parametrize("index", [0, 3, 6])
+def test_update_cuts_matches_cut_all_beams(index):
+    path = os.path.join(JSON_DIR, "truss_02.json")
+    truss, reference = Truss.from_json(path), Truss.from_json(path)
+    truss.cut_all_beams()
+
+    for t in (truss, reference):
+        t.nodes[index].move_node(t.nodes[index].position + np.array([0.03, -0.02, 0.0]))
+    truss.update_cuts()
+    reference.cut_all_beams()
+
+    assert not truss._dirty_nodes and not truss._dirty_beams
+    for beam, expected in zip(truss.beams, reference.beams):
+        assert same_outline(beam.cut_polyline, expected.cut_polyline)
+
+
+def test_to_json_is_indented_unless_compact_is_asked_for(tmp_path):
+    truss = square_truss()
+    indented = truss.to_json()
+    assert indented.startswith('{\n    "nodes"')
+    assert "\n" not in truss.to_json(indent=None)
+
+    path = str(tmp_path / "truss.json")
+    truss.to_json(path)
+    with open(path) as file:
+        assert file.read() == indented
+    assert Truss.from_json(path).to_dict() == truss.to_dict()
+
+
+def test_arrays_and_npz_round_trip(tmp_path):
+    truss = Truss.from_json(os.path.join(JSON_DIR, "truss_02.json"))
+    truss.cut_all_beams()
+    arrays = truss.to_arrays()
+    assert Truss.from_arrays(arrays).to_dict() == truss.to_dict()
+
+    path = str(tmp_path / "truss.npz")
+    truss.to_npz(path)
+    assert Truss.from_npz(path).to_dict() == truss.to_dict()
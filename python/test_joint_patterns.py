@@ -0,0 +1,50 @@
+import math
+import os
+
+import numpy as np
+
+import joint_patterns
+from benchmark import build_truss, generate_layout
+from geometry_np import Truss
+from joint_patterns import JointPatternCache
+from test_geometry_np import JSON_DIR, same_outline
+
+
+def test_cut_reach():
+    widths = [0.05, 0.05]
+    assert np.isclose(joint_patterns._cut_reach([0.0, math.pi / 2], widths, [(0, 1)]), 0.025)
+    assert np.isclose(joint_patterns._cut_reach([0.0, math.pi], widths, [(0, 1)]), 0.0)
+    assert joint_patterns._cut_reach([0.0, 0.0], widths, [(0, 1)]) == math.inf
+    # narrow angles reach farther along the beams
+    assert joint_patterns._cut_reach([0.0, 0.2], widths, [(0, 1)]) > 0.2
+
+
+def test_shipped_truss_joints_are_memoized():
+    path = os.path.join(JSON_DIR, "truss.json")
+    reference = Truss.from_json(path)
+    reference.cut_all_beams()
+
+    cache = JointPatternCache()
+    truss = Truss.from_json(path)
+    truss.cut_all_beams(cache=cache)
+    assert len(cache) == len(truss.nodes)
+
+    # cutting again replays every joint from the cache
+    truss.cut_all_beams(cache=cache)
+    assert cache.hits == len(truss.nodes)
+    for beam, expected in zip(truss.beams, reference.beams):
+        assert same_outline(beam.cut_polyline, expected.cut_polyline)
+
+
+def test_repeated_joints_hit_the_cache():
+    layout = generate_layout(600, jitter=0.0, holes=0.0, fabricated=0.0, is_new=0.0)
+    layout["widths"][:] = 0.05
+    reference = build_truss(layout)
+    reference.cut_all_beams()
+
+    cache = JointPatternCache()
+    truss = build_truss(layout)
+    truss.cut_all_beams(cache=cache)
+    assert cache.hits > 0.9 * len(truss.nodes)
+    for beam, expected in zip(truss.beams, reference.beams):
+        assert same_outline(beam.cut_polyline, expected.cut_polyline, tolerance=1e-7)
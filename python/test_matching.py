@@ -0,0 +1,103 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import matching
+from geometry_np import Truss
+from matching import PieceMatcher, beam_requirements
+
+
+class Piece:
+    """Stand-in for a WoodPiece: width is the length, height the cross-section width, in cm."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+
+def brute_force_waste(matcher):
+    """Least total cost over every assignment of pieces to beams, unassigned beams included."""
+    beams, pieces, wastes = matcher.candidate_edges()
+    options = {}
+    for beam, piece, waste in zip(beams.tolist(), pieces.tolist(), wastes.tolist()):
+        options.setdefault(beam, []).append((piece, waste))
+
+    best = np.inf
+    choices = [options.get(beam, []) + [(None, matcher.unassigned_cost)] for beam in range(len(matcher.beams))]
+    for combination in itertools.product(*choices):
+        used = [piece for piece, _ in combination if piece is not None]
+        if len(used) == len(set(used)):
+            best = min(best, sum(cost for _, cost in combination))
+    return best
+
+
+def assignment_cost(matcher):
+    unassigned = len(matcher.beams) - len(matcher.assignment)
+    return matcher.waste() + unassigned * matcher.unassigned_cost
+
+
+def test_beam_requirements_measure_the_uncut_rectangle():
+    truss = Truss()
+    truss.add_node((0, 0, 0))
+    truss.add_node((2, 0, 0))
+    beam = truss.add_beam([(0, 0, 0), (2, 0, 0)], 0.06, 0.05)
+    beam.reference_width = 0.05
+    beam.cut_polyline = beam.uncut_polyline
+
+    beams, lengths, widths = beam_requirements(truss)
+    assert beams == [beam]
+    assert np.isclose(lengths[0], 2.0)
+    assert np.allclose(widths, [0.05])
+
+    beam.fabricated = True
+    assert beam_requirements(truss)[0] == []
+
+
+def test_candidates_respect_length_and_width():
+    matcher = PieceMatcher(["beam"], [1.0], [0.05])
+    matcher.add_pieces([Piece(90, 5), Piece(110, 4), Piece(110, 9), Piece(120, 6)])
+    _, pieces, wastes = matcher.candidate_edges()
+    assert pieces.tolist() == [3]
+    assert np.isclose(wastes[0], 1.2 * 0.06 - 1.0 * 0.05)
+
+
+@pytest.mark.skipif(not matching.SCIPY_AVAILABLE, reason="needs scipy")
+@pytest.mark.parametrize("seed", range(5))
+def test_solve_is_optimal(seed):
+    rng = np.random.default_rng(seed)
+    matcher = PieceMatcher(list(range(5)), rng.uniform(0.5, 1.5, 5), rng.choice([0.05, 0.06], 5))
+    matcher.add_pieces(Piece(length, width) for length, width in zip(rng.uniform(50, 200, 6), rng.choice([5, 6, 7], 6)))
+
+    assignment = matcher.solve()
+    assert len(set(map(id, assignment.values()))) == len(assignment)
+    assert np.isclose(assignment_cost(matcher), brute_force_waste(matcher))
+
+
+def test_greedy_fallback_assigns_distinct_pieces(monkeypatch):
+    monkeypatch.setattr(matching, "SCIPY_AVAILABLE", False)
+    matcher = PieceMatcher(["a", "b"], [1.0, 1.0], [0.05, 0.05])
+    pieces = [Piece(110, 5), Piece(150, 5)]
+    matcher.add_pieces(pieces)
+    assignment = matcher.solve()
+    assert assignment == {"a": pieces[0], "b": pieces[1]}
+
+
+def test_solve_reuses_unchanged_groups():
+    # the long piece is too narrow for the short beam: two independent groups
+    matcher = PieceMatcher(["short", "long"], [0.5, 2.0], [0.06, 0.05])
+    short, long = Piece(60, 6), Piece(210, 5)
+    matcher.add_pieces([short, long])
+    assert matcher.solve() == {"short": short, "long": long}
+
+    # a piece too short for the long beam only touches the group of the short one
+    calls = []
+    solve_group = matcher._solve_group
+    matcher._solve_group = lambda *args: calls.append(args) or solve_group(*args)
+    tighter = Piece(51, 6)
+    matcher.add_pieces([tighter])
+    assert matcher.solve() == {"short": tighter, "long": long}
+    assert len(calls) == 1
+
+    matcher.remove_piece(tighter)
+    assert matcher.solve() == {"short": short, "long": long}
@@ -0,0 +1,62 @@
+import time
+
+import numpy as np
+
+from nesting import exact, nest
+
+
+def random_batch(seed, beams=12, pieces=40):
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(0.3, 1.5, beams), rng.choice([0.05, 0.06], beams),
+            rng.uniform(1.0, 4.0, pieces), rng.choice([0.05, 0.06, 0.07], pieces))
+
+
+def assert_valid(nesting, widths, piece_widths, max_oversize=1.5):
+    placed = [beam for beams in nesting.layouts.values() for beam in beams]
+    assert len(placed) == len(set(placed))
+    assert sorted(placed + nesting.unplaced) == list(range(len(nesting.lengths)))
+    for piece, beams in nesting.layouts.items():
+        assert sum(nesting.lengths[beam] + nesting.kerf for beam in beams) <= nesting.piece_lengths[piece] + 1e-12
+        for beam in beams:
+            assert widths[beam] <= piece_widths[piece] <= widths[beam] * max_oversize
+
+
+def test_exact_mode_puts_two_beams_in_one_piece():
+    args = [1.0, 0.9], [0.05, 0.05], [2.0, 1.2, 1.2], [0.05, 0.05, 0.05]
+    assert np.isclose(nest(*args, kerf=0.01).used_length, 2.4)
+    nesting = nest(*args, kerf=0.01, exact_mode=True)
+    assert nesting.layouts == {0: [0, 1]}
+    assert nesting.offsets() == {0: (0, 0.0), 1: (0, 1.01)}
+    assert np.isclose(nesting.material_yield, 0.95)
+
+
+def test_beams_without_a_wide_enough_piece_are_unplaced():
+    nesting = nest([1.0, 1.0], [0.05, 0.08], [2.0, 2.0], [0.05, 0.05])
+    assert nesting.unplaced == [1]
+
+
+def test_exact_mode_is_never_worse():
+    for seed in range(3):
+        lengths, widths, piece_lengths, piece_widths = random_batch(seed)
+        heuristic = nest(lengths, widths, piece_lengths, piece_widths)
+        optimal = nest(lengths, widths, piece_lengths, piece_widths, exact_mode=True)
+        assert_valid(optimal, widths, piece_widths)
+        assert len(optimal.unplaced) <= len(heuristic.unplaced)
+        assert optimal.used_length <= heuristic.used_length + 1e-12
+
+
+def test_exact_search_stops_at_the_node_budget():
+    lengths, widths, piece_lengths, piece_widths = random_batch(0)
+    start = time.perf_counter()
+    nesting = nest(lengths, widths, piece_lengths, piece_widths, exact_mode=True, exact_nodes=20000)
+    assert time.perf_counter() - start < 10.0
+    assert_valid(nesting, widths, piece_widths)
+
+
+def test_exact_without_budget_left_returns_the_starting_layout():
+    needs = np.array([0.6, 0.5, 0.4])
+    piece_lengths = np.array([1.0, 1.0, 1.0])
+    compatible = np.ones((3, 3), dtype=bool)
+    start = [[0], [1], [2]]
+    assert exact(needs, piece_lengths, compatible, start, max_nodes=0) == start
+    assert sum(bool(beams) for beams in exact(needs, piece_lengths, compatible, start)) == 2
@@ -0,0 +1,91 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import parallel_cut
+from benchmark import build_truss, generate_layout
+from geometry_np import Truss
+
+
+def chain(count):
+    truss = Truss()
+    points = [(float(i), 0.1 * (i % 2), 0.0) for i in range(count)]
+    for point in points:
+        truss.add_node(point)
+    for a, b in zip(points, points[1:]):
+        truss.add_beam([a, b], 0.06, 0.05)
+    return truss
+
+
+def assert_independent(truss, classes):
+    colour = {index: c for c, indices in enumerate(classes) for index in indices}
+    assert sorted(colour) == list(range(len(truss.nodes)))
+    for beam in truss.beams:
+        assert colour[beam.start_node] != colour[beam.end_node]
+
+
+def test_classes_keep_the_index_order_of_every_beam():
+    truss = build_truss(generate_layout(2000, seed=3))
+    classes = parallel_cut.colour_nodes(truss)
+    assert_independent(truss, classes)
+    colour = {index: c for c, indices in enumerate(classes) for index in indices}
+    for beam in truss.beams:
+        low, high = sorted((beam.start_node, beam.end_node))
+        assert colour[low] < colour[high]
+
+
+def test_chain_is_cut_node_after_node():
+    truss = chain(5)
+    assert parallel_cut.colour_nodes(truss) == [[0], [1], [2], [3], [4]]
+
+
+def baseline_cut(truss):
+    """The node by node loop cut_all_beams has always run."""
+    for beam in truss.beams:
+        if not beam.fabricated:
+            beam.cut_polyline = beam.uncut_polyline
+    for node in truss.nodes:
+        node.cut_beams()
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_cut_all_beams_matches_the_node_by_node_loop(seed):
+    layout = generate_layout(1000, seed=seed)
+    reference = build_truss(layout)
+    baseline_cut(reference)
+    truss = build_truss(layout)
+    truss.cut_all_beams()
+    for beam, expected in zip(truss.beams, reference.beams):
+        assert np.array_equal(beam.cut_polyline, expected.cut_polyline)
+        assert np.array_equal(beam.axis, expected.axis)
+
+
+def cut_outlines(executor=None):
+    truss = build_truss(generate_layout(300, seed=5))
+    truss.cut_all_beams(executor)
+    return [beam.cut_polyline for beam in truss.beams]
+
+
+def test_parallel_cut_matches_serial_cut():
+    serial = cut_outlines()
+    with ThreadPoolExecutor(4) as executor:
+        threaded = cut_outlines(executor)
+    with ProcessPoolExecutor(2) as executor:
+        processes = cut_outlines(executor)
+    for a, b, c in zip(serial, threaded, processes):
+        assert np.array_equal(a, b)
+        assert np.array_equal(a, c)
+
+
+def test_update_cuts_after_adding_a_beam_cuts_everything():
+    truss = chain(6)
+    truss.cut_all_beams()
+    truss.add_beam([truss.nodes[0].position, truss.nodes[2].position], 0.06, 0.05)
+    truss.update_cuts()
+
+    reference = chain(6)
+    reference.add_beam([reference.nodes[0].position, reference.nodes[2].position], 0.06, 0.05)
+    reference.cut_all_beams()
+    for beam, expected in zip(truss.beams, reference.beams):
+        assert np.allclose(beam.cut_polyline, expected.cut_polyline)
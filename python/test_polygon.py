@@ -0,0 +1,82 @@
+import numpy as np
+
+import polygon
+
+
+def rectangle(x0, y0, x1, y1):
+    return np.array([[x0, y0, 0.0], [x1, y0, 0.0], [x1, y1, 0.0], [x0, y1, 0.0], [x0, y0, 0.0]])
+
+
+def test_remove_duplicates_keeps_closing_point():
+    points = np.array([[0, 0, 0], [0, 0, 0], [1, 0, 0], [1, 1, 0], [1, 1, 0], [0, 0, 0]], dtype=float)
+    result = polygon.remove_duplicates(points)
+    assert len(result) == 4
+    assert polygon.is_closed(result)
+
+
+def test_intersections_of_crossing_rectangles():
+    a = rectangle(0, 0, 2, 1)
+    b = rectangle(1, -1, 1.5, 2)
+    events = polygon.intersections(a, b)
+    points = sorted(tuple(np.round(point[:2], 9)) for point, _, _ in events)
+    assert points == [(1.0, 0.0), (1.0, 1.0), (1.5, 0.0), (1.5, 1.0)]
+    for point, ta, tb in events:
+        assert np.allclose(polygon.point_at(a, ta), point)
+        assert np.allclose(polygon.point_at(b, tb), point)
+
+
+def test_shared_vertex_is_reported_once():
+    a = rectangle(0, 0, 1, 1)
+    b = rectangle(1, 1, 2, 2)
+    assert len(polygon.intersections(a, b)) == 1
+
+
+def test_collinear_overlap_is_a_single_event():
+    a = rectangle(0, 0, 2, 1)
+    b = rectangle(0.5, -1, 1.5, 0)
+    events = polygon.intersections(a, b)
+    assert len(events) == 1
+    assert np.allclose(events[0][0], [0.5, 0.0, 0.0])
+
+
+def test_split_closed_polyline():
+    square = rectangle(0, 0, 1, 1)
+    pieces = polygon.split(square, [0.5, 2.5])
+    assert len(pieces) == 2
+    assert np.isclose(polygon.length(pieces[0]) + polygon.length(pieces[1]), 4.0)
+    assert np.allclose(pieces[0][0], [0.5, 0.0, 0.0])
+    assert np.allclose(pieces[0][-1], [0.5, 1.0, 0.0])
+
+
+def test_split_open_polyline_keeps_the_ends():
+    line = np.array([[0, 0, 0], [1, 0, 0], [2, 0, 0]], dtype=float)
+    pieces = polygon.split(line, [0.5, 1.5])
+    assert [len(piece) for piece in pieces] == [2, 3, 2]
+
+
+def test_trim_keeps_the_longer_side():
+    beam = rectangle(0, -0.05, 2, 0.05)
+    other = rectangle(1.5, -1, 3, 1)
+    trimmed = polygon.trim(beam, other, np.array([0.0, 0.0, 0.0]))
+    assert polygon.is_closed(trimmed)
+    assert np.isclose(trimmed[:, 0].max(), 1.5)
+    assert np.isclose(trimmed[:, 0].min(), 0.0)
+
+
+def test_trim_pol_mode_adds_the_corner_of_the_other_outline():
+    beam = rectangle(0, -0.05, 2, 0.05)
+    corner = np.array([[1.5, 0.0, 0.0], [2.5, -1.0, 0.0], [2.5, 1.0, 0.0], [1.5, 0.0, 0.0]])
+    line = polygon.trim(beam, corner, np.array([0.0, 0.0, 0.0]), "line")
+    pol = polygon.trim(beam, corner, np.array([0.0, 0.0, 0.0]), "pol")
+    assert len(pol) == len(line) + 1
+    assert any(np.allclose(point, [1.5, 0.0, 0.0]) for point in pol)
+
+
+def test_trim_without_crossing_returns_none():
+    assert polygon.trim(rectangle(0, 0, 1, 1), rectangle(3, 3, 4, 4), np.zeros(3)) is None
+
+
+def test_coordinates_of_points_lines_and_polylines():
+    assert polygon.coordinates(np.array([1.0, 2.0, 3.0])).shape == (1, 3)
+    assert polygon.coordinates([[0, 0, 0], [1, 0, 0]]).shape == (2, 3)
+    assert np.array_equal(polygon.coordinates(rectangle(0, 0, 1, 1)), rectangle(0, 0, 1, 1))
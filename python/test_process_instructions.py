@@ -0,0 +1,144 @@
+import importlib
+import sys
+import types
+
+import numpy as np
+import pytest
+
+
+# process_instructions runs inside Grasshopper; outside of it Rhino and the compas
+# packages that need it are replaced by the few names the module imports
+
+
+class StubFrame(object):
+    """compas.geometry.Frame: a point and orthonormal x and y axes."""
+
+    def __init__(self, point, xaxis, yaxis):
+        xaxis = np.asarray(xaxis, dtype=float)
+        yaxis = np.asarray(yaxis, dtype=float)
+        xaxis = xaxis / np.linalg.norm(xaxis)
+        yaxis = yaxis - xaxis * xaxis.dot(yaxis)
+        self.point = [float(value) for value in point]
+        self.xaxis = list(xaxis)
+        self.yaxis = list(yaxis / np.linalg.norm(yaxis))
+
+    def transformed(self, transformation):
+        # as compas, the transformed frame keeps the rotation of the transformation but not its scale
+        matrix = np.asarray(transformation.matrix, dtype=float)
+        point = matrix[:3, :3].dot(self.point) + matrix[:3, 3]
+        return StubFrame(point, matrix[:3, :3].dot(self.xaxis), matrix[:3, :3].dot(self.yaxis))
+
+
+class StubScale(object):
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    @classmethod
+    def from_factors(cls, factors):
+        return cls(np.diag(list(factors) + [1.0]).tolist())
+
+
+def stub_transform_points(points, matrix):
+    matrix = np.asarray(matrix, dtype=float)
+    points = np.asarray(points, dtype=float)
+    return (points.dot(matrix[:3, :3].T) + matrix[:3, 3]).tolist()
+
+
+class StubPoint(object):
+    def __init__(self, x, y, z):
+        self.X, self.Y, self.Z = x, y, z
+
+
+class StubPlane(object):
+    """Rhino.Geometry.Plane from an origin and two axes."""
+
+    def __init__(self, origin, xaxis, yaxis):
+        self.Origin, self.XAxis, self.YAxis = StubPoint(*origin), StubPoint(*xaxis), StubPoint(*yaxis)
+
+
+def stub_plane_to_compas_frame(plane):
+    frame = sys.modules["compas.geometry"].Frame
+    return frame(*[[point.X, point.Y, point.Z] for point in (plane.Origin, plane.XAxis, plane.YAxis)])
+
+
+def stub_module(monkeypatch, name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    monkeypatch.setitem(sys.modules, name, module)
+
+
+def importable(name):
+    try:
+        importlib.import_module(name)
+        return True
+    except ImportError:
+        return False
+
+
+@pytest.fixture
+def process_instructions(monkeypatch):
+    # compas itself runs anywhere and is used when installed
+    if not importable("compas.geometry"):
+        stub_module(monkeypatch, "compas")
+        stub_module(monkeypatch, "compas.geometry", Frame=StubFrame, Scale=StubScale, transform_points=stub_transform_points)
+        stub_module(monkeypatch, "compas.utilities", DataEncoder=object, DataDecoder=object)
+    if not importable("compas_rrc"):
+        stub_module(monkeypatch, "compas_rrc")
+    if not importable("compas_fab.robots"):
+        stub_module(monkeypatch, "compas_fab")
+        stub_module(monkeypatch, "compas_fab.robots", AttachedCollisionMesh=object, CollisionMesh=object, JointTrajectory=object)
+    stub_module(monkeypatch, "Rhino")
+    stub_module(monkeypatch, "Rhino.Geometry", Transform=object, Plane=StubPlane)
+    stub_module(monkeypatch, "compas_rhino")
+    stub_module(monkeypatch, "compas_rhino.geometry", RhinoMesh=object)
+    stub_module(monkeypatch, "compas_rhino.conversions", plane_to_compas_frame=stub_plane_to_compas_frame)
+    stub_module(monkeypatch, "compas_ghpython", draw_frame=None)
+
+    for name in ("process_instructions", "production_data"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    module = importlib.import_module("process_instructions")
+    yield module
+    for name in ("process_instructions", "production_data"):
+        sys.modules.pop(name, None)
+
+
+class StubRobot(object):
+    """Turns TCP frames into flange frames 0.2 m behind the TCP along the z axis of the frame."""
+
+    attached_tool = None
+
+    def __init__(self):
+        self.calls = []
+
+    def from_tcf_to_t0cf(self, frames):
+        self.calls.append(len(frames))
+        frame = sys.modules["compas.geometry"].Frame
+        flanges = []
+        for tcp in frames:
+            zaxis = np.cross(tcp.xaxis, tcp.yaxis)
+            flanges.append(frame(np.asarray(tcp.point) - 0.2 * zaxis, tcp.xaxis, tcp.yaxis))
+        return flanges
+
+
+def test_target_frames_match_the_frames_transformed_one_by_one(process_instructions):
+    planes = [
+        StubPlane((1.2, 0.5, 0.3), (1, 0, 0), (0, 1, 0)),
+        StubPlane((0.4, -1.1, 0.8), (0, 1, 0), (0, 0, 1)),
+        StubPlane((2.0, 0.1, 0.05), (0.6, 0.8, 0), (-0.8, 0.6, 0)),
+        StubPlane((1.2, 0.5, 0.3), (1, 0, 0), (0, 1, 0)),
+    ]
+    process = process_instructions.TFTProcess(StubRobot())
+    frames = process.target_frames(planes)
+
+    # as each target was converted before batching
+    robot = StubRobot()
+    for plane, frame in zip(planes, frames):
+        expected = robot.from_tcf_to_t0cf([stub_plane_to_compas_frame(plane)])[0].transformed(process.S)
+        assert np.allclose(list(frame.point), list(expected.point))
+        assert np.allclose(list(frame.xaxis), list(expected.xaxis))
+        assert np.allclose(list(frame.yaxis), list(expected.yaxis))
+
+    # one robot call for the three distinct planes, none for planes already converted
+    assert process.robot.calls == [3]
+    assert process.target_frames(planes[::-1])[::-1] == frames
+    assert process.robot.calls == [3]
@@ -0,0 +1,123 @@
+import json
+import math
+import os
+
+import numpy as np
+
+import speeds
+from cycle_time import load_joint_limits
+
+
+PROCESS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "20241213_all_process_9.json")
+# the full limits of the config, without MoveIt's default scaling
+UNSCALED = dict(velocity_scaling=1.0, acceleration_scaling=1.0)
+
+
+def joint_move(joints, zone=-1, speed=100.0):
+    return {"name": "MoveToJoints", "parameters": {"joints": joints, "speed": speed, "zone": zone}}
+
+
+def frame_move(x, y, zone=-1, speed=100.0, linear=False):
+    parameters = {"frame": {"point": [x, y, 0.0], "xaxis": [1, 0, 0], "yaxis": [0, 1, 0]}, "speed": speed, "zone": zone}
+    if linear:
+        parameters["motion_type"] = "rrc.Motion.LINEAR"
+    return {"name": "MoveToFrame", "parameters": parameters}
+
+
+def assigned(actions, **kwargs):
+    return [action["parameters"]["speed"] for action in speeds.assign_speeds(actions, **kwargs)]
+
+
+def test_cartesian_limits_are_read_from_the_config():
+    limits = speeds.load_cartesian_limits()
+    assert limits["max_trans_vel"] == 1 and limits["max_trans_acc"] == 2.25 and limits["max_trans_dec"] == 5
+    assert speeds.load_scaling_factors() == (0.1, 0.1)
+
+
+def test_limits_are_scaled_by_the_default_factors():
+    actions = [frame_move(0, 0), frame_move(10000, 0)]
+    assert assigned(actions) == [100.0, 100.0]
+    assert assigned(actions, **UNSCALED) == [1000.0, 1000.0]
+    # 10 mm from rest to rest at 225 mm/s^2 and 500 mm/s^2 peak below the 100 mm/s cap
+    actions = [frame_move(0, 0), frame_move(10, 0)]
+    assert assigned(actions)[1] == math.floor(math.sqrt(2 * 225.0 * 500.0 * 10.0 / 725.0))
+
+
+def test_profile_of_a_single_segment_from_rest_to_rest():
+    waypoints, peaks = speeds.profile(np.array([100.0]), np.array([1000.0]), [True, True], 2250.0, 5000.0)
+    assert np.allclose(waypoints, [0.0, 0.0])
+    # accelerate at a, decelerate at d: v^2 / (2 a) + v^2 / (2 d) = 100
+    assert np.isclose(peaks[0], math.sqrt(2 * 2250.0 * 5000.0 * 100.0 / 7250.0))
+
+
+def test_blended_segment_accelerates_from_rest_by_hand():
+    # from rest, 100 mm at 2250 mm/s^2 reach sqrt(2 * 2250 * 100) = 670.8 mm/s, then the long segment goes on at the cap
+    actions = [frame_move(0, 0), frame_move(100, 0, zone=10), frame_move(10100, 0)]
+    assert assigned(actions, **UNSCALED) == [1000.0, math.floor(math.sqrt(2 * 2250.0 * 100.0)), 1000.0]
+
+
+def test_marked_segments_get_the_cut_speed():
+    actions = [frame_move(0, 0), frame_move(500, 0, zone=10), frame_move(1000, 0, zone=10), frame_move(1500, 0)]
+    cutting = lambda action: action is actions[2]
+    result = assigned(actions, cutting=cutting, cut_speed=20.0)
+    assert result[2] == 20.0
+    assert result[1] > 20.0 and result[3] > 20.0
+
+
+def test_linear_moves_keep_their_programmed_speed():
+    actions = [frame_move(0, 0), frame_move(0, 500, linear=True), frame_move(0, 1000), frame_move(0, 1500, linear=True, speed=50.0)]
+    result = assigned(actions, **UNSCALED)
+    assert result[1] == 100.0 and result[3] == 50.0
+    assert result[2] > 100.0
+    assert assigned(actions, precise=None, **UNSCALED)[1] > 100.0
+
+
+def test_rotation_is_capped_by_the_rotation_speed():
+    turned = frame_move(100, 0)
+    turned["parameters"]["frame"]["xaxis"] = [0, 1, 0]
+    turned["parameters"]["frame"]["yaxis"] = [-1, 0, 0]
+    actions = [frame_move(0, 0), turned]
+    # 100 mm while turning by 90 degrees at 1.57 rad/s
+    assert assigned(actions, **UNSCALED)[1] == math.floor(100.0 * 1.57 / (math.pi / 2))
+
+
+def test_joint_segments_are_measured_by_forward_kinematics():
+    # the fourth axis swings the TCP on a 100 mm circle; all joints turn at most 1 rad/s, scaled to 0.1 rad/s
+    tcp = lambda joints: [100.0 * np.cos(np.radians(joints[3])), 100.0 * np.sin(np.radians(joints[3])), 1000.0]
+    limits = {"robotA_joint_{}".format(i): (1.0, None) for i in range(1, 7)}
+    actions = [joint_move([0] * 6), joint_move([0, 0, 0, 10, 0, 0])]
+    chord = 2 * 100.0 * math.sin(math.radians(5))
+    assert assigned(actions, joint_limits=limits, forward_kinematics=tcp)[1] == math.floor(chord / (math.radians(10) / 0.1))
+    # the reach estimate allows the full linear cap
+    assert assigned(actions, joint_limits=limits)[1] == 100.0
+    # a TCP standing still is not slowed down
+    assert assigned(actions, joint_limits=limits, forward_kinematics=lambda joints: [0.0, 0.0, 1000.0])[1] == 100.0
+
+
+def test_speeds_of_a_process_stay_within_the_scaled_limits():
+    with open(PROCESS_PATH) as file:
+        actions = json.load(file)["actions"]
+    programmed = [action["parameters"].get("speed") for action in actions]
+    speeds.assign_speeds(actions)
+
+    velocity_scaling, _ = speeds.load_scaling_factors()
+    limits = load_joint_limits()
+    max_velocities = velocity_scaling * np.array([limits["robotA_joint_{}".format(i)][0] for i in range(1, 7)])
+    previous = None
+    for action, speed in zip(actions, programmed):
+        if action["name"] not in speeds.MOTIONS:
+            continue
+        assigned_speed = action["parameters"]["speed"]
+        assert 1.0 <= assigned_speed <= velocity_scaling * 1000.0
+        if speeds.is_linear_frame(action):
+            assert assigned_speed <= speed
+        if action["name"] == "MoveToJoints":
+            joints = np.radians(action["parameters"]["joints"])
+            if previous is not None:
+                deltas = np.abs(joints - previous)
+                # the TCP distance estimated from the reach, at the assigned speed, takes as long as the slowest joint
+                if deltas.max() > 0:
+                    assert 1850.0 * deltas.max() / assigned_speed >= (deltas / max_velocities).max() - 1e-9
+            previous = joints
+        else:
+            previous = None
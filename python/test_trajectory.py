@@ -0,0 +1,52 @@
+import numpy as np
+
+from trajectory import joint_columns, sampled_checker, segment_deviations, simplify
+
+
+def test_joint_columns_follow_the_joint_names():
+    names = ["robotB_joint_{}".format(i) for i in range(1, 7)] + ["robotA_joint_{}".format(i) for i in range(6, 0, -1)]
+    assert joint_columns(names, "robotA") == [11, 10, 9, 8, 7, 6]
+    assert joint_columns(names, "robotB") == [0, 1, 2, 3, 4, 5]
+    values = np.arange(12.0)[None]
+    assert values[:, joint_columns(names, "robotA")].tolist() == [[11, 10, 9, 8, 7, 6]]
+
+
+def test_simplify_drops_collinear_waypoints():
+    values = np.linspace([0.0, 0.0], [1.0, 2.0], 11)
+    assert simplify(values, 1e-6) == [0, 10]
+
+
+def test_simplify_keeps_corners():
+    values = np.array([[0, 0], [0.5, 0], [1, 0], [1, 0.5], [1, 1]], dtype=float)
+    kept = simplify(values, 1e-3)
+    assert kept == [0, 2, 4]
+    assert np.all(segment_deviations(values, 0, 2) <= 1e-3)
+
+
+def test_simplify_stays_within_tolerance():
+    rng = np.random.default_rng(0)
+    values = np.cumsum(rng.normal(0, 0.01, (200, 6)), axis=0)
+    tolerance = 0.02
+    kept = simplify(values, tolerance)
+    assert kept[0] == 0 and kept[-1] == len(values) - 1 and len(kept) < len(values)
+    for start, end in zip(kept, kept[1:]):
+        assert np.all(segment_deviations(values, start, end) <= tolerance)
+
+
+def test_rejected_segments_are_split_again():
+    values = np.linspace([0.0, 0.0], [1.0, 0.0], 9)
+    # an obstacle near the middle of the straight path
+    state_valid = lambda state: abs(state[0] - 0.5) > 0.01
+    segment_valid = sampled_checker(state_valid, step=0.005)
+    kept = simplify(values, 1e-6, segment_valid)
+    assert len(kept) > 2
+    for start, end in zip(kept, kept[1:]):
+        assert end - start == 1 or segment_valid(values[start], values[end])
+
+
+def test_sampled_checker_samples_at_most_a_step_apart():
+    checked = []
+    segment_valid = sampled_checker(lambda state: checked.append(state.copy()) or True, step=0.1)
+    assert segment_valid(np.array([0.0, 0.0]), np.array([0.35, 0.1]))
+    assert len(checked) == 5
+    assert np.allclose(checked[0], [0.0, 0.0]) and np.allclose(checked[-1], [0.35, 0.1])
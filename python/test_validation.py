@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+
+import polygon
+import validation
+from geometry_np import Truss
+from test_geometry_np import JSON_DIR
+
+
+def rectangle(x0, y0, x1, y1):
+    return np.array([[x0, y0, 0.0], [x1, y0, 0.0], [x1, y1, 0.0], [x0, y1, 0.0], [x0, y0, 0.0]])
+
+
+def test_candidate_pairs_match_brute_force():
+    rng = np.random.default_rng(0)
+    lower = rng.uniform(0, 10, (300, 2))
+    boxes = np.stack([lower, lower + rng.uniform(0.05, 1.0, (300, 2))], axis=1)
+    pairs = {tuple(pair) for pair in validation.candidate_pairs(boxes).tolist()}
+
+    expected = set()
+    for i in range(len(boxes)):
+        for j in range(i + 1, len(boxes)):
+            if np.all(boxes[i, 0] <= boxes[j, 1]) and np.all(boxes[j, 0] <= boxes[i, 1]):
+                expected.add((i, j))
+    assert pairs == expected
+
+
+def test_intersection_area_of_rectangles():
+    areas = polygon.intersection_areas([rectangle(0, 0, 2, 2), rectangle(0, 0, 1, 1)],
+                                       [rectangle(1, 1, 3, 3), rectangle(2, 2, 3, 3)])
+    assert np.allclose(areas, [1.0, 0.0])
+
+
+def test_convex_pieces_cover_the_outline():
+    outline = np.array([[0, 0, 0], [2, 0, 0], [2, 2, 0], [1, 1, 0], [0, 2, 0], [0, 0, 0]], dtype=float)
+    assert not polygon.are_convex([outline])[0]
+    pieces = polygon.convex_pieces(outline)
+    assert all(polygon.are_convex(pieces))
+    assert np.isclose(sum(polygon.signed_area(piece) for piece in pieces), polygon.signed_area(outline))
+
+
+def test_cut_truss_has_no_overlaps_or_gaps():
+    truss = Truss.from_json(os.path.join(JSON_DIR, "truss.json"))
+    truss.cut_all_beams()
+    assert truss.find_overlaps() == []
+    assert truss.find_gaps() == []
+
+
+def test_uncut_beams_overlap_at_their_joints():
+    truss = Truss.from_json(os.path.join(JSON_DIR, "truss.json"))
+    for beam in truss.beams:
+        beam.cut_polyline = beam.uncut_polyline
+    overlaps = truss.find_overlaps()
+    assert len(overlaps) > 0
+    for overlap in overlaps:
+        a, b = (truss.beams[i] for i in overlap["beams"])
+        # overlapping beams share a node
+        assert {a.start_node, a.end_node} & {b.start_node, b.end_node}
+    areas = [overlap["area"] for overlap in overlaps]
+    assert areas == sorted(areas, reverse=True)
+
+
+def test_gap_between_separated_beams():
+    truss = Truss.from_json(os.path.join(JSON_DIR, "truss.json"))
+    truss.cut_all_beams()
+    node = max(truss.nodes, key=lambda node: len(node.connected_beams))
+    beam = node.connected_beams[0]
+    far = beam.axis[1] if np.allclose(beam.axis[0], node.position) else beam.axis[0]
+    direction = far - node.position
+    beam.cut_polyline = beam.cut_polyline + 0.1 * direction / np.linalg.norm(direction)
+    gaps = truss.find_gaps()
+    assert any(gap["node"] == node.id and beam.id in gap["beams"] for gap in gaps)
@@ -0,0 +1,61 @@
+import numpy as np
+
+from benchmark import build_truss, generate_layout
+from versions import History, PersistentVector
+
+
+def snapshot(truss):
+    return {
+        frozenset((beam.start_node, beam.end_node)): (beam.id, beam.width, beam.cut_polyline.tolist())
+        for beam in truss.beams
+    }
+
+
+def test_persistent_vector_shares_untouched_records():
+    vector = PersistentVector().set_many((i, str(i)) for i in range(100))
+    changed = vector.set(70, "seventy")
+    assert vector.get(70) == "70" and changed.get(70) == "seventy"
+    assert vector.changed(changed) == {70}
+    assert len(changed) == 100 and changed.get(100) is None
+
+
+def test_undo_and_redo_restore_the_truss():
+    truss = build_truss(generate_layout(60, seed=8))
+    truss.cut_all_beams()
+    history = History(truss)
+    before = snapshot(truss)
+
+    truss.nodes[5].move_node(truss.nodes[5].position + np.array([0.05, 0.0, 0.0]))
+    truss.update_cuts()
+    history.commit("move")
+    after = snapshot(truss)
+    assert history.diff(history.versions[0])["moved_nodes"] == [5]
+
+    history.undo()
+    assert snapshot(truss) == before
+    history.redo()
+    assert snapshot(truss) == after
+
+
+def test_checkout_after_remove_beam_restores_the_ids():
+    truss = build_truss(generate_layout(60, seed=9))
+    truss.cut_all_beams()
+    history = History(truss)
+    ids = sorted(beam.id for beam in truss.beams)
+    before = snapshot(truss)
+
+    for beam in truss.beams[3:6]:
+        truss.remove_beam(beam)
+    truss.update_cuts()
+    removed = history.commit("remove")
+    assert len(history.diff(history.versions[0])["removed_beams"]) == 3
+
+    history.checkout(history.versions[0])
+    assert sorted(beam.id for beam in truss.beams) == ids
+    assert snapshot(truss) == before
+    for node in truss.nodes:
+        assert node.connected_beams_ids == [beam.id for beam in node.connected_beams]
+
+    history.checkout(removed)
+    assert len(truss.beams) == len(ids) - 3
+    assert len({beam.id for beam in truss.beams}) == len(truss.beams)
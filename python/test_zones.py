@@ -0,0 +1,69 @@
+import numpy as np
+
+import zones
+
+
+def frame_move(x, y, z=0.0, linear=False):
+    parameters = {"frame": {"point": [x, y, z], "xaxis": [1, 0, 0], "yaxis": [0, 1, 0]}, "speed": 100, "zone": zones.FINE}
+    if linear:
+        parameters["motion_type"] = "rrc.Motion.LINEAR"
+    return {"name": "MoveToFrame", "parameters": parameters}
+
+
+def joint_move(*joints):
+    return {"name": "MoveToJoints", "parameters": {"joints": list(joints), "speed": 100, "zone": zones.FINE}}
+
+
+def assigned(actions, **kwargs):
+    return [action["parameters"]["zone"] for action in zones.assign_zones(actions, **kwargs) if action["name"] in zones.MOTIONS]
+
+
+def test_largest_standard_zone():
+    assert zones.largest_zone(14.1) == 10
+    assert zones.largest_zone(200) == 200
+    assert zones.largest_zone(0.5) == 0
+
+
+def test_straight_path_blends_half_the_shorter_segment():
+    actions = [frame_move(0, 0), frame_move(100, 0), frame_move(300, 0), frame_move(400, 0)]
+    assert assigned(actions) == [50, 50, 50, zones.FINE]
+
+
+def test_corner_is_limited_by_the_deviation():
+    # a 90 degree turn cuts the corner by about r * sin(45 degrees)
+    actions = [frame_move(0, 0), frame_move(300, 0), frame_move(300, 300), frame_move(300, 600)]
+    assert assigned(actions, max_deviation=10.0) == [150, 10, 150, zones.FINE]
+
+
+def test_stops_and_critical_motions_are_fine():
+    actions = [
+        frame_move(0, 0), frame_move(100, 0),
+        {"name": "SetDigital", "parameters": {"io_name": "Local_IO_0_DO1", "value": 1}},
+        frame_move(200, 0), frame_move(300, 0, linear=True), frame_move(400, 0),
+        {"name": "PrintText", "parameters": {"text": "passing"}},
+        frame_move(500, 0),
+    ]
+    assert assigned(actions) == [50, zones.FINE, 50, zones.FINE, 50, zones.FINE]
+
+
+def test_joint_zones_are_capped_without_forward_kinematics():
+    actions = [joint_move(0, 0, 0, 0, 0, 0), joint_move(0, 0, 0, 0, 0, 90), joint_move(0, 0, 0, 0, 0, 180)]
+    # 90 degrees of the last axis times the reach would allow a zone of 200
+    assert assigned(actions) == [10, 10, zones.FINE]
+    assert assigned(actions, max_joint_zone=np.inf) == [200, 200, zones.FINE]
+
+
+def test_joint_targets_are_measured_by_forward_kinematics():
+    # only the last axis turns, so the TCP does not move and cannot blend
+    actions = [joint_move(0, 0, 0, 0, 0, 0), joint_move(0, 0, 0, 0, 0, 90), joint_move(0, 0, 0, 0, 0, 180)]
+    assert assigned(actions, forward_kinematics=lambda joints: [1000.0, 0.0, 500.0]) == [0, 0, zones.FINE]
+
+    # the first axis swings the TCP around the base at 1000 mm
+    tcp = lambda joints: [1000.0 * np.cos(np.radians(joints[0])), 1000.0 * np.sin(np.radians(joints[0])), 500.0]
+    actions = [joint_move(0, 0, 0, 0, 0, 0), joint_move(10, 0, 0, 0, 0, 0), joint_move(20, 0, 0, 0, 0, 0),
+               frame_move(0, 1000, 500), frame_move(0, 1100, 500)]
+    result = assigned(actions, forward_kinematics=tcp)
+    assert result[0] == 80
+    # the TCP points of the robot model are not compared with frame targets, so the joint move before a frame stops
+    assert result[2] == zones.FINE
+    assert result[3:] == [50, zones.FINE]
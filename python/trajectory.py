@@ -0,0 +1,86 @@
+"""
+Simplification of planned joint trajectories.
+
+MoveIt returns densely sampled trajectories, and every waypoint becomes a
+MoveToJoints instruction for the RRC driver. The robot interpolates linearly
+in joint space between waypoints, so a waypoint can be dropped when the
+joint-space segment skipping it stays within a tolerance of the planned
+path. simplify does this with Ramer-Douglas-Peucker in joint space: the
+waypoint farthest from the segment joining the ends is kept and both halves
+are simplified again, until every dropped waypoint is within tolerance.
+
+The planned path is collision free, but the shortened segments are not
+planned; a segment_valid(start, end) callback can reject them, in which
+case the segment is split again at its farthest waypoint. sampled_checker
+builds such a callback from a check of single joint states.
+"""
+
+import numpy as np
+
+
+def joint_columns(joint_names, group):
+    """Returns the positions of group_joint_1 ... group_joint_6 in joint_names."""
+    position = {name: i for i, name in enumerate(joint_names)}
+    return [position["{}_joint_{}".format(group, i)] for i in range(1, 7)]
+
+
+def segment_deviations(values, start, end):
+    """Distances of values[start + 1:end] to the joint-space segment from values[start] to values[end]."""
+    a, b = values[start], values[end]
+    points = values[start + 1:end]
+    chord = b - a
+    length = chord @ chord
+    if length == 0.0:
+        return np.linalg.norm(points - a, axis=1)
+    t = np.clip((points - a) @ chord / length, 0.0, 1.0)
+    return np.linalg.norm(points - (a + t[:, None] * chord), axis=1)
+
+
+def simplify(values, tolerance=np.radians(0.5), segment_valid=None):
+    """Returns the indices of the waypoints to keep, first and last included.
+
+    values is an (n, joints) array in radians (metres for linear axes);
+    waypoints are dropped while the path stays within tolerance of them.
+    segment_valid(start, end), given two joint value arrays, returns False
+    for shortened segments that must not be used.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) <= 2:
+        return list(range(len(values)))
+
+    keep = {0, len(values) - 1}
+    stack = [(0, len(values) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        deviations = segment_deviations(values, start, end)
+        farthest = int(np.argmax(deviations))
+        if deviations[farthest] <= tolerance:
+            if segment_valid is None or segment_valid(values[start], values[end]):
+                continue
+            if deviations[farthest] == 0.0:
+                # collinear waypoints, split in the middle instead
+                farthest = (end - start) // 2 - 1
+        split = start + 1 + farthest
+        keep.add(split)
+        stack.append((start, split))
+        stack.append((split, end))
+    return sorted(keep)
+
+
+def sampled_checker(state_valid, step=np.radians(1.0)):
+    """Returns a segment_valid callback checking joint states at most step apart along each segment.
+
+    state_valid takes an array of joint values and returns True if that
+    state is free of collisions; segment ends are checked as well.
+    """
+
+    def segment_valid(start, end):
+        count = max(1, int(np.ceil(np.abs(end - start).max() / step)))
+        for t in np.linspace(0.0, 1.0, count + 1):
+            if not state_valid(start + t * (end - start)):
+                return False
+        return True
+
+    return segment_valid
@@ -0,0 +1,146 @@
+"""
+Checks of the cut outlines of a truss.
+
+find_overlaps looks for beams whose cut outlines overlap. A spatial hash of
+the outline bounding boxes keeps only the pairs whose boxes overlap, a
+separating axis test drops those whose convex hulls are apart, and the
+shared area of the rest is computed exactly, so large trusses are not
+checked pair by pair. find_gaps measures how far apart neighbouring beams
+are at each joint.
+"""
+
+import math
+
+import numpy as np
+
+import polygon
+
+
+def bounding_boxes(outlines):
+    """Returns the (n, 2, 2) lower and upper XY corners of the given outlines."""
+    points, _ = polygon.pad(outlines, closed=False)
+    return np.stack([points.min(axis=1), points.max(axis=1)], axis=1)
+
+
+def candidate_pairs(boxes, tolerance=0.0):
+    """Returns the (m, 2) index pairs i < j of boxes that overlap.
+
+    Like the node lookup of Truss, this hashes the boxes into a grid, with
+    cells the size of a typical box, and only compares boxes sharing a cell.
+    """
+    count = len(boxes)
+    if count < 2:
+        return np.zeros((0, 2), dtype=int)
+
+    lower = boxes[:, 0] - tolerance
+    upper = boxes[:, 1] + tolerance
+    cell = max(float(np.median((upper - lower).max(axis=1))), 1e-12)
+
+    first = np.floor(lower / cell).astype(np.int64)
+    last = np.floor(upper / cell).astype(np.int64)
+    spans = last - first + 1
+
+    # one entry per box and covered cell
+    counts = spans[:, 0] * spans[:, 1]
+    boxes_of_entries = np.repeat(np.arange(count), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cx = first[boxes_of_entries, 0] + offsets % spans[boxes_of_entries, 0]
+    cy = first[boxes_of_entries, 1] + offsets // spans[boxes_of_entries, 0]
+
+    order = np.lexsort((boxes_of_entries, cy, cx))
+    cx, cy, boxes_of_entries = cx[order], cy[order], boxes_of_entries[order]
+    new_cell = np.ones(len(cx), dtype=bool)
+    new_cell[1:] = (cx[1:] != cx[:-1]) | (cy[1:] != cy[:-1])
+    starts = np.nonzero(new_cell)[0]
+    sizes = np.diff(np.append(starts, len(cx)))
+
+    # all pairs within each cell, grouped by cell size
+    pairs = []
+    for size in np.unique(sizes[sizes > 1]):
+        members = boxes_of_entries[starts[sizes == size][:, None] + np.arange(size)]
+        i, j = np.triu_indices(size, 1)
+        pairs.append(np.stack([members[:, i].ravel(), members[:, j].ravel()], axis=1))
+    if not pairs:
+        return np.zeros((0, 2), dtype=int)
+    pairs = np.unique(np.sort(np.concatenate(pairs), axis=1), axis=0)
+
+    overlap = np.all((lower[pairs[:, 0]] <= upper[pairs[:, 1]]) & (lower[pairs[:, 1]] <= upper[pairs[:, 0]]), axis=1)
+    return pairs[overlap]
+
+
+def find_overlaps(truss, min_area=1e-9, tolerance=1e-9, beams=None):
+    """Returns the pairs of beams whose cut outlines overlap by more than min_area.
+
+    Pairs whose convex hulls overlap by less than the tolerance across are
+    not clipped.
+    Each entry is a dictionary with the two beam ids and the overlap area,
+    largest first. Outlines are compared in the XY plane of the truss.
+    """
+    if beams is None:
+        beams = truss.beams
+    outlines = [polygon.to_array(beam.cut_polyline) for beam in beams]
+
+    pairs = candidate_pairs(bounding_boxes(outlines))
+
+    # pairs whose convex hulls are apart cannot overlap
+    hulls = [polygon.convex_hull(outline) for outline in outlines]
+    pairs = pairs[~polygon.separated(hulls, hulls, tolerance, pairs)]
+
+    # clip each outline by the convex pieces of the other one
+    convex = polygon.are_convex(outlines)
+    pieces, owners, clip_pairs = [], [], []
+    pieces_of = {}
+    for k, (i, j) in enumerate(pairs.tolist()):
+        if j not in pieces_of:
+            start = len(pieces)
+            pieces += polygon.convex_pieces(outlines[j], convex[j])
+            pieces_of[j] = range(start, len(pieces))
+        for piece in pieces_of[j]:
+            clip_pairs.append((i, piece))
+            owners.append(k)
+
+    areas = np.zeros(len(pairs))
+    np.add.at(areas, np.array(owners, dtype=int), polygon.intersection_areas(outlines, pieces, clip_pairs))
+
+    overlaps = [
+        {"beams": (beams[i].id, beams[j].id), "area": float(area)}
+        for (i, j), area in zip(pairs.tolist(), areas) if area > min_area
+    ]
+    return sorted(overlaps, key=lambda overlap: overlap["area"], reverse=True)
+
+
+def find_gaps(truss, tolerance=1e-6):
+    """Returns the neighbouring beams at each joint whose cut outlines do not touch.
+
+    Beams are neighbours when they follow each other around the node. Each
+    entry is a dictionary with the node id, the two beam ids and the XY
+    distance between their outlines, largest first.
+    """
+    pairs = []
+    for node in truss.nodes:
+        if len(node.connected_beams) < 2:
+            continue
+        position = polygon.coordinates(node.position)[0]
+
+        angles = []
+        for beam in node.connected_beams:
+            axis = polygon.coordinates(beam.axis)
+            other = axis[1] if np.linalg.norm(axis[0] - position) < truss.tolerance else axis[0]
+            angles.append(math.atan2(other[1] - position[1], other[0] - position[0]))
+        ordered = [node.connected_beams[i] for i in sorted(range(len(angles)), key=lambda i: angles[i])]
+
+        for k, beam in enumerate(ordered):
+            following = ordered[(k + 1) % len(ordered)]
+            if len(ordered) > 2 or k == 0:
+                pairs.append((node, beam, following))
+
+    distances = polygon.distances(
+        [polygon.to_array(beam.cut_polyline) for _, beam, _ in pairs],
+        [polygon.to_array(beam.cut_polyline) for _, _, beam in pairs],
+    )
+
+    gaps = [
+        {"node": node.id, "beams": (a.id, b.id), "distance": float(distance)}
+        for (node, a, b), distance in zip(pairs, distances) if distance > tolerance
+    ]
+    return sorted(gaps, key=lambda gap: gap["distance"], reverse=True)
@@ -0,0 +1,391 @@
+"""
+Versions of a truss with structural sharing.
+
+A History records snapshots of a truss as it is edited. Every version keeps
+the state of each node (position, has_moved and the outlines its last cut
+gave its beams) and of each beam (end nodes, axis, section, flags and cut
+outline) in two persistent vectors: 32-way tries that are copied along the
+path of a change only, so a version shares every untouched node and beam
+record with its parent. Records hold references to the geometry objects of
+the truss rather than copies; the geometry backends replace positions, axes
+and outlines instead of mutating them, so a recorded object never changes.
+
+The truss tracks which nodes and beams were edited since the last commit
+(Truss._edited_nodes / _edited_beams), so committing, diffing, undoing and
+checking out a branch cost time proportional to the edit, not to the truss.
+Beams are identified by their pair of end node indices and nodes by their
+index; a beam brought back by a checkout keeps the id it was recorded with. Truss has no way to remove nodes, so nodes that do not exist in a
+checked out version are left in place, without beams.
+"""
+
+from polygon import coordinates
+
+
+BRANCHING = 32
+BITS = 5
+
+
+def _trie_get(root, depth, index):
+    node = root
+    for level in range(depth, -1, -1):
+        if node is None:
+            return None
+        node = node[(index >> (level * BITS)) & (BRANCHING - 1)]
+    return node
+
+
+def _trie_set(root, depth, index, value):
+    """Returns a copy of the trie with value at index, sharing every other branch."""
+    node = list(root) if root is not None else [None] * BRANCHING
+    slot = (index >> (depth * BITS)) & (BRANCHING - 1)
+    if depth == 0:
+        node[slot] = value
+    else:
+        node[slot] = _trie_set(node[slot], depth - 1, index, value)
+    return tuple(node)
+
+
+def _trie_diff(a, b, depth, offset=0):
+    """Yields the indices whose values are different objects in two tries, skipping shared branches."""
+    if a is b:
+        return
+    for slot in range(BRANCHING):
+        child_a = a[slot] if a is not None else None
+        child_b = b[slot] if b is not None else None
+        if child_a is child_b:
+            continue
+        index = offset + (slot << (depth * BITS))
+        if depth == 0:
+            yield index
+        else:
+            yield from _trie_diff(child_a, child_b, depth - 1, index)
+
+
+class PersistentVector:
+    """An immutable sequence; set returns a new vector sharing all but one path with this one."""
+
+    def __init__(self, root=None, depth=0, size=0):
+
+        self._root = root
+        self._depth = depth
+        self.size = size
+
+    def get(self, index):
+        if index >= self.size:
+            return None
+        return _trie_get(self._root, self._depth, index)
+
+    def set(self, index, value):
+        root, depth = self._root, self._depth
+        # grow the trie by one level until the index fits
+        while index >= BRANCHING ** (depth + 1):
+            root = (root,) + (None,) * (BRANCHING - 1) if root is not None else None
+            depth += 1
+        return PersistentVector(_trie_set(root, depth, index, value), depth, max(self.size, index + 1))
+
+    def set_many(self, items):
+        vector = self
+        for index, value in items:
+            vector = vector.set(index, value)
+        return vector
+
+    def changed(self, other):
+        """Indices whose values are different objects in the two vectors."""
+        depth = max(self._depth, other._depth)
+        return set(_trie_diff(self._grown(depth), other._grown(depth), depth))
+
+    def _grown(self, depth):
+        root = self._root
+        for _ in range(depth - self._depth):
+            root = (root,) + (None,) * (BRANCHING - 1) if root is not None else None
+        return root
+
+    def __len__(self):
+        return self.size
+
+
+class NodeRecord:
+    """The state of a node in a version; cut_results maps beam node pairs to outlines."""
+
+    __slots__ = ("position", "has_moved", "cut_results")
+
+    def __init__(self, position, has_moved, cut_results):
+        self.position = position
+        self.has_moved = has_moved
+        self.cut_results = cut_results
+
+
+class BeamRecord:
+    """The state of a beam in a version."""
+
+    __slots__ = ("id", "start_node", "end_node", "axis", "height", "width", "reference_width", "is_new", "fabricated", "cut_polyline")
+
+    def __init__(self, beam):
+        for name in self.__slots__:
+            setattr(self, name, getattr(beam, name))
+
+    def same(self, beam):
+        """True if the beam still refers to the recorded objects and values."""
+        return all(getattr(self, name) is getattr(beam, name) or getattr(self, name) == getattr(beam, name)
+                   for name in ("start_node", "end_node", "height", "width", "reference_width", "is_new", "fabricated")) \
+            and self.axis is beam.axis and self.cut_polyline is beam.cut_polyline
+
+
+def _pair(beam):
+    return frozenset((beam.start_node, beam.end_node))
+
+
+def _same_results(a, b):
+    """True if two recorded cut results hold the same outline objects."""
+    if a is None or b is None:
+        return a is b
+    return len(a) == len(b) and all(pair_a == pair_b and outline_a is outline_b
+                                    for (pair_a, outline_a), (pair_b, outline_b) in zip(a, b))
+
+
+def _same_geometry(a, b, tolerance):
+    if a is b:
+        return True
+    if a is None or b is None:
+        return False
+    a, b = coordinates(a), coordinates(b)
+    return a.shape == b.shape and bool(abs(a - b).max(initial=0.0) <= tolerance)
+
+
+class Version:
+    """A snapshot of a truss. Versions are immutable and share unchanged records with their parent."""
+
+    def __init__(self, id, parent, nodes, beams, label=None):
+
+        self.id = id
+        self.parent = parent
+        self.nodes = nodes
+        self.beams = beams
+        self.label = label
+
+    def __repr__(self):
+        parent = self.parent.id if self.parent is not None else None
+        return f"Version(ID={self.id}, Parent={parent}, Label={self.label})"
+
+
+class History:
+    """Versions of one truss, with undo, redo, branches and diffs.
+
+    Commit after update_cuts (or cut_all_beams), so versions hold up to date cuts.
+    """
+
+    def __init__(self, truss, tolerance=1e-9):
+
+        self.truss = truss
+        self.tolerance = tolerance
+        # beams are stored at a slot per node pair, for every pair ever seen
+        self._slots = {}
+        self._pairs = []
+        self.versions = []
+        self.branches = {}
+        self.tags = {}
+        self.head = None
+        self._redo = []
+
+        self.commit("initial", full=True)
+
+    def _slot(self, pair):
+        slot = self._slots.get(pair)
+        if slot is None:
+            slot = self._slots[pair] = len(self._pairs)
+            self._pairs.append(pair)
+        return slot
+
+    def _node_record(self, node):
+        cut_results = None
+        if node.cut_results is not None:
+            cut_results = tuple((_pair(beam), outline) for beam, outline in node.cut_results.items())
+        return NodeRecord(node.position, node.has_moved, cut_results)
+
+    def commit(self, label=None, nodes=(), beams=(), full=False):
+        """Records the nodes and beams edited since the last commit as a new version.
+
+        Edits the truss does not track, such as setting Beam.fabricated after
+        fabrication, are recorded by passing the nodes and beams concerned,
+        or with full=True, which compares every node and beam.
+        """
+        truss = self.truss
+        if full:
+            node_indices = set(range(len(truss.nodes)))
+            edited_beams = set(truss.beams)
+            pairs = set(self._slots)
+        else:
+            node_indices = set(truss._edited_nodes) | {truss._node_index(node) for node in nodes}
+            edited_beams = set(truss._edited_beams) | set(beams)
+            pairs = set()
+
+        previous = self.head
+        node_vector = previous.nodes if previous is not None else PersistentVector()
+        beam_vector = previous.beams if previous is not None else PersistentVector()
+
+        node_items = []
+        for index in node_indices:
+            record = self._node_record(truss.nodes[index])
+            old = node_vector.get(index)
+            if old is None or old.position is not record.position or old.has_moved != record.has_moved \
+                    or not _same_results(old.cut_results, record.cut_results):
+                node_items.append((index, record))
+
+        # removed beams are no longer in the truss, but still in the edited set
+        beam_items = []
+        for beam in edited_beams:
+            pairs.add(_pair(beam))
+        for pair in pairs:
+            beam = truss.find_beam(*pair)
+            slot = self._slot(pair)
+            old = beam_vector.get(slot)
+            if beam is None:
+                if old is not None:
+                    beam_items.append((slot, None))
+            elif old is None or not old.same(beam):
+                beam_items.append((slot, BeamRecord(beam)))
+
+        version = Version(len(self.versions), previous,
+                          node_vector.set_many(node_items), beam_vector.set_many(beam_items), label)
+        self.versions.append(version)
+        self.head = version
+        self._redo = []
+        truss._edited_nodes.clear()
+        truss._edited_beams.clear()
+        return version
+
+    def diff(self, a, b=None):
+        """Returns what changed from version a to version b (the head by default).
+
+        The result lists the indices of moved nodes and the node pairs of
+        added, removed and re-cut beams, and of beams whose section or flags
+        changed.
+        """
+        b = self.head if b is None else b
+        result = {"moved_nodes": [], "added_beams": [], "removed_beams": [], "changed_cuts": [], "changed_beams": []}
+
+        for index in sorted(a.nodes.changed(b.nodes)):
+            old, new = a.nodes.get(index), b.nodes.get(index)
+            if old is None or new is None or not _same_geometry(old.position, new.position, self.tolerance):
+                result["moved_nodes"].append(index)
+
+        for slot in sorted(a.beams.changed(b.beams)):
+            old, new = a.beams.get(slot), b.beams.get(slot)
+            pair = tuple(sorted(self._pairs[slot]))
+            if old is None:
+                result["added_beams"].append(pair)
+            elif new is None:
+                result["removed_beams"].append(pair)
+            else:
+                if not _same_geometry(old.cut_polyline, new.cut_polyline, self.tolerance):
+                    result["changed_cuts"].append(pair)
+                if (old.width, old.height, old.reference_width, old.is_new, old.fabricated) != \
+                        (new.width, new.height, new.reference_width, new.is_new, new.fabricated):
+                    result["changed_beams"].append(pair)
+        return result
+
+    def checkout(self, version):
+        """Brings the truss to a version and makes it the head; uncommitted edits are discarded.
+
+        Only the nodes and beams that differ from the head, or were edited
+        since the last commit, are touched.
+        """
+        truss = self.truss
+        node_indices = version.nodes.changed(self.head.nodes) | set(truss._edited_nodes)
+        slots = version.beams.changed(self.head.beams) | {self._slot(_pair(beam)) for beam in truss._edited_beams}
+
+        # beams that do not exist in the version go first, so node moves do not invalidate them
+        ends = set()
+        for slot in slots:
+            if version.beams.get(slot) is None:
+                beam = truss.find_beam(*self._pairs[slot])
+                if beam is not None:
+                    truss.remove_beam(beam)
+                    ends.update((beam.start_node, beam.end_node))
+
+        for index in sorted(node_indices):
+            record = version.nodes.get(index)
+            if record is None:
+                continue
+            if index >= len(truss.nodes):
+                node = truss.add_node(record.position)
+                if truss._node_index(node) != index:
+                    raise ValueError(f"Node {index} of version {version.id} coincides with node {node.id}.")
+            node = truss.nodes[index]
+            old_position = node.position
+            node.position = record.position
+            node.has_moved = record.has_moved
+            truss.reindex_node(node, old_position)
+
+        restored = []
+        for slot in slots:
+            record = version.beams.get(slot)
+            if record is None:
+                continue
+            beam = truss.find_beam(record.start_node, record.end_node)
+            if beam is None:
+                beam = truss.add_beam(record.axis, record.height, record.width, record.is_new, record.fabricated, compute_geometry=False)
+            for name in BeamRecord.__slots__:
+                setattr(beam, name, getattr(record, name))
+            # add_beam numbers a re-added beam after the others; it gets its recorded id back
+            for index in (beam.start_node, beam.end_node):
+                node = truss.nodes[index]
+                node.connected_beams_ids = [other.id for other in node.connected_beams]
+            restored.append(beam)
+        if restored:
+            cuts = [beam.cut_polyline for beam in restored]
+            truss.update_beam_geometry(restored)
+            for beam, cut in zip(restored, cuts):
+                beam.cut_polyline = cut
+
+        # node cut results refer to the beams of the truss, found by their node pair
+        ends.update(node for beam in restored for node in (beam.start_node, beam.end_node))
+        for index in node_indices | ends:
+            record = version.nodes.get(index)
+            if record is None or index >= len(truss.nodes):
+                continue
+            node = truss.nodes[index]
+            node.cut_results = None
+            if record.cut_results is not None:
+                node.cut_results = {truss.find_beam(*pair): outline for pair, outline in record.cut_results}
+
+        truss._dirty_nodes.clear()
+        truss._dirty_beams.clear()
+        truss._edited_nodes.clear()
+        truss._edited_beams.clear()
+        self.head = version
+        return version
+
+    def undo(self):
+        """Checks out the parent of the head; returns it, or None at the first version."""
+        if self.head.parent is None:
+            return None
+        self._redo.append(self.head)
+        return self.checkout(self.head.parent)
+
+    def redo(self):
+        """Checks out the version undone last; returns it, or None."""
+        if not self._redo:
+            return None
+        return self.checkout(self._redo.pop())
+
+    def branch(self, name, version=None):
+        """Names a version (the head by default) as a branch to return to with switch."""
+        self.branches[name] = self.head if version is None else version
+        return self.branches[name]
+
+    def switch(self, name):
+        """Checks out the version of a branch."""
+        return self.checkout(self.branches[name])
+
+    def tag(self, name, version=None):
+        """Marks a version (the head by default), e.g. tag("fabricated") after sending beams to the robot."""
+        self.tags[name] = self.head if version is None else version
+        return self.tags[name]
+
+    def since(self, name):
+        """What changed since a tagged version, see diff."""
+        return self.diff(self.tags[name], self.head)
+
+    def __repr__(self):
+        return f"History(Versions={len(self.versions)}, Head={self.head.id}, Branches={list(self.branches)})"
@@ -0,0 +1,105 @@
+"""
+Zone assignment for the motions of a production action list.
+
+A motion with a FINE zone (-1) makes the robot stop on its target; any
+other zone lets it blend into the next motion within that radius (mm).
+assign_zones goes through a list of Actions and gives every motion the
+largest standard ABB zone that is safe for it:
+
+- FINE before IO, WaitTime, Stop and any other action that needs the robot
+  standing still, on the last motion, and on process-critical targets
+  (linear MoveToFrame motions by default, i.e. picks and cuts);
+- otherwise at most half of the shorter of the segments into and out of the
+  target, so blends do not overlap, and small enough that cutting the
+  corner between the two segments deviates from the target by at most
+  max_deviation.
+
+Cartesian targets are measured in mm from their frames. Joint targets are
+measured from the TCP position forward_kinematics gives for them; that
+point is in the frame of the robot model rather than the robot base frame
+of Cartesian targets, so a joint motion followed by a Cartesian one still
+stops on its target. Without forward_kinematics, the tool motion of a joint move is unknown: reach, the largest
+distance (mm) from the robot base to the tool, times the largest joint
+change only bounds it from above, so joint-move zones are also capped at
+max_joint_zone.
+"""
+
+import math
+
+import numpy as np
+
+from motions import FINE, MOTIONS, PASSTHROUGH, action_name, action_parameters, is_linear_frame, motion_target
+
+
+STANDARD_ZONES = (0, 1, 5, 10, 15, 20, 30, 40, 50, 60, 80, 100, 150, 200)
+
+
+def default_critical(action):
+    """Linear Cartesian motions: the approach, pick and cut targets of a process."""
+    return is_linear_frame(action)
+
+
+def _length(kind, delta):
+    # the largest joint change bounds the tool motion; frames give the tool motion itself
+    return float(np.abs(delta).max()) if kind == "joints" else float(np.linalg.norm(delta))
+
+
+def largest_zone(radius):
+    """The largest standard zone not above radius, or 0 if none fits."""
+    fitting = [zone for zone in STANDARD_ZONES if zone <= radius]
+    return fitting[-1] if fitting else 0
+
+
+def zone_limit(incoming, outgoing, kind, max_deviation):
+    """Largest blend radius (mm) at a target reached by incoming and left by outgoing (coordinate deltas)."""
+    lengths = [_length(kind, delta) for delta in (incoming, outgoing) if delta is not None]
+    limit = 0.5 * min(lengths)
+    if incoming is not None and lengths[0] > 0 and lengths[-1] > 0:
+        cosine = np.dot(incoming, outgoing) / (np.linalg.norm(incoming) * np.linalg.norm(outgoing))
+        turn = math.acos(float(np.clip(cosine, -1.0, 1.0)))
+        # a blend of radius r cuts a corner turning by `turn` by about r * sin(turn / 2)
+        if math.sin(turn / 2) > 0:
+            limit = min(limit, max_deviation / math.sin(turn / 2))
+    return limit
+
+
+def assign_zones(actions, max_deviation=10.0, reach=1850.0, critical=default_critical, forward_kinematics=None,
+                 max_joint_zone=10.0):
+    """Sets the zone of every motion in a list of Actions (or their data dicts) and returns the list.
+
+    critical(action) marks motions that must stop on their target.
+    forward_kinematics(joints in degrees) returns the TCP point (mm) of a
+    joint target; without it, zones of joint targets are at most
+    max_joint_zone.
+    """
+    motions = [i for i, action in enumerate(actions) if action_name(action) in MOTIONS]
+
+    for k, i in enumerate(motions):
+        action = actions[i]
+        next_motion = motions[k + 1] if k + 1 < len(motions) else None
+
+        # the robot has to stand still for what comes before the next motion
+        stops = next_motion is None or any(action_name(actions[j]) not in PASSTHROUGH for j in range(i + 1, next_motion))
+        if stops or critical(action):
+            action_parameters(action)["zone"] = FINE
+            continue
+
+        kind, target = motion_target(action, reach, forward_kinematics)
+        next_kind, next_target = motion_target(actions[next_motion], reach, forward_kinematics)
+        if next_kind != kind:
+            # targets of different kinds are in different coordinates, so stop to be safe
+            action_parameters(action)["zone"] = FINE
+            continue
+
+        incoming = None
+        if k > 0:
+            previous_kind, previous_target = motion_target(actions[motions[k - 1]], reach, forward_kinematics)
+            if previous_kind == kind:
+                incoming = target - previous_target
+
+        radius = zone_limit(incoming, next_target - target, kind, max_deviation)
+        if kind == "joints":
+            radius = min(radius, max_joint_zone)
+        action_parameters(action)["zone"] = largest_zone(radius)
+
+    return actions